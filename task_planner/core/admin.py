@@ -1,140 +1,54 @@
+from django import forms
 from django.contrib import admin, messages
-from django.conf import settings
-import requests
 
-from .models import User, Team, Board, Task
+from .models import MAX_TEAM_MEMBERS, User, Team, Board, Task, ArchivedTask, ExportJob, ExportJobItem
+from . import services
+from .services import ServiceError
+from .exports import bundle_response
 
 # Custom export action
-@admin.action(description='Export selected boards to file (via API)')
+@admin.action(description='Export selected boards to file (background job)')
 def export_boards(modeladmin, request, queryset):
-    for board in queryset:
-        try:
-            response = requests.post(
-                f"http://127.0.0.1:8000/api/board/export/",
-                json={"id": str(board.id)}
-            )
-            if response.status_code == 200:
-                filename = response.json().get("out_file", "export.txt")
-                messages.success(request, f'Board "{board.name}" exported to {filename}.')
-            else:
-                messages.error(request, f'Failed to export board "{board.name}".')
-        except Exception as e:
-            messages.error(request, f'Error exporting board "{board.name}": {e}')
-
-#user create
-@admin.action(description='Create selected users via API')
-def create_users_via_api(modeladmin, request, queryset):
-    for user in queryset:
-        try:
-            response = requests.post(
-                "http://127.0.0.1:8000/api/user/create/",
-                json={
-                    "name": user.name,
-                    "display_name": user.display_name
-                }
-            )
-            if response.status_code == 201:
-                messages.success(request, f'User "{user.name}" created via API.')
-            else:
-                error = response.json().get('error', 'Unknown error')
-                messages.error(request, f'Failed to create user "{user.name}": {error}')
-        except Exception as e:
-            messages.error(request, f'Error creating user "{user.name}": {e}')
-
-#team create
-@admin.action(description='Create selected teams via API')
-def create_teams_via_api(modeladmin, request, queryset):
-    for team in queryset:
-        try:
-            # Extract user IDs from the related users field
-            user_ids = list(team.users.values_list('id', flat=True))
-
-            payload = {
-                "name": team.name,
-                "admin": str(team.admin.id) if team.admin else None,
-                "users": [str(uid) for uid in user_ids]
-            }
-
-            response = requests.post(
-                "http://127.0.0.1:8000/api/team/create/",
-                json=payload
-            )
-
-            if response.status_code == 201:
-                messages.success(request, f'Team "{team.name}" created via API.')
-            else:
-                error = response.json().get('error', 'Unknown error')
-                messages.error(request, f'Failed to create team "{team.name}": {error}')
-        except Exception as e:
-            messages.error(request, f'Error creating team "{team.name}": {e}')
-#board 
-@admin.action(description='Create selected boards via API')
-def create_boards_via_api(modeladmin, request, queryset):
-    for board in queryset:
-        try:
-            payload = {
-                "name": board.name,
-                "description": board.description,
-                "team_id": str(board.team.id),
-                "creation_time": board.creation_time.isoformat() if board.creation_time else None
-            }
-
-            response = requests.post(
-                "http://127.0.0.1:8000/api/board/create/",
-                json=payload
-            )
-
-            if response.status_code == 201:
-                messages.success(request, f'Board "{board.name}" created via API.')
-            else:
-                error = response.json().get('error', 'Unknown error')
-                messages.error(request, f'Failed to create board "{board.name}": {error}')
-        except Exception as e:
-            messages.error(request, f'Error creating board "{board.name}": {e}')
+    try:
+        job = services.queue_export(list(queryset.values_list('id', flat=True)))
+        messages.success(
+            request,
+            f'Export job {job.id} queued for {job.items.count()} board(s). '
+            f'Poll api/board/export-status/ for the output files.'
+        )
+    except ServiceError as e:
+        messages.error(request, f'Error queuing board export: {e.message}')
+
+@admin.action(description='Download selected boards as one zip')
+def export_boards_bundle(modeladmin, request, queryset):
+    try:
+        board_ids, name = services.bundle_boards(board_ids=list(queryset.values_list('id', flat=True)))
+    except ServiceError as e:
+        messages.error(request, f'Error exporting boards: {e.message}')
+        return None
+    return bundle_response(board_ids, name, "text", "zip")
+
+
+@admin.action(description='Download all boards of selected teams as one zip')
+def export_teams_bundle(modeladmin, request, queryset):
+    board_ids = list(Board.objects.filter(team__in=queryset).values_list('id', flat=True))
+    if not board_ids:
+        messages.error(request, 'The selected teams have no boards.')
+        return None
+    try:
+        board_ids, _ = services.bundle_boards(board_ids=board_ids)
+    except ServiceError as e:
+        messages.error(request, f'Error exporting boards: {e.message}')
+        return None
+    teams = list(queryset.values_list('name', flat=True)[:2])
+    name = teams[0].replace(' ', '_') if len(teams) == 1 else "teams"
+    return bundle_response(board_ids, name, "text", "zip")
 
 #user list
-@admin.action(description='Fetch all users via API')
-def list_users_via_api(modeladmin, request, queryset):
-    try:
-        response = requests.get("http://127.0.0.1:8000/api/user/list/")
-        if response.status_code == 200:
-            users = response.json()
-            messages.info(request, f"Users: {users}")
-        else:
-            messages.error(request, f"Failed to fetch users: {response.json().get('error')}")
-    except Exception as e:
-        messages.error(request, f"Error: {e}")
-
-# task create
-@admin.action(description='Create selected tasks via API')
-def create_tasks_via_api(modeladmin, request, queryset):
-    for task in queryset:
-        try:
-            # Prepare the payload to send to the API
-            payload = {
-                "title": task.title,
-                "description": task.description,
-                "status": task.status,
-                "board_id": str(task.board.id),  # Assuming each task is assigned to a board
-                "user_id": str(task.user.id) if task.user else None,  # If a user is assigned to the task
-                "creation_time": task.creation_time.isoformat() if task.creation_time else None,
-                "end_time": task.end_time.isoformat() if task.end_time else None,
-            }
-
-            # Send the request to the API to create the task
-            response = requests.post(
-                "http://127.0.0.1:8000/task/add/",  # Use the /task/add/ URL to add a new task
-                json=payload
-            )
-
-            # Check the response from the API
-            if response.status_code == 201:
-                messages.success(request, f'Task "{task.title}" created via API.')
-            else:
-                error = response.json().get('error', 'Unknown error')
-                messages.error(request, f'Failed to create task "{task.title}": {error}')
-        except Exception as e:
-            messages.error(request, f'Error creating task "{task.title}": {e}')
+@admin.action(description='Fetch all users')
+def list_users(modeladmin, request, queryset):
+    names = list(User.objects.order_by('creation_time', 'id').values_list('name', flat=True))
+    messages.info(request, f"Users: {names}")
 
 
 admin.site.site_header = "Task Planner"
@@ -144,22 +58,98 @@ admin.site.index_title = "Welcome to Task Planner Admin"
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'display_name')
+    actions = [list_users]
     def get_readonly_fields(self, request, obj=None):
         if obj:  # Editing an existing object
             return ('name',)
         return ()
 
+class TeamAdminForm(forms.ModelForm):
+    class Meta:
+        model = Team
+        fields = '__all__'
+
+    def clean_users(self):
+        # Team.clean() only sees the saved member_count, not the submitted selection
+        users = self.cleaned_data['users']
+        if len(users) > MAX_TEAM_MEMBERS:
+            raise forms.ValidationError(f"A team cannot have more than {MAX_TEAM_MEMBERS} members.")
+        return users
+
+
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'admin', 'creation_time')
+    form = TeamAdminForm
+    list_display = ('id', 'name', 'admin', 'member_count', 'creation_time')
+    readonly_fields = ('member_count',)
     filter_horizontal = ('users',)
+    actions = [export_teams_bundle]
 
 
 @admin.register(Board)
 class BoardAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'team', 'status', 'creation_time', 'end_time')
-    actions = [export_boards]  # 🔥 Add the export action here
+    list_display = ('id', 'name', 'team', 'status', 'open_tasks', 'in_progress_tasks', 'complete_tasks',
+                    'creation_time', 'end_time', 'archived_time')
+    readonly_fields = ('open_tasks', 'in_progress_tasks', 'complete_tasks', 'archived_time')
+    actions = [export_boards, export_boards_bundle]
+
+    def get_readonly_fields(self, request, obj=None):
+        # Reopening an archived board would send new tasks to core_task, which its exports never read
+        if obj is not None and obj.archived_time:
+            return self.readonly_fields + ('status',)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            services.record_board_edits([obj.pk])
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'board', 'user', 'status', 'creation_time')
+
+    # Admin edits go through save()/delete(), so rebuild the affected board counters
+    def save_model(self, request, obj, form, change):
+        old_board_id = form.initial.get('board') if change else None
+        super().save_model(request, obj, form, change)
+        services.recount_tasks({obj.board_id, old_board_id} - {None})
+        services.record_board_edits({obj.board_id, old_board_id} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        services.recount_tasks([obj.board_id])
+        services.record_board_edits([obj.board_id])
+
+    def delete_queryset(self, request, queryset):
+        board_ids = set(queryset.values_list('board_id', flat=True))
+        super().delete_queryset(request, queryset)
+        services.recount_tasks(board_ids)
+        services.record_board_edits(board_ids)
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    # Written only by core/archive.py; counters would drift if rows were edited here
+    list_display = ('id', 'title', 'board', 'user', 'status', 'creation_time', 'archived_time')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class ExportJobItemInline(admin.TabularInline):
+    model = ExportJobItem
+    extra = 0
+    readonly_fields = ('board', 'status', 'out_file', 'mode', 'error', 'finished_time')
+    can_delete = False
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'format', 'creation_time')
+    inlines = [ExportJobItemInline]
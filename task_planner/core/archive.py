@@ -0,0 +1,67 @@
+"""
+Archive tier for boards that have been closed for a while.
+
+A closed board takes no new tasks, so once it has been closed longer than
+CORE_ARCHIVE_AFTER_DAYS its tasks are moved out of core_task into
+core_archivedtask. That keeps core_task (and its indexes and search table)
+sized to the boards that are still in use. The move is one transaction per
+board, and Board.archived_time records that it happened: exports read
+archived boards from the archive table and the board counters are left as
+they were.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import changes
+from .models import Board, Task, ArchivedTask
+
+BATCH_SIZE = 2000
+
+_COLUMNS = ("id", "title", "description", "board_id", "user_id", "creation_time", "status")
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, "CORE_ARCHIVE_AFTER_DAYS", 30))
+
+
+def archivable_boards(older_than=None):
+    """Closed, not yet archived boards whose end_time is older than ``older_than``."""
+    cutoff = timezone.now() - (archive_after() if older_than is None else older_than)
+    return Board.objects.filter(status="CLOSED", archived_time__isnull=True, end_time__lt=cutoff)
+
+
+def archive_board(board_id):
+    """
+    Move the tasks of a closed board to ArchivedTask and return how many moved.
+
+    Returns None if the board is not closed or was already archived, e.g. by
+    a concurrent run.
+    """
+    with transaction.atomic():
+        # Claiming the board first makes a second run a no-op
+        claimed = Board.objects.filter(id=board_id, status="CLOSED", archived_time__isnull=True).update(
+            archived_time=timezone.now()
+        )
+        if not claimed:
+            return None
+
+        tasks = Task.objects.filter(board_id=board_id)
+        rows = tasks.values_list(*_COLUMNS).order_by().iterator(chunk_size=BATCH_SIZE)
+        batch, moved = [], 0
+        for row in rows:
+            batch.append(ArchivedTask(**dict(zip(_COLUMNS, row))))
+            if len(batch) >= BATCH_SIZE:
+                ArchivedTask.objects.bulk_create(batch)
+                moved += len(batch)
+                batch = []
+        if batch:
+            ArchivedTask.objects.bulk_create(batch)
+            moved += len(batch)
+        # The search delete trigger drops the rows from core_task_fts as well
+        tasks.delete()
+        team_id = Board.objects.filter(id=board_id).values_list("team_id", flat=True).get()
+        changes.record("board_archived", [(team_id, board_id, None, {"tasks": moved})])
+    return moved
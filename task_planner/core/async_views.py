@@ -0,0 +1,183 @@
+"""
+Async versions of the read endpoints, for deployments served through asgi.py.
+
+They return the same payloads as their APIView counterparts in views.py but
+use the async ORM, so under ASGI a request never leaves the event loop for a
+thread-sensitive sync adapter. They share the sync views' versioned cache
+entries and answer If-None-Match the same way; ETags include the request
+path, so an ETag from one route does not match on the other. Under WSGI the
+sync views remain the faster choice.
+"""
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import cache, changes, services
+from .models import User, Team, Board
+from .pagination import akeyset_page, InvalidCursor
+from .serializers import USER_LIST_PROJECTION, TEAM_LIST_PROJECTION
+from .services import ServiceError, parse_uuid
+from .versions import Conditional
+
+
+def respond(data, status=200):
+    # DRF's encoder keeps datetimes and UUIDs formatted exactly like the sync views
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def request_id(request):
+    try:
+        return parse_uuid(json.loads(request.body).get("id"))
+    except (ValueError, AttributeError):
+        return None
+
+
+@require_GET
+async def list_users(request):
+    conditional = await Conditional.aread(request, ["user"], request.GET.get("cursor"), request.GET.get("limit"))
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
+
+    try:
+        users, next_cursor = await akeyset_page(
+            USER_LIST_PROJECTION.queryset(User.objects.all()),
+            cursor=request.GET.get("cursor"),
+            limit=request.GET.get("limit"),
+        )
+    except InvalidCursor as e:
+        return respond({"error": str(e)}, status=400)
+
+    return conditional.tag(respond({"results": USER_LIST_PROJECTION.render(users), "next_cursor": next_cursor}))
+
+
+@csrf_exempt
+@require_POST
+async def describe_user(request):
+    user_id = request_id(request)
+    if user_id is None:
+        return respond({"error": "User not found"}, status=404)
+
+    key = cache.make_key("user", user_id)
+    conditional = await Conditional.aread(request, [key])
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
+
+    async def load():
+        user = await User.objects.aget(id=user_id)
+        return {
+            "name": user.name,
+            "description": user.display_name,
+            "creation_time": user.creation_time
+        }
+
+    try:
+        data = await cache.aget_or_load("user", user_id, load, version=conditional.versions[key])
+        return conditional.tag(respond(data))
+    except User.DoesNotExist:
+        return respond({"error": "User not found"}, status=404)
+
+
+@require_GET
+async def list_teams(request):
+    conditional = await Conditional.aread(request, ["team"], request.GET.get("cursor"), request.GET.get("limit"))
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
+
+    try:
+        teams, next_cursor = await akeyset_page(
+            TEAM_LIST_PROJECTION.queryset(Team.objects.all()),
+            cursor=request.GET.get("cursor"),
+            limit=request.GET.get("limit"),
+        )
+    except InvalidCursor as e:
+        return respond({"error": str(e)}, status=400)
+
+    return conditional.tag(respond({"results": TEAM_LIST_PROJECTION.render(teams), "next_cursor": next_cursor}))
+
+
+@csrf_exempt
+@require_POST
+async def describe_team(request):
+    team_id = request_id(request)
+    if team_id is None:
+        return respond({"error": "Team not found"}, status=404)
+
+    key = cache.make_key("team", team_id)
+    conditional = await Conditional.aread(request, [key])
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
+
+    async def load():
+        team = await Team.objects.aget(id=team_id)
+        return {
+            "name": team.name,
+            "description": team.description,
+            "creation_time": team.creation_time,
+            "admin": str(team.admin_id)
+        }
+
+    try:
+        data = await cache.aget_or_load("team", team_id, load, version=conditional.versions[key])
+        return conditional.tag(respond(data))
+    except Team.DoesNotExist:
+        return respond({"error": "Team not found"}, status=404)
+
+
+@csrf_exempt
+@require_POST
+async def list_boards(request):
+    team_id = request_id(request)
+    if team_id is None:
+        return respond({"error": "Team not found"}, status=404)
+
+    key = cache.make_key("team_boards", team_id)
+    conditional = await Conditional.aread(request, [key])
+    not_modified = conditional.not_modified()
+    if not_modified:
+        return not_modified
+
+    async def load():
+        if not await Team.objects.filter(id=team_id).aexists():
+            raise Team.DoesNotExist
+        return [{
+            "id": str(board.id),
+            "name": board.name,
+            "open_tasks": board.open_tasks,
+            "in_progress_tasks": board.in_progress_tasks,
+            "complete_tasks": board.complete_tasks,
+        } async for board in Board.objects.filter(team_id=team_id, status="OPEN")]
+
+    try:
+        data = await cache.aget_or_load("team_boards", team_id, load, version=conditional.versions[key])
+        return conditional.tag(respond(data))
+    except Team.DoesNotExist:
+        return respond({"error": "Team not found"}, status=404)
+
+
+@require_GET
+async def list_changes(request):
+    # Long-polls on the event loop, so a waiting client holds no worker thread
+    params = request.GET
+    try:
+        events, next_cursor, has_more = await services.aread_changes(
+            since=params.get("since"),
+            team_id=params.get("team_id"),
+            board_id=params.get("board_id"),
+            limit=params.get("limit"),
+            timeout=params.get("timeout", 0),
+        )
+    except ServiceError as e:
+        return respond({"error": e.message}, status=e.status)
+
+    return respond({
+        "events": [changes.as_dict(event) for event in events],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    })
@@ -0,0 +1,177 @@
+"""
+Several API operations in one request and one transaction, via api/batch/.
+
+Each operation names a route under api/ (``"path": "task/add/"``), a method
+and a body, and runs through the same view as a direct call, so validation
+and responses are identical. Operations run in order inside one
+transaction: the first one answering with an error status rolls back the
+whole batch and the rest are not run.
+
+A string value of the form ``"$<ref>.<field>..."`` anywhere in a body is
+replaced by that field of an earlier operation's response, where ``<ref>``
+is the operation's index or its ``"ref"`` label. ``"$team.id"`` is the id
+returned by the operation labelled "team", ``"$2.results.0.id"`` the first
+result of the third operation.
+
+Entries read through the describe cache are not stored while a batch runs:
+they could hold rows the batch later rolls back, under a version that is
+rolled back with them and reused by the next committed write.
+"""
+import io
+import json
+import re
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import cache
+
+MAX_OPERATIONS = 100
+
+METHODS = {"GET", "POST", "PUT", "DELETE"}
+
+# Routes that stream, wait on other transactions, would nest a batch or
+# write export files that a rollback of the batch would not undo
+NOT_BATCHABLE = {"batch/", "changes/", "board/export/", "board/export-bundle/"}
+
+_REFERENCE = re.compile(r"^\$(\w+)((?:\.[\w-]+)+)$")
+
+
+class BatchError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _resolve_reference(value, results, labels):
+    match = _REFERENCE.match(value)
+    if match is None:
+        return value
+    ref, fields = match.groups()
+    index = labels.get(ref, int(ref) if ref.isdigit() else None)
+    if index is None or index >= len(results):
+        raise BatchError(f"Unknown reference {value}")
+    found = results[index]["body"]
+    for field in fields[1:].split("."):
+        try:
+            found = found[int(field)] if isinstance(found, list) else found[field]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise BatchError(f"Reference {value} does not match the response of operation {index}")
+    return found
+
+
+def resolve_references(value, results, labels):
+    """Return ``value`` with every "$ref.field" string replaced by the earlier result it names."""
+    if isinstance(value, str):
+        return _resolve_reference(value, results, labels)
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results, labels) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results, labels) for item in value]
+    return value
+
+
+def _view(prefix, path):
+    path = path.lstrip("/")
+    if path in NOT_BATCHABLE or path.startswith("async/"):
+        raise BatchError(f"{path} cannot be used in a batch")
+    try:
+        match = resolve(prefix + path)
+    except Resolver404:
+        raise BatchError(f"Unknown path {path}", status=404)
+    return match
+
+
+def _sub_request(request, prefix, path, method, body):
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = prefix + path
+    sub.META = {key: value for key, value in request.META.items() if not key.startswith(("CONTENT_", "HTTP_IF_"))}
+    if method == "GET":
+        query = QueryDict(mutable=True)
+        for key, value in (body or {}).items():
+            query[key] = str(value)
+        sub.GET = query
+        sub.META["QUERY_STRING"] = query.urlencode()
+    else:
+        payload = json.dumps(body or {}, cls=JSONEncoder).encode()
+        sub.META["CONTENT_TYPE"] = "application/json"
+        sub.META["CONTENT_LENGTH"] = str(len(payload))
+        sub._stream = io.BytesIO(payload)
+        sub._read_started = False
+    sub.user = getattr(request, "user", None)
+    # The batch request itself already went through the CSRF check
+    sub._dont_enforce_csrf_checks = True
+    return sub
+
+
+def _operation(operation, index):
+    if not isinstance(operation, dict):
+        raise BatchError(f"Operation {index} must be an object")
+    method = str(operation.get("method", "POST")).upper()
+    if method not in METHODS:
+        raise BatchError(f"Operation {index} has an unsupported method {method}")
+    path = operation.get("path")
+    if not isinstance(path, str) or not path:
+        raise BatchError(f"Operation {index} needs a path")
+    body = operation.get("body")
+    if body is not None and not isinstance(body, dict):
+        raise BatchError(f"Operation {index} body must be an object")
+    return operation.get("ref"), method, path.lstrip("/"), body
+
+
+def validate(operations):
+    """Check the shape of every operation up front; returns (ref, method, path, body) tuples."""
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"Cannot run more than {MAX_OPERATIONS} operations at once")
+    parsed = [_operation(operation, index) for index, operation in enumerate(operations)]
+    refs = [ref for ref, _, _, _ in parsed if ref is not None]
+    if any(not isinstance(ref, str) or not ref.isidentifier() for ref in refs) or len(set(refs)) < len(refs):
+        raise BatchError("Operation refs must be unique names")
+    return parsed
+
+
+def run(request, operations, prefix):
+    """
+    Run ``operations`` in order in one transaction.
+
+    Returns (results, failed): one {"ref", "status", "body"} result per
+    operation, and the index of the operation that failed, or None if the
+    batch was committed.
+    """
+    parsed = validate(operations)
+    results = []
+    labels = {}
+    failed = None
+    with transaction.atomic(), cache.no_fills():
+        for index, (ref, method, path, body) in enumerate(parsed):
+            try:
+                body = resolve_references(body, results, labels)
+                match = _view(prefix, path)
+                sub = _sub_request(request, prefix, path, method, body)
+                response = match.func(sub, *match.args, **match.kwargs)
+                if not isinstance(response, Response):
+                    raise BatchError(f"{path} does not return a JSON response and cannot be batched")
+                status, data = response.status_code, response.data
+            except BatchError as e:
+                status, data = e.status, {"error": e.message}
+            except Exception as e:
+                status, data = 500, {"error": str(e)}
+
+            results.append({"ref": ref, "status": status, "body": data})
+            if ref is not None:
+                labels[ref] = index
+            if status >= 400:
+                failed = index
+                transaction.set_rollback(True)
+                break
+
+    for ref, _, _, _ in parsed[len(results):]:
+        results.append({"ref": ref, "status": 424, "body": {"error": "Not run: an earlier operation failed"}})
+    return results, failed
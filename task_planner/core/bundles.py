@@ -0,0 +1,195 @@
+"""
+Several board exports streamed as one zip or tar archive.
+
+Boards are rendered in parallel on a pool of EXPORT_PROCESSES processes, a
+few boards ahead of the one being written. Rendering is CPU-bound Python, so
+the thread pool that runs export jobs would keep it on one core. Each worker
+writes its board to a temporary file and hands back the path. The request
+thread copies finished members into the archive in board order and yields
+the archive chunk by chunk, so memory stays bounded by the chunk size rather
+than by the size of the archive.
+"""
+import collections
+import multiprocessing
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import workers
+from .exports import CHUNK_SIZE, export_filename, iter_chunks, render_lines
+from .models import Board
+
+ARCHIVE_FORMATS = {
+    "zip": ("application/zip", "zip"),
+    "tar": ("application/x-tar", "tar"),
+}
+
+# Rendered boards larger than this spill from memory to a temporary file
+SPOOL_SIZE = 4 * 1024 * 1024
+
+_TAR_BLOCK = tarfile.BLOCKSIZE
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _Sink:
+    """Write-only file object that collects archive output until it is drained."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+        self.offset = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        # Without seek(), zipfile writes data descriptors instead of seeking back
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def _render(board_id, fmt):
+    board = Board.objects.get(id=board_id)
+    rendered = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    for chunk in iter_chunks(render_lines(board, fmt)):
+        rendered.write(chunk)
+    size = rendered.tell()
+    rendered.seek(0)
+    return export_filename(board, fmt), rendered, size
+
+
+def _render_to_disk(board_id, fmt):
+    # Runs in a pool process; the file is handed back by path and removed once read
+    close_old_connections()
+    name, rendered, size = _render(board_id, fmt)
+    with rendered, tempfile.NamedTemporaryFile(delete=False, suffix=".part") as f:
+        while data := rendered.read(CHUNK_SIZE):
+            f.write(data)
+    return name, f.name, size
+
+
+def _open_rendered(result):
+    name, path, size = result
+    rendered = open(path, "rb")
+    os.remove(path)
+    return name, rendered, size
+
+
+def _processes():
+    return getattr(settings, "EXPORT_PROCESSES", 0)
+
+
+def get_pool():
+    """The process pool that renders bundle members, or None to render in the calling thread."""
+    global _pool
+    processes = _processes()
+    if processes < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent has threads and open database connections
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=workers.setup,
+                initargs=(str(connection.settings_dict["NAME"]),),
+            )
+        return _pool
+
+
+def _rendered(board_ids, fmt):
+    """Yield (name, file, size) per board, in order, rendering ahead on the pool."""
+    pool = get_pool()
+    if pool is None or connection.in_atomic_block:
+        # Pool connections also could not see rows this transaction has not committed
+        for board_id in board_ids:
+            yield _render(board_id, fmt)
+        return
+
+    ahead = 2 * _processes()
+    pending = iter(board_ids)
+    window = collections.deque()
+    try:
+        for board_id in pending:
+            window.append(pool.submit(_render_to_disk, board_id, fmt))
+            if len(window) >= ahead:
+                break
+        while window:
+            result = _open_rendered(window.popleft().result())
+            board_id = next(pending, None)
+            if board_id is not None:
+                window.append(pool.submit(_render_to_disk, board_id, fmt))
+            yield result
+    finally:
+        # The client went away: drop queued boards and remove files already rendered
+        for future in window:
+            if not future.cancel() and not future.exception():
+                os.remove(future.result()[1])
+
+
+def _zip_members(sink, members):
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, rendered, size in members:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with rendered, archive.open(info, "w", force_zip64=size > zipfile.ZIP64_LIMIT) as member:
+                while data := rendered.read(CHUNK_SIZE):
+                    member.write(data)
+                    if sink.size >= CHUNK_SIZE:
+                        yield sink.drain()
+
+
+def _tar_members(sink, members):
+    # Written block by block: tarfile.addfile() would copy each member in one go
+    for name, rendered, size in members:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        sink.write(info.tobuf(tarfile.PAX_FORMAT))
+        with rendered:
+            while data := rendered.read(CHUNK_SIZE):
+                sink.write(data)
+                if sink.size >= CHUNK_SIZE:
+                    yield sink.drain()
+        if size % _TAR_BLOCK:
+            sink.write(b"\0" * (_TAR_BLOCK - size % _TAR_BLOCK))
+    # End-of-archive marker, padded to a full record like tarfile does
+    sink.write(b"\0" * (2 * _TAR_BLOCK))
+    if sink.offset % tarfile.RECORDSIZE:
+        sink.write(b"\0" * (tarfile.RECORDSIZE - sink.offset % tarfile.RECORDSIZE))
+
+
+_WRITERS = {
+    "zip": _zip_members,
+    "tar": _tar_members,
+}
+
+
+def stream_bundle(board_ids, fmt="text", archive="zip"):
+    """Yield a ``archive`` file holding the ``fmt`` export of each of ``board_ids``."""
+    sink = _Sink()
+    yield from _WRITERS[archive](sink, _rendered(board_ids, fmt))
+    data = sink.drain()
+    if data:
+        yield data
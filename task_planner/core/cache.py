@@ -0,0 +1,116 @@
+"""
+Read-through cache for the describe/list endpoints.
+
+Entries live in the Django cache named by CORE_CACHE_ALIAS, so the backend
+(local memory, file based, ...) and the key VERSION are chosen in CACHES.
+Each entry is stored under the change version of its key (core/versions.py),
+which the ETags are built from too. Signal handlers in core/signals.py
+invalidate entries when the rows behind them change; code that writes with
+update()/bulk_create() calls the invalidate_* helpers itself since those
+bypass model signals. Invalidating bumps the version, so readers move on to
+a new entry and the old one expires after CORE_CACHE_TIMEOUT.
+"""
+import contextlib
+import contextvars
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import versions
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = {}
+
+# Set while a batch runs: loaded values may include rows that get rolled back
+_no_fills = contextvars.ContextVar("no_fills", default=False)
+
+
+def get_cache():
+    return caches[getattr(settings, "CORE_CACHE_ALIAS", "default")]
+
+
+def _count(kind, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(kind, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+
+def stats():
+    with _stats_lock:
+        return {kind: dict(counters) for kind, counters in _stats.items()}
+
+
+@contextlib.contextmanager
+def no_fills():
+    """Serve hits but do not store loaded values inside the block."""
+    token = _no_fills.set(True)
+    try:
+        yield
+    finally:
+        _no_fills.reset(token)
+
+
+def make_key(kind, key, version=None):
+    if version is None:
+        return f"{kind}:{key}"
+    return f"{kind}:{key}:v{version}"
+
+
+def get_or_load(kind, key, loader, version=None):
+    """
+    Return the cached value for (kind, key), calling ``loader`` on a miss.
+
+    Exceptions from ``loader`` (e.g. DoesNotExist) propagate and nothing is
+    cached, so lookups of missing rows always reach the database. With a
+    change ``version`` the entry is stored per version, so a reader that has
+    seen a newer version can never be handed an entry loaded before it.
+    """
+    cache = get_cache()
+    cache_key = make_key(kind, key, version)
+    value = cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        _count(kind, "hits")
+        return value
+
+    _count(kind, "misses")
+    value = loader()
+    if _no_fills.get():
+        return value
+    cache.set(cache_key, value, timeout=getattr(settings, "CORE_CACHE_TIMEOUT", 300))
+    return value
+
+
+async def aget_or_load(kind, key, loader, version=None):
+    """Async get_or_load; ``loader`` is a coroutine function."""
+    cache = get_cache()
+    cache_key = make_key(kind, key, version)
+    value = await cache.aget(cache_key, _MISSING)
+    if value is not _MISSING:
+        _count(kind, "hits")
+        return value
+
+    _count(kind, "misses")
+    value = await loader()
+    if _no_fills.get():
+        return value
+    await cache.aset(cache_key, value, timeout=getattr(settings, "CORE_CACHE_TIMEOUT", 300))
+    return value
+
+
+def invalidate(kind, keys, list_key=None):
+    """Bump the change versions of the (kind, key) entries, plus ``list_key``'s."""
+    versions.bump([make_key(kind, key) for key in keys] + ([list_key] if list_key else []))
+
+
+def invalidate_users(user_ids):
+    invalidate("user", user_ids, list_key="user")
+
+
+def invalidate_teams(team_ids):
+    invalidate("team", team_ids, list_key="team")
+
+
+def invalidate_team_boards(team_ids):
+    invalidate("team_boards", team_ids)
@@ -0,0 +1,165 @@
+"""
+Ordered feed of task and board changes, read through api/changes/.
+
+Every write in services.py that adds tasks, moves task statuses, or creates,
+closes or archives a board appends ChangeEvent rows in the same transaction,
+so an event is visible exactly when its write is. Events are read back in id
+order after a cursor; a read with nothing new waits up to a timeout for the
+next commit (long-polling), so clients can follow deltas instead of
+re-listing boards and tasks.
+
+Events older than CORE_CHANGE_RETENTION_HOURS are deleted by
+``manage.py compact_changes``. The highest deleted id is kept as the feed
+floor, and a cursor below it is rejected so a client that fell behind knows
+to re-list instead of silently missing events.
+"""
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChangeEvent, ChangeVersion
+from .pagination import InvalidCursor, pack_cursor, unpack_cursor, parse_limit
+
+# How often a waiting read re-checks the table for commits from other processes
+POLL_INTERVAL = 0.5
+
+MAX_WAIT = 30
+
+# ChangeVersion row holding the highest compacted event id
+FLOOR_KEY = "changes:floor"
+
+# Woken on commit so waiting reads in this process return without a poll delay
+_committed = threading.Condition()
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def _notify():
+    with _committed:
+        _committed.notify_all()
+
+
+def record(kind, events):
+    """
+    Append events of ``kind``; each event is a (team_id, board_id, task_id, data) tuple.
+
+    Call inside the transaction of the write being described.
+    """
+    ChangeEvent.objects.bulk_create([
+        ChangeEvent(kind=kind, team_id=team_id, board_id=board_id, task_id=task_id, data=data)
+        for team_id, board_id, task_id, data in events
+    ])
+    transaction.on_commit(_notify)
+
+
+def as_dict(event):
+    return {
+        "id": event.id,
+        "kind": event.kind,
+        "team_id": str(event.team_id),
+        "board_id": str(event.board_id),
+        "task_id": str(event.task_id) if event.task_id else None,
+        "data": event.data,
+        "time": event.creation_time,
+    }
+
+
+def last_id():
+    # max() is a single rowid seek; ORDER BY id DESC LIMIT 1 would plan as a scan
+    return ChangeEvent.objects.aggregate(last=Max("id"))["last"] or floor()
+
+
+def head():
+    """The cursor of the newest event; reading from it returns only later events."""
+    return pack_cursor([last_id()])
+
+
+def floor():
+    return ChangeVersion.objects.filter(key=FLOOR_KEY).values_list("version", flat=True).first() or 0
+
+
+def parse_cursor(cursor):
+    try:
+        since = int(unpack_cursor(cursor)[0])
+    except (IndexError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+    if since < floor():
+        raise CursorExpired("Cursor has expired; re-list and start from a new cursor")
+    return since
+
+
+def _events(since, limit, team_id=None, board_id=None):
+    events = ChangeEvent.objects.filter(id__gt=since)
+    if board_id is not None:
+        events = events.filter(board_id=board_id)
+    elif team_id is not None:
+        events = events.filter(team_id=team_id)
+    # One extra row tells us whether more events are already waiting
+    return events.order_by("id")[:limit + 1]
+
+
+def _page(events, since, limit):
+    has_more = len(events) > limit
+    events = events[:limit]
+    next_cursor = pack_cursor([events[-1].id if events else since])
+    return events, next_cursor, has_more
+
+
+def read(cursor, limit=None, timeout=0, team_id=None, board_id=None):
+    """
+    Return (events, next_cursor, has_more) for events after ``cursor``.
+
+    If there are none yet, wait up to ``timeout`` seconds for a commit
+    before returning an empty page. The next cursor is always returned, so
+    the client can poll again straight away.
+    """
+    limit = parse_limit(limit)
+    since = parse_cursor(cursor)
+    deadline = time.monotonic() + min(timeout, MAX_WAIT)
+    while True:
+        events = list(_events(since, limit, team_id, board_id))
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return _page(events, since, limit)
+        with _committed:
+            _committed.wait(min(POLL_INTERVAL, remaining))
+
+
+async def aread(cursor, limit=None, timeout=0, team_id=None, board_id=None):
+    """Async version of read; waits on the event loop instead of holding a thread."""
+    limit = parse_limit(limit)
+    since = await sync_to_async(parse_cursor)(cursor)
+    deadline = time.monotonic() + min(timeout, MAX_WAIT)
+    while True:
+        events = [event async for event in _events(since, limit, team_id, board_id)]
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return _page(events, since, limit)
+        await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+
+def retention():
+    return timedelta(hours=getattr(settings, "CORE_CHANGE_RETENTION_HOURS", 72))
+
+
+def compact(older_than=None):
+    """Delete events older than the retention window, raise the floor and return how many went."""
+    cutoff = timezone.now() - (retention() if older_than is None else older_than)
+    with transaction.atomic():
+        expired = ChangeEvent.objects.filter(creation_time__lt=cutoff)
+        last = expired.order_by("-id").values_list("id", flat=True).first()
+        if last is None:
+            return 0
+        # Events are appended in id order, so everything up to ``last`` is older than the cutoff
+        deleted, _ = ChangeEvent.objects.filter(id__lte=last).delete()
+        ChangeVersion.objects.update_or_create(key=FLOOR_KEY, defaults={"version": last})
+    return deleted
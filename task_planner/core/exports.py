@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import os
+import threading
+import zlib
+
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    "text": ("text/plain; charset=utf-8", "txt"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+OUTPUT_DIR = "out"
+
+# Rows are buffered into chunks of roughly this size before being yielded
+CHUNK_SIZE = 64 * 1024
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def export_filename(board, fmt="text"):
+    extension = EXPORT_FORMATS[fmt][1]
+    return f"{board.name.replace(' ', '_')}_{board.id}.{extension}"
+
+
+def board_tasks_queryset(board):
+    # select_related pulls the assignee in the same query. Archived boards
+    # keep their tasks in the archive table, which has the same columns.
+    tasks = board.archived_tasks if board.archived_time else board.tasks
+    return (
+        tasks
+        .select_related("user")
+        .only("id", "title", "description", "status", "creation_time", "board", "user__id", "user__name")
+        .order_by("creation_time", "id")
+    )
+
+
+def board_tasks(board):
+    # iterator() keeps the queryset cache from holding every task in memory
+    return board_tasks_queryset(board).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+
+def _text_lines(board, tasks, header=True):
+    if header:
+        yield f"Board: {board.name}\n"
+        yield f"Description: {board.description}\n"
+        yield f"Status: {board.status}\n"
+        yield f"Created: {board.creation_time}\n"
+        yield f"Ended: {board.end_time}\n\n"
+
+        yield "Tasks:\n"
+    for task in tasks:
+        yield f"- [{task.status}] {task.title} (Assigned to: {task.user.name})\n"
+
+
+def _csv_lines(board, tasks, header=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    if header:
+        writer.writerow(["id", "title", "description", "status", "user", "creation_time"])
+        yield flush()
+    for task in tasks:
+        writer.writerow([
+            task.id, task.title, task.description, task.status,
+            task.user.name, task.creation_time.isoformat(),
+        ])
+        yield flush()
+
+
+def _ndjson_lines(board, tasks, header=True):
+    if header:
+        yield json.dumps({
+            "type": "board",
+            "id": str(board.id),
+            "name": board.name,
+            "description": board.description,
+            "status": board.status,
+            "creation_time": board.creation_time.isoformat(),
+            "end_time": board.end_time.isoformat() if board.end_time else None,
+        }) + "\n"
+    for task in tasks:
+        yield json.dumps({
+            "type": "task",
+            "id": str(task.id),
+            "title": task.title,
+            "description": task.description,
+            "status": task.status,
+            "user": task.user.name,
+            "creation_time": task.creation_time.isoformat(),
+        }) + "\n"
+
+
+_RENDERERS = {
+    "text": _text_lines,
+    "csv": _csv_lines,
+    "ndjson": _ndjson_lines,
+}
+
+
+def render_lines(board, fmt="text", tasks=None, header=True):
+    """
+    Yield the export of ``board`` line by line in the given format. Without
+    ``header`` only the task lines are rendered, for appending to an export.
+    """
+    if tasks is None:
+        tasks = board_tasks(board)
+    return _RENDERERS[fmt](board, tasks, header)
+
+
+def iter_chunks(lines, chunk_size=CHUNK_SIZE):
+    """Group lines into encoded chunks of about ``chunk_size`` bytes."""
+    parts = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def gzip_chunks(chunks):
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_board(board, fmt="text", gzip=False):
+    chunks = iter_chunks(render_lines(board, fmt))
+    if gzip:
+        chunks = gzip_chunks(chunks)
+    return chunks
+
+
+def write_board(board, file_path, fmt="text", tasks=None):
+    # Written beside the target and renamed over it, so readers never see a partial file
+    tmp_path = f"{file_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in iter_chunks(render_lines(board, fmt, tasks)):
+                f.write(chunk)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def append_tasks(board, file_path, tasks, fmt="text"):
+    with open(file_path, "ab") as f:
+        for chunk in iter_chunks(render_lines(board, fmt, tasks, header=False)):
+            f.write(chunk)
+
+
+def export_path(board, fmt="text"):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    return os.path.join(OUTPUT_DIR, export_filename(board, fmt))
+
+
+def bundle_response(board_ids, name, fmt, archive):
+    """A streaming download of ``board_ids`` as one archive, for the API and the admin."""
+    # bundles.py builds on this module, so it is imported here rather than at the top
+    from .bundles import ARCHIVE_FORMATS, stream_bundle
+
+    content_type, extension = ARCHIVE_FORMATS[archive]
+    response = StreamingHttpResponse(stream_bundle(board_ids, fmt, archive), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{name}_{fmt}.{extension}"'
+    return response
+
+
+def export_to_file(board, fmt="text"):
+    """Write the export of ``board`` under OUTPUT_DIR and return its path."""
+    file_path = export_path(board, fmt)
+    write_board(board, file_path, fmt)
+    return file_path
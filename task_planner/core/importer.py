@@ -0,0 +1,412 @@
+"""
+Streaming bulk import of users, teams, memberships, boards and tasks, used
+by ``manage.py import_planner``.
+
+Records are read one at a time from JSONL or CSV and buffered per type. A
+full batch is written in dependency order (users, teams, memberships,
+boards, tasks) with bulk_create in one transaction, together with the
+source's ImportCheckpoint. An interrupted import therefore resumes after the
+last committed batch without losing or duplicating rows.
+
+Records refer to each other by name: a team's admin, a membership's team and
+user, a board's team, a task's team, board and user. Names are resolved
+through name -> id maps filled from the rows this import inserted and, for
+names not seen yet, from one batched query per flush, so the maps hold only
+what the source refers to. Rows that already exist are counted and reused
+rather than inserted again, so importing the same file twice is harmless.
+Rows that fail validation or refer to unknown names are rejected and
+reported; they never abort the import. So are tasks for archived boards and
+tasks that are not COMPLETE for closed boards.
+"""
+import csv
+import json
+import os
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import cache, changes, versions
+from .lookups import LOOKUP_BATCH_SIZE, batches
+from .models import MAX_TEAM_MEMBERS, User, Team, Board, Task, ImportCheckpoint
+from .services import (
+    COUNTER_FIELDS, ServiceError, TASK_STATUSES, validate_board, validate_task, validate_team, validate_user,
+)
+
+RECORD_TYPES = ("user", "team", "membership", "board", "task")
+
+BOARD_STATUSES = ("OPEN", "CLOSED")
+
+Membership = Team.users.through
+
+
+class InvalidSource(ValueError):
+    pass
+
+
+def _check_names(record, *fields):
+    # JSONL values can be numbers or lists, which the name maps cannot look up
+    if not all(isinstance(record[field], str) for field in fields):
+        raise ServiceError(f"{'/'.join(fields)}: names must be strings")
+
+
+def source_type(path):
+    """The record type a CSV file holds, from its name: users.csv holds user records."""
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    for record_type in RECORD_TYPES:
+        if stem in (record_type, record_type + "s"):
+            return record_type
+    return None
+
+
+def read_records(path, record_type=None, skip=0):
+    """
+    Yield (type, fields) for every record of a .jsonl/.ndjson or .csv file
+    after the first ``skip``. JSONL records carry their own "type"; CSV rows
+    use a "type" column, ``record_type`` or the file name, in that order.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                index += 1
+                # Lines already committed are counted but not parsed
+                if index <= skip:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None, {"error": "Invalid JSON", "line": index}
+                    continue
+                if not isinstance(record, dict):
+                    yield None, {"error": "Record must be a JSON object", "line": index}
+                    continue
+                yield record.get("type", record_type), record
+    elif extension == ".csv":
+        default = record_type or source_type(path)
+        with open(path, encoding="utf-8", newline="") as f:
+            for index, row in enumerate(csv.DictReader(f), 1):
+                if index <= skip:
+                    continue
+                # Empty cells are missing values
+                record = {key: value for key, value in row.items() if key and value != ""}
+                yield record.get("type", default), record
+    else:
+        raise InvalidSource(f"{path}: expected a .jsonl, .ndjson or .csv file")
+
+
+class Importer:
+    """
+    Buffers records and writes them in batches. ``on_reject(record, error)``
+    is called for every rejected record.
+    """
+
+    def __init__(self, batch_size=5000, on_reject=None):
+        self.batch_size = batch_size
+        self.on_reject = on_reject
+        self.buffers = {record_type: [] for record_type in RECORD_TYPES}
+        self.buffered = 0
+        self.previous = Counter()
+        self.counts = Counter()
+        # name -> id, and (team id, board name) -> board id
+        self.users = {}
+        self.teams = {}
+        self.boards = {}
+
+    def add(self, record_type, record):
+        """Buffer one record; returns True once a batch is full and should be flushed."""
+        if record_type is None and "error" in record:
+            # Unparseable line from read_records
+            self.reject(record, record["error"])
+        elif record_type not in self.buffers:
+            self.reject(record, f"Unknown record type: {record_type}")
+        else:
+            self.buffers[record_type].append(record)
+            self.buffered += 1
+        return self.buffered >= self.batch_size
+
+    def reject(self, record, error):
+        self.counts["rejected"] += 1
+        if self.on_reject:
+            self.on_reject(record, error)
+
+    def run(self, path, record_type=None, restart=False, progress=None):
+        """Import one source file, resuming from its checkpoint; returns this run's counts."""
+        source = os.path.abspath(path)
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        if restart:
+            checkpoint.records, checkpoint.counts, checkpoint.finished = 0, {}, False
+            checkpoint.save()
+        elif checkpoint.finished:
+            return None
+
+        # Counts from earlier, interrupted runs of this source
+        self.previous = Counter(checkpoint.counts)
+        self.counts = Counter()
+        position = checkpoint.records
+        for position, (kind, record) in enumerate(read_records(path, record_type, skip=position), position + 1):
+            if self.add(kind, record):
+                self.flush(checkpoint, position)
+                if progress:
+                    progress(position, self.counts)
+        self.flush(checkpoint, position, finished=True)
+        return self.counts
+
+    def flush(self, checkpoint, position, finished=False):
+        """Write every buffered record and move ``checkpoint`` to ``position`` in one transaction."""
+        # Teams whose cached members or board lists this batch changes
+        touched = set()
+        with transaction.atomic():
+            users = self._users(self.buffers["user"])
+            teams = self._teams(self.buffers["team"], touched)
+            self._memberships(self.buffers["membership"], touched)
+            boards = self._boards(self.buffers["board"], touched)
+            self._tasks(self.buffers["task"], touched, boards)
+            # bulk_create sends no post_save, so the list versions are bumped here
+            versions.bump((["user"] if users else []) + (["team"] if teams else []))
+
+            checkpoint.records = position
+            checkpoint.counts = dict(self.previous + self.counts)
+            checkpoint.finished = finished
+            checkpoint.save()
+            cache.invalidate_teams(touched)
+            cache.invalidate_team_boards(touched)
+
+        for buffer in self.buffers.values():
+            buffer.clear()
+        self.buffered = 0
+
+    # Name resolution
+
+    def _resolve_users(self, names):
+        missing = {name for name in names if name and name not in self.users}
+        for batch in batches(missing):
+            self.users.update(User.objects.filter(name__in=batch).values_list("name", "id"))
+
+    def _resolve_teams(self, names):
+        missing = {name for name in names if name and name not in self.teams}
+        for batch in batches(missing):
+            self.teams.update(Team.objects.filter(name__in=batch).values_list("name", "id"))
+
+    def _resolve_boards(self, keys):
+        missing = {(team_id, name) for team_id, name in keys if (team_id, name) not in self.boards}
+        half = LOOKUP_BATCH_SIZE // 2
+        # Teams x names selects a superset of the wanted pairs, narrowed down here
+        for team_batch in batches({team_id for team_id, _ in missing}, half):
+            for name_batch in batches({name for _, name in missing}, half):
+                rows = Board.objects.filter(team_id__in=team_batch, name__in=name_batch).values_list(
+                    "team_id", "name", "id"
+                )
+                self.boards.update(
+                    ((team_id, name), board_id) for team_id, name, board_id in rows if (team_id, name) in missing
+                )
+
+    def _valid(self, records, validate):
+        for record in records:
+            try:
+                validate(record)
+            except ServiceError as e:
+                self.reject(record, e.message)
+            else:
+                yield record
+
+    # Writers, in dependency order
+
+    def _users(self, records):
+        records = list(self._valid(records, lambda r: validate_user(r.get("name"), r.get("display_name"))))
+        self._resolve_users(r["name"] for r in records)
+        created = []
+        for record in records:
+            if record["name"] in self.users:
+                self.counts["users_existing"] += 1
+                continue
+            user = User(name=record["name"], display_name=record["display_name"])
+            self.users[user.name] = user.id
+            created.append(user)
+        User.objects.bulk_create(created)
+        self.counts["users"] += len(created)
+        return created
+
+    def _teams(self, records, touched):
+        def validate(record):
+            validate_team(record.get("name"), record.get("description"), record.get("admin"))
+            _check_names(record, "admin")
+
+        records = list(self._valid(records, validate))
+        self._resolve_teams(r["name"] for r in records)
+        self._resolve_users(r["admin"] for r in records)
+        created = []
+        for record in records:
+            if record["name"] in self.teams:
+                self.counts["teams_existing"] += 1
+            elif record["admin"] not in self.users:
+                self.reject(record, "Admin user not found")
+            else:
+                # Like services.create_team, the admin is the first member
+                team = Team(name=record["name"], description=record["description"],
+                            admin_id=self.users[record["admin"]], member_count=1)
+                self.teams[team.name] = team.id
+                created.append(team)
+        Team.objects.bulk_create(created)
+        Membership.objects.bulk_create([Membership(team_id=team.id, user_id=team.admin_id) for team in created])
+        touched.update(team.id for team in created)
+        self.counts["teams"] += len(created)
+        return created
+
+    def _memberships(self, records, touched):
+        def validate(record):
+            if not record.get("team") or not record.get("user"):
+                raise ServiceError("Both team and user are required")
+            _check_names(record, "team", "user")
+
+        records = list(self._valid(records, validate))
+        self._resolve_teams(r["team"] for r in records)
+        self._resolve_users(r["user"] for r in records)
+
+        pairs = {}
+        for record in records:
+            team_id, user_id = self.teams.get(record["team"]), self.users.get(record["user"])
+            if team_id is None:
+                self.reject(record, "Team not found")
+            elif user_id is None:
+                self.reject(record, "User not found")
+            elif (team_id, user_id) in pairs:
+                self.counts["memberships_existing"] += 1
+            else:
+                pairs[(team_id, user_id)] = record
+        if not pairs:
+            return
+
+        # Teams are capped at MAX_TEAM_MEMBERS, so reading their whole member lists stays small
+        existing, member_counts = set(), {}
+        for batch in batches({team_id for team_id, _ in pairs}):
+            existing.update(Membership.objects.filter(team_id__in=batch).values_list("team_id", "user_id"))
+            member_counts.update(Team.objects.filter(id__in=batch).values_list("id", "member_count"))
+
+        created, added = [], Counter()
+        for (team_id, user_id), record in pairs.items():
+            if (team_id, user_id) in existing:
+                self.counts["memberships_existing"] += 1
+            elif member_counts[team_id] + added[team_id] >= MAX_TEAM_MEMBERS:
+                self.reject(record, f"A team cannot have more than {MAX_TEAM_MEMBERS} members.")
+            else:
+                added[team_id] += 1
+                created.append(Membership(team_id=team_id, user_id=user_id))
+        Membership.objects.bulk_create(created)
+        for team_id, count in added.items():
+            Team.objects.filter(id=team_id).update(member_count=F("member_count") + count)
+        touched.update(added)
+        self.counts["memberships"] += len(created)
+
+    def _boards(self, records, touched):
+        def validate(record):
+            validate_board(record.get("name"), record.get("description"), record.get("team"))
+            _check_names(record, "team")
+            if record.get("status", "OPEN") not in BOARD_STATUSES:
+                raise ServiceError("Invalid status")
+
+        records = list(self._valid(records, validate))
+        self._resolve_teams(r["team"] for r in records)
+        self._resolve_boards((self.teams[r["team"]], r["name"]) for r in records if r["team"] in self.teams)
+        created = []
+        for record in records:
+            team_id = self.teams.get(record["team"])
+            if team_id is None:
+                self.reject(record, "Team not found")
+            elif (team_id, record["name"]) in self.boards:
+                self.counts["boards_existing"] += 1
+            else:
+                status = record.get("status", "OPEN")
+                board = Board(name=record["name"], description=record["description"], team_id=team_id,
+                              status=status, end_time=timezone.now() if status == "CLOSED" else None)
+                self.boards[(team_id, board.name)] = board.id
+                created.append(board)
+        Board.objects.bulk_create(created)
+        changes.record("board_created", [
+            (board.team_id, board.id, None, {"name": board.name}) for board in created
+        ])
+        touched.update(board.team_id for board in created)
+        self.counts["boards"] += len(created)
+        return {board.id for board in created}
+
+    def _tasks(self, records, touched, new_boards):
+        def validate(record):
+            validate_task(record.get("title"), record.get("description"), record.get("board"), record.get("user"))
+            if not record.get("team"):
+                raise ServiceError("Missing fields")
+            _check_names(record, "team", "board", "user")
+            if record.get("status", "OPEN") not in TASK_STATUSES:
+                raise ServiceError("Invalid status")
+
+        records = list(self._valid(records, validate))
+        self._resolve_teams(r["team"] for r in records)
+        self._resolve_users(r["user"] for r in records)
+        self._resolve_boards((self.teams[r["team"]], r["board"]) for r in records if r["team"] in self.teams)
+
+        board_ids = {self.boards.get((self.teams.get(r["team"]), r["board"])) for r in records} - {None}
+        # Read every flush: boards can be closed or archived between batches
+        states = {}
+        for batch in batches(board_ids):
+            states.update(
+                (board_id, (status, archived_time)) for board_id, status, archived_time in
+                Board.objects.filter(id__in=batch).values_list("id", "status", "archived_time")
+            )
+
+        pending = []
+        for record in records:
+            board_id = self.boards.get((self.teams.get(record["team"]), record["board"]))
+            if board_id is None:
+                self.reject(record, "Board not found")
+            elif record["user"] not in self.users:
+                self.reject(record, "User not found")
+            elif states[board_id][1] is not None:
+                # Exports of archived boards only read core_archivedtask
+                self.reject(record, "Board is archived")
+            elif states[board_id][0] == "CLOSED" and record.get("status", "OPEN") != "COMPLETE":
+                self.reject(record, "Cannot add an unfinished task to a closed board")
+            else:
+                pending.append((board_id, record))
+
+        # Checked per board: board IN (...) AND title IN (...) would probe every combination.
+        # Boards created in this flush have no tasks yet.
+        titles = {}
+        for board_id, record in pending:
+            if board_id not in new_boards:
+                titles.setdefault(board_id, set()).add(record["title"])
+        taken = set()
+        for board_id, board_titles in titles.items():
+            for batch in batches(board_titles):
+                taken.update((board_id, title) for title in Task.objects.filter(
+                    board_id=board_id, title__in=batch
+                ).values_list("title", flat=True))
+
+        created, counters = [], {}
+        for board_id, record in pending:
+            if (board_id, record["title"]) in taken:
+                self.counts["tasks_existing"] += 1
+                continue
+            taken.add((board_id, record["title"]))
+            status = record.get("status", "OPEN")
+            created.append(Task(title=record["title"], description=record["description"], board_id=board_id,
+                                user_id=self.users[record["user"]], status=status))
+            field = COUNTER_FIELDS[status]
+            board = counters.setdefault(board_id, Counter())
+            board[field] += 1
+        Task.objects.bulk_create(created)
+        for board_id, fields in counters.items():
+            Board.objects.filter(id=board_id).update(**{
+                field: F(field) + count for field, count in fields.items()
+            })
+
+        # One event per board rather than per task; incremental exports rewrite these boards
+        teams = dict(Board.objects.filter(id__in=counters).values_list("id", "team_id"))
+        changes.record("board_edited", [
+            (teams[board_id], board_id, None, {"imported_tasks": sum(fields.values())})
+            for board_id, fields in counters.items()
+        ])
+        touched.update(teams.values())
+        self.counts["tasks"] += len(created)
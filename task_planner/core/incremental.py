@@ -0,0 +1,124 @@
+"""
+Change-aware board exports.
+
+A BoardExport row records, per board and format, the last file written and
+a watermark: the change feed position it was exported at. Exporting again
+looks at the board's ChangeEvents after the watermark:
+
+* none: the file is left as it is ("unchanged");
+* only task_added events: the new tasks are appended ("appended"). Tasks
+  can only be added to open boards, so the header is still current;
+* anything else (status changes, close, archive, admin edits), a watermark
+  below the compacted part of the feed, or a missing file: the export is
+  rewritten to a temporary file and renamed into place ("rewritten").
+
+A rewrite takes its watermark from the same SELECT that reads the tasks, so
+the file and the watermark describe one snapshot: a task committed while
+the export runs is either in the file and below the watermark, or in
+neither, and is never appended a second time.
+
+Unchanged boards still move their watermark up to the feed head, so an idle
+board never falls below the compaction floor as long as it is exported more
+often than CORE_CHANGE_RETENTION_HOURS.
+
+Appended tasks follow in the order they were committed, which can differ
+from a full export's creation_time order when two writers overlap. Exports
+of the same board and format are serialized within a process; run the
+nightly job from a single process.
+"""
+import os
+import threading
+
+from django.db.models.expressions import RawSQL
+
+from . import changes
+from .exports import ITERATOR_CHUNK_SIZE, append_tasks, board_tasks_queryset, export_path, write_board
+from .lookups import batches
+from .models import BoardExport, ChangeEvent, Task
+
+UNCHANGED, APPENDED, REWRITTEN = "unchanged", "appended", "rewritten"
+
+APPENDABLE_KINDS = {"task_added"}
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock(board_id, fmt):
+    with _locks_lock:
+        return _locks.setdefault((board_id, fmt), threading.Lock())
+
+
+def _added_task_ids(board_id, since, until):
+    """Ids of the tasks added between two watermarks, or None if anything else changed."""
+    events = ChangeEvent.objects.filter(board_id=board_id, id__gt=since, id__lte=until)
+    if events.exclude(kind__in=APPENDABLE_KINDS).exists():
+        return None
+    return list(events.order_by("id").values_list("task_id", flat=True))
+
+
+def _tasks(task_ids):
+    # In event order, i.e. the order the tasks were committed
+    for batch in batches(task_ids):
+        found = Task.objects.filter(id__in=batch).select_related("user").in_bulk()
+        for task_id in batch:
+            if task_id in found:
+                yield found[task_id]
+
+
+class _Snapshot:
+    """
+    The tasks of ``board``, each row carrying the feed head read by the same
+    statement. ``head`` is that value once iterated, else the one passed in.
+    """
+
+    def __init__(self, board, head):
+        self.board = board
+        self.head = head
+
+    def __iter__(self):
+        feed_head = RawSQL(f"SELECT MAX(id) FROM {ChangeEvent._meta.db_table}", ())
+        tasks = board_tasks_queryset(self.board).annotate(feed_head=feed_head)
+        for task in tasks.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            if task.feed_head is not None:
+                self.head = task.feed_head
+            yield task
+
+
+def export(board, fmt="text", force=False):
+    """
+    Bring the export of ``board`` in ``fmt`` up to date and return
+    (out_file, mode), where mode is "unchanged", "appended" or "rewritten".
+    """
+    with _lock(board.id, fmt):
+        # Read before the tasks, so a write landing mid-export is picked up next time
+        head = changes.last_id()
+        previous = BoardExport.objects.filter(board=board, format=fmt).first()
+        file_path = export_path(board, fmt)
+
+        current = (
+            not force and previous is not None
+            and previous.out_file == file_path and os.path.exists(file_path)
+            and previous.watermark >= changes.floor()
+        )
+        task_ids = _added_task_ids(board.id, previous.watermark, head) if current else None
+        if task_ids == []:
+            if head > previous.watermark:
+                BoardExport.objects.filter(id=previous.id).update(watermark=head)
+            return file_path, UNCHANGED
+
+        if task_ids:
+            append_tasks(board, file_path, _tasks(task_ids), fmt)
+            mode = APPENDED
+        else:
+            # With no tasks the head read above stands: a task committed since
+            # would have been seen by the query
+            tasks = _Snapshot(board, head)
+            write_board(board, file_path, fmt, tasks)
+            head = max(head, tasks.head)
+            mode = REWRITTEN
+
+        BoardExport.objects.update_or_create(
+            board=board, format=fmt, defaults={"out_file": file_path, "watermark": head}
+        )
+        return file_path, mode
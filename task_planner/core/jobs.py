@@ -0,0 +1,136 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import incremental
+from .models import Board, ExportJob, ExportJobItem
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "EXPORT_WORKERS", 4),
+                thread_name_prefix="export",
+            )
+        return _executor
+
+
+def submit_export(board_ids, fmt="text"):
+    """
+    Create an export job for ``board_ids`` and queue one pool task per board.
+
+    Raises Board.DoesNotExist if any of the IDs is unknown. Work is only
+    handed to the pool once the job rows are committed, so a worker never
+    sees a job that the submitting request later rolls back.
+    """
+    board_ids = list(dict.fromkeys(str(board_id) for board_id in board_ids))
+    boards = list(Board.objects.filter(id__in=board_ids).only("id"))
+    if len(boards) != len(board_ids):
+        raise Board.DoesNotExist("One or more board IDs are invalid")
+
+    with transaction.atomic():
+        job = ExportJob.objects.create(format=fmt)
+        items = ExportJobItem.objects.bulk_create(
+            [ExportJobItem(job=job, board=board) for board in boards]
+        )
+        item_ids = [item.id for item in items]
+        transaction.on_commit(lambda: _dispatch(item_ids))
+    return job
+
+
+def _dispatch(item_ids):
+    executor = get_executor()
+    for item_id in item_ids:
+        executor.submit(_run_item, item_id)
+
+
+def requeue_leftovers(running=False):
+    """
+    Hand PENDING items to the pool again and return their IDs.
+
+    Items only live in the pool of the process that submitted them, so after
+    a restart or crash nothing would pick them up. With ``running``, items
+    left RUNNING are reset to PENDING and retried too; only do that while no
+    other process is running exports, or a live export may run twice.
+    """
+    with transaction.atomic():
+        if running:
+            ExportJobItem.objects.filter(status="RUNNING").update(status="PENDING")
+        item_ids = list(ExportJobItem.objects.filter(status="PENDING").values_list("id", flat=True))
+    # A worker that already holds one of these claims it first; the other gets 0 rows
+    _dispatch(item_ids)
+    return item_ids
+
+
+def fail_leftovers(running=False):
+    """Mark PENDING (and with ``running``, RUNNING) items FAILED; returns how many."""
+    statuses = ["PENDING", "RUNNING"] if running else ["PENDING"]
+    return ExportJobItem.objects.filter(status__in=statuses).update(
+        status="FAILED", error="Interrupted by a restart", finished_time=timezone.now()
+    )
+
+
+def _run_item(item_id):
+    close_old_connections()
+    try:
+        # Claim the item; a second worker picking up the same ID gets 0 rows
+        claimed = ExportJobItem.objects.filter(id=item_id, status="PENDING").update(status="RUNNING")
+        if not claimed:
+            return
+
+        item = ExportJobItem.objects.select_related("job", "board").get(id=item_id)
+        try:
+            # Boards unchanged since their last export are skipped
+            out_file, mode = incremental.export(item.board, item.job.format)
+        except Exception as e:
+            ExportJobItem.objects.filter(id=item_id).update(
+                status="FAILED", error=str(e)[:255], finished_time=timezone.now()
+            )
+        else:
+            ExportJobItem.objects.filter(id=item_id).update(
+                status="DONE", out_file=out_file, mode=mode, finished_time=timezone.now()
+            )
+    finally:
+        close_old_connections()
+
+
+def job_status(job_id):
+    """Return the polling payload for ``job_id``; raises ExportJob.DoesNotExist."""
+    job = ExportJob.objects.get(id=job_id)
+    items = list(job.items.values("board_id", "status", "out_file", "mode", "error", "finished_time"))
+
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+
+    if counts.get("PENDING", 0) == len(items):
+        overall = "PENDING"
+    elif counts.get("PENDING") or counts.get("RUNNING"):
+        overall = "RUNNING"
+    elif counts.get("FAILED"):
+        overall = "FAILED"
+    else:
+        overall = "DONE"
+
+    return {
+        "id": str(job.id),
+        "status": overall,
+        "format": job.format,
+        "creation_time": job.creation_time,
+        "boards": [{
+            "id": str(item["board_id"]),
+            "status": item["status"],
+            "out_file": item["out_file"] or None,
+            "mode": item["mode"] or None,
+            "error": item["error"] or None,
+            "finished_time": item["finished_time"],
+        } for item in items],
+    }
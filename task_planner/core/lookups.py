@@ -0,0 +1,13 @@
+"""
+Batching for IN (...) lookups, which SQLite caps at a number of bound
+parameters per statement.
+"""
+
+LOOKUP_BATCH_SIZE = 500
+
+
+def batches(values, size=LOOKUP_BATCH_SIZE):
+    """Split ``values`` into lists of at most ``size`` items."""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import archive
+
+
+class Command(BaseCommand):
+    help = ("Move the tasks of boards closed for longer than CORE_ARCHIVE_AFTER_DAYS "
+            "from core_task to core_archivedtask, one transaction per board.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=float,
+                            help="Override CORE_ARCHIVE_AFTER_DAYS for this run.")
+        parser.add_argument("--dry-run", action="store_true", help="List the boards without moving anything.")
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["older_than_days"] is not None:
+            older_than = timedelta(days=options["older_than_days"])
+        boards = list(archive.archivable_boards(older_than).order_by("end_time").values_list("id", "name"))
+
+        total = 0
+        for board_id, name in boards:
+            if options["dry_run"]:
+                self.stdout.write(f"would archive {name} ({board_id})")
+                continue
+            moved = archive.archive_board(board_id)
+            if moved is None:
+                continue
+            total += moved
+            self.stdout.write(f"archived {name} ({board_id}): {moved} tasks")
+
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{len(boards)} boards, {total} tasks archived"))
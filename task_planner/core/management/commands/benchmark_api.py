@@ -0,0 +1,284 @@
+import json
+import logging
+import math
+import re
+import subprocess
+import time
+import tracemalloc
+
+from asgiref.sync import iscoroutinefunction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, resolve
+from django.utils import timezone
+
+from core import changes, services
+from core.pagination import pack_cursor
+from core.cache import get_cache
+from core.models import User, Team, Board, Task
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile over sorted samples
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+# The query count QueryTimingMiddleware puts in the Server-Timing header
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def async_query_count(response):
+    """
+    Queries of an async view, which run on a worker thread whose connection
+    CaptureQueriesContext does not see; None without request profiling.
+    """
+    match = SERVER_TIMING_QUERIES.search(response.get("Server-Timing", ""))
+    return int(match.group(1)) if match else None
+
+
+def api_routes():
+    """Every route registered under api/, as "user/list/" style strings."""
+    routes = []
+    for pattern in get_resolver().url_patterns:
+        if str(pattern.pattern) != "api/":
+            continue
+        for child in pattern.url_patterns:
+            if isinstance(child, URLPattern):
+                routes.append(str(child.pattern))
+    return routes
+
+
+def route_specs(fx):
+    """
+    Map each route to a callable returning (method, path, payload).
+
+    The callables run inside the rolled-back transaction of each iteration,
+    so any setup they do (e.g. queueing an export job) is discarded with it.
+    """
+    user, team, board, task = str(fx["user"].id), str(fx["team"].id), str(fx["board"].id), str(fx["task"].id)
+    spare_users = [str(u.id) for u in fx["spare_users"]]
+    # From the start of the retained feed, so there are events to return
+    since = pack_cursor([changes.floor()])
+    return {
+        "user/create/": lambda: ("post", None, {"name": "bench-user", "display_name": "Bench"}),
+        "user/list/": lambda: ("get", "?limit=100", None),
+        "user/describe/": lambda: ("post", None, {"id": user}),
+        "user/update/": lambda: ("put", None, {"id": user, "user": {"display_name": "Bench"}}),
+        "user/teams/": lambda: ("post", None, {"id": user}),
+        "user/dashboard/": lambda: ("post", None, {"id": user}),
+        "team/create/": lambda: ("post", None, {"name": "bench-team", "description": "Bench", "admin": user}),
+        "team/list/": lambda: ("get", "?limit=100", None),
+        "team/describe/": lambda: ("post", None, {"id": team}),
+        "team/update/": lambda: ("put", None, {"id": team, "team": {
+            "name": fx["team"].name, "description": "Bench", "admin": str(fx["team"].admin_id),
+        }}),
+        "team/add-users/": lambda: ("post", None, {"id": team, "users": spare_users}),
+        "team/remove-users/": lambda: ("post", None, {"id": team, "users": spare_users}),
+        "team/sync-users/": lambda: ("post", None, {"id": team, "users": [user] + spare_users}),
+        "board/create/": lambda: ("post", None, {"name": "bench-board", "description": "Bench", "team_id": team}),
+        "board/close/": lambda: ("post", None, {"id": board}),
+        "board/list/": lambda: ("post", None, {"id": team}),
+        "board/export/": lambda: ("post", None, {"id": board, "stream": True, "format": "ndjson"}),
+        "board/export-bundle/": lambda: ("post", None, {"team_id": team, "format": "ndjson"}),
+        "board/export-async/": lambda: ("post", None, {"ids": [board]}),
+        "board/export-status/": lambda: ("post", None, {"id": str(services.queue_export([board]).id)}),
+        "task/add/": lambda: ("post", None, {
+            "title": "bench-task", "description": "Bench", "board_id": board, "user_id": user,
+        }),
+        "task/bulk-add/": lambda: ("post", None, {"tasks": [{
+            "title": f"bench-task{i}", "description": "Bench", "board_id": board, "user_id": user,
+        } for i in range(100)]}),
+        "task/update-status/": lambda: ("put", None, {"id": task, "status": "IN_PROGRESS"}),
+        "task/bulk-update-status/": lambda: ("put", None, {
+            "board_id": board, "from_status": "OPEN", "status": "IN_PROGRESS",
+        }),
+        "task/search/": lambda: ("get", f"?q={fx['task'].title}&board_id={board}&limit=100", None),
+        "changes/": lambda: ("get", f"?since={since}&team_id={team}&limit=100", None),
+        "batch/": lambda: ("post", None, {"operations": [
+            {"ref": "board", "path": "board/create/", "body": {
+                "name": "bench-batch-board", "description": "Bench", "team_id": team,
+            }},
+        ] + [
+            {"path": "task/add/", "body": {
+                "title": f"bench-task{i}", "description": "Bench", "board_id": "$board.id", "user_id": user,
+            }} for i in range(20)
+        ]}),
+        "async/user/list/": lambda: ("get", "?limit=100", None),
+        "async/user/describe/": lambda: ("post", None, {"id": user}),
+        "async/team/list/": lambda: ("get", "?limit=100", None),
+        "async/team/describe/": lambda: ("post", None, {"id": team}),
+        "async/board/list/": lambda: ("post", None, {"id": team}),
+        "async/changes/": lambda: ("get", f"?since={since}&team_id={team}&limit=100", None),
+        "cache/stats/": lambda: ("get", None, None),
+        "admission/stats/": lambda: ("get", None, None),
+        "debug/slow-requests/": lambda: ("get", None, None),
+    }
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Call every API route through the test client and report p50/p95/p99 latency, "
+            "SQL query count and peak memory. Writes are rolled back after each call.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--routes", nargs="*", help="Only benchmark these routes.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="Earlier JSON results to compare against.")
+        parser.add_argument("--no-cache", action="store_true",
+                            help="Clear the read cache before every call.")
+
+    def handle(self, *args, **options):
+        fixtures = self.fixtures()
+        specs = route_specs(fixtures)
+        routes = api_routes()
+
+        missing = [route for route in routes if route not in specs]
+        if missing:
+            raise CommandError(f"No benchmark spec for: {', '.join(missing)}")
+        if options["routes"]:
+            routes = [route for route in routes if route in options["routes"]]
+
+        client = Client(HTTP_HOST="localhost")
+        results = {}
+        # Expected 4xx responses (e.g. closing a board with open tasks) would flood the output
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            for route in routes:
+                results[route] = self.bench(client, route, specs[route], options)
+                self.report(route, results[route])
+        finally:
+            request_logger.setLevel(level)
+
+        payload = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "commit": self.git_commit(),
+                "iterations": options["iterations"],
+                "dataset": {
+                    "users": User.objects.count(),
+                    "teams": Team.objects.count(),
+                    "boards": Board.objects.count(),
+                    "tasks": Task.objects.count(),
+                },
+            },
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(payload, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
+
+    def fixtures(self):
+        # The busiest open board gives the most realistic reads and writes
+        board = Board.objects.filter(status="OPEN").order_by("-open_tasks").first()
+        if board is None:
+            raise CommandError("No open boards found; run `manage.py seed_planner` first")
+        team = board.team
+        task = board.tasks.first()
+        user = team.users.first() or team.admin
+        if task is None:
+            raise CommandError(f'Board "{board.name}" has no tasks')
+        spare_users = list(User.objects.exclude(teams=team)[:10])
+        return {"user": user, "team": team, "board": board, "task": task, "spare_users": spare_users}
+
+    def call(self, client, route, spec):
+        method, query, payload = spec()
+        path = f"/api/{route}{query or ''}"
+        if payload is None:
+            return method, lambda: getattr(client, method)(path)
+        return method, lambda: getattr(client, method)(path, payload, content_type="application/json")
+
+    def run_once(self, client, route, spec, options, measure=False):
+        """Issue one request in a rolled-back transaction and return its measurements."""
+        outcome = {}
+        try:
+            with transaction.atomic():
+                outcome["method"], request = self.call(client, route, spec)
+                if options["no_cache"]:
+                    get_cache().clear()
+                with CaptureQueriesContext(connection) as queries:
+                    if measure:
+                        tracemalloc.start()
+                    start = time.perf_counter()
+                    response = request()
+                    if response.streaming:
+                        for _ in response.streaming_content:
+                            pass
+                    outcome["seconds"] = time.perf_counter() - start
+                    if measure:
+                        outcome["peak"] = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                if iscoroutinefunction(resolve(f"/api/{route}").func):
+                    outcome["queries"] = async_query_count(response)
+                else:
+                    outcome["queries"] = len(queries)
+                outcome["status"] = response.status_code
+                raise Rollback
+        except Rollback:
+            pass
+        return outcome
+
+    def bench(self, client, route, spec, options):
+        for _ in range(options["warmup"]):
+            self.run_once(client, route, spec, options)
+
+        timings = []
+        for _ in range(options["iterations"]):
+            outcome = self.run_once(client, route, spec, options)
+            timings.append(outcome["seconds"] * 1000)
+
+        # Memory is traced on a separate call since tracemalloc slows everything down
+        traced = self.run_once(client, route, spec, options, measure=True)
+        return {
+            "method": traced["method"].upper(),
+            "status": traced["status"],
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(sum(timings) / len(timings), 3),
+            "queries": traced["queries"],
+            "peak_memory_kb": round(traced["peak"] / 1024, 1),
+        }
+
+    def report(self, route, result):
+        self.stdout.write(
+            f"{route:<28} {result['status']:>3}  p50 {result['p50_ms']:>9.2f}ms  "
+            f"p95 {result['p95_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms  "
+            f"{result['queries'] if result['queries'] is not None else 'N/A':>4} queries  "
+            f"{result['peak_memory_kb']:>9.1f} KiB"
+        )
+
+    def compare(self, results, baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)["endpoints"]
+        self.stdout.write(f"\nChange vs {baseline_path}:")
+        for route, result in results.items():
+            before = baseline.get(route)
+            if not before:
+                continue
+            delta = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            line = (f"{route:<28} p95 {before['p95_ms']:>9.2f} -> {result['p95_ms']:>9.2f}ms ({delta:+.1f}%)  "
+                    f"queries {before['queries']} -> {result['queries']}")
+            more_queries = None not in (result["queries"], before["queries"]) and result["queries"] > before["queries"]
+            style = self.style.ERROR if delta > 10 or more_queries else self.style.SUCCESS
+            self.stdout.write(style(line))
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,188 @@
+import asyncio
+import io
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.benchmark_api import percentile
+from core.models import Board
+
+# Read routes that have both a sync (APIView) and an async implementation
+READ_ROUTES = ["user/list/", "user/describe/", "team/list/", "team/describe/", "board/list/"]
+
+
+def read_specs(board):
+    team = str(board.team_id)
+    user = str(board.team.admin_id)
+    return {
+        "user/list/": ("GET", "limit=100", None),
+        "user/describe/": ("POST", "", {"id": user}),
+        "team/list/": ("GET", "limit=100", None),
+        "team/describe/": ("POST", "", {"id": team}),
+        "board/list/": ("POST", "", {"id": team}),
+    }
+
+
+def call_wsgi(application, method, path, query, body):
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    result = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, method, path, query, body):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        # DRF only parses a request body when Content-Length is set
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    sent = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Django listens for a disconnect while the view runs; it never comes
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    status = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = ("Compare concurrent throughput of the read endpoints: sync views under WSGI "
+            "against the async views under ASGI, both through the project's wsgi.py/asgi.py.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per route and mode.")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--routes", nargs="*", choices=READ_ROUTES)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        from task_planner.asgi import application as asgi_application
+        from task_planner.wsgi import application as wsgi_application
+
+        board = Board.objects.select_related("team").first()
+        if board is None:
+            raise CommandError("No boards found; run `manage.py seed_planner` first")
+        specs = read_specs(board)
+
+        results = {}
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            for route in options["routes"] or READ_ROUTES:
+                method, query, payload = specs[route]
+                body = json.dumps(payload).encode() if payload else b""
+                modes = {
+                    "wsgi_sync": self.run_wsgi(wsgi_application, method, f"/api/{route}", query, body, options),
+                    "asgi_sync": self.run_asgi(asgi_application, method, f"/api/{route}", query, body, options),
+                    "asgi_async": self.run_asgi(asgi_application, method, f"/api/async/{route}", query, body,
+                                                options),
+                }
+                results[route] = modes
+                for mode, result in modes.items():
+                    self.report(route, mode, result)
+        finally:
+            request_logger.setLevel(level)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"concurrency": options["concurrency"], "routes": results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def report(self, route, mode, result):
+        self.stdout.write(
+            f"{route:<16} {mode:<11} {result['rps']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"errors {result['errors']}"
+        )
+
+    def summarize(self, latencies, statuses, elapsed):
+        return {
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "errors": sum(1 for status in statuses if status >= 400),
+        }
+
+    def run_wsgi(self, application, method, path, query, body, options):
+        def one(_):
+            start = time.perf_counter()
+            status = call_wsgi(application, method, path, query, body)
+            return (time.perf_counter() - start) * 1000, status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            outcomes = list(pool.map(one, range(options["requests"])))
+        elapsed = time.perf_counter() - start
+        return self.summarize([o[0] for o in outcomes], [o[1] for o in outcomes], elapsed)
+
+    def run_asgi(self, application, method, path, query, body, options):
+        async def run():
+            semaphore = asyncio.Semaphore(options["concurrency"])
+
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    status = await call_asgi(application, method, path, query, body)
+                    return (time.perf_counter() - start) * 1000, status
+
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(one() for _ in range(options["requests"])))
+            return outcomes, time.perf_counter() - start
+
+        outcomes, elapsed = asyncio.run(run())
+        return self.summarize([o[0] for o in outcomes], [o[1] for o in outcomes], elapsed)
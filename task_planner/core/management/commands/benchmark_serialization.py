@@ -0,0 +1,73 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.models import User, Team, Task
+from core.projections import Projection
+from core.serializers import UserSerializer, TeamListSerializer, TaskSerializer
+
+CASES = {
+    "users": (User, UserSerializer),
+    "teams": (Team, TeamListSerializer),
+    "tasks": (Task, TaskSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = ("Compare per-row cost of model instances + ModelSerializer against values_list() "
+            "projections for the list endpoints, fetch through JSON rendering, and check that "
+            "both produce identical JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs is reported.")
+        parser.add_argument("--cases", nargs="*", choices=list(CASES), default=list(CASES))
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        results = {}
+        for case in options["cases"]:
+            model, serializer_class = CASES[case]
+            queryset = model.objects.order_by("creation_time", "id")[:options["rows"]]
+            rows = queryset.count()
+            if not rows:
+                raise CommandError(f"No {case} found; run `manage.py seed_planner` first")
+            projection = Projection(serializer_class)
+
+            def serializer_path():
+                return renderer.render(serializer_class(list(queryset.all()), many=True).data)
+
+            def projection_path():
+                return renderer.render(projection.render(list(projection.queryset(queryset))))
+
+            if serializer_path() != projection_path():
+                raise CommandError(f"{case}: projection output differs from {serializer_class.__name__}")
+
+            before = self.best(serializer_path, options["repeat"]) / rows
+            after = self.best(projection_path, options["repeat"]) / rows
+            results[case] = {
+                "rows": rows,
+                "serializer_us_per_row": round(before * 1e6, 2),
+                "projection_us_per_row": round(after * 1e6, 2),
+                "speedup": round(before / after, 2),
+            }
+            self.stdout.write(
+                f"{case:<6} {rows:>7} rows  serializer {before * 1e6:>7.2f}us/row  "
+                f"projection {after * 1e6:>7.2f}us/row  {before / after:.1f}x"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
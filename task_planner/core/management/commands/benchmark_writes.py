@@ -0,0 +1,153 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connection, connections
+from django.test.utils import override_settings
+
+from core import services
+from core.management.commands.benchmark_api import percentile
+from core.models import Board, Task
+
+PROFILES = ["default", "production"]
+
+
+class Command(BaseCommand):
+    help = ("Run concurrent task writes (task/add and task/update-status) with readers alongside, "
+            "under the plain SQLite setup and the production profile, and compare throughput "
+            "and \"database is locked\" errors.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=2)
+        parser.add_argument("--writes", type=int, default=200, help="Writes per writer thread.")
+        parser.add_argument("--profiles", nargs="*", choices=PROFILES, default=PROFILES)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("benchmark_writes only applies to SQLite databases")
+        board = Board.objects.filter(status="OPEN").select_related("team").first()
+        if board is None:
+            raise CommandError("No open boards found; run `manage.py seed_planner` first")
+
+        results = {}
+        for profile in options["profiles"]:
+            # Each run writes to a scratch board that is deleted afterwards
+            scratch = services.create_board(f"bench-writes-{profile}-{time.time_ns()}", "Benchmark",
+                                            str(board.team_id))
+            try:
+                with self.profile(profile == "production"):
+                    results[profile] = self.run(scratch, str(board.team.admin_id), options)
+            finally:
+                Task.objects.filter(board=scratch).delete()
+                scratch.delete()
+            self.report(profile, results[profile])
+
+        if len(results) == 2 and results["default"]["writes_per_s"]:
+            gain = results["production"]["writes_per_s"] / results["default"]["writes_per_s"]
+            self.stdout.write(self.style.SUCCESS(f"production profile: {gain:.1f}x write throughput"))
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"writers": options["writers"], "readers": options["readers"], "profiles": results},
+                          f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    @contextmanager
+    def profile(self, production):
+        """Point new connections at the chosen profile for the duration of a run."""
+        connections.close_all()
+        db = connections.settings[DEFAULT_DB_ALIAS]
+        saved = {key: db.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+        if production:
+            db.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True, OPTIONS={"transaction_mode": "IMMEDIATE"})
+        else:
+            db.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, OPTIONS={})
+        try:
+            with override_settings(CORE_SQLITE_PRODUCTION=production):
+                if not production:
+                    # WAL is stored in the database file, so it has to be undone explicitly
+                    with connection.cursor() as cursor:
+                        cursor.execute("PRAGMA journal_mode = DELETE")
+                    connections.close_all()
+                yield
+        finally:
+            connections.close_all()
+            db.update(saved)
+            # The next connection re-applies the configured pragmas, WAL included
+            connection.ensure_connection()
+
+    def run(self, board, user_id, options):
+        latencies = []
+        locked = []
+        done = threading.Event()
+        reads = []
+        lock = threading.Lock()
+
+        def writer(worker):
+            rng = random.Random(worker)
+            task_ids = []
+            mine = []
+            for i in range(options["writes"]):
+                close_old_connections()
+                start = time.perf_counter()
+                try:
+                    if task_ids and rng.random() < 0.5:
+                        services.update_task_status(rng.choice(task_ids), rng.choice(services.TASK_STATUSES))
+                    else:
+                        task = services.add_task(f"w{worker}-{i}", "Benchmark", str(board.id), user_id)
+                        task_ids.append(str(task.id))
+                    mine.append((time.perf_counter() - start) * 1000)
+                except OperationalError:
+                    locked.append(1)
+                except services.ServiceError:
+                    mine.append((time.perf_counter() - start) * 1000)
+            close_old_connections()
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+
+        def reader():
+            count = 0
+            while not done.is_set():
+                close_old_connections()
+                try:
+                    list(Board.objects.filter(team_id=board.team_id, status="OPEN").values("id", "open_tasks"))
+                    count += 1
+                except OperationalError:
+                    locked.append(1)
+            connection.close()
+            reads.append(count)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["writers"] + options["readers"]) as pool:
+            readers = [pool.submit(reader) for _ in range(options["readers"])]
+            writers = [pool.submit(writer, worker) for worker in range(options["writers"])]
+            for future in writers:
+                future.result()
+            elapsed = time.perf_counter() - start
+            done.set()
+            for future in readers:
+                future.result()
+
+        return {
+            "writes": len(latencies),
+            "locked_errors": len(locked),
+            "writes_per_s": round(len(latencies) / elapsed, 1),
+            "reads_per_s": round(sum(reads) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        }
+
+    def report(self, profile, result):
+        p50 = f"{result['p50_ms']:.2f}ms" if result["p50_ms"] is not None else "-"
+        p95 = f"{result['p95_ms']:.2f}ms" if result["p95_ms"] is not None else "-"
+        self.stdout.write(
+            f"{profile:<11} {result['writes_per_s']:>8.1f} writes/s  {result['reads_per_s']:>8.1f} reads/s  "
+            f"p50 {p50:>10}  p95 {p95:>10}  locked errors {result['locked_errors']}"
+        )
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import changes
+
+
+class Command(BaseCommand):
+    help = ("Delete change feed events older than CORE_CHANGE_RETENTION_HOURS. Clients holding "
+            "a cursor from before the oldest remaining event get 410 and must re-list.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-hours", type=float,
+                            help="Override CORE_CHANGE_RETENTION_HOURS for this run.")
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["older_than_hours"] is not None:
+            older_than = timedelta(hours=options["older_than_hours"])
+        deleted = changes.compact(older_than)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} events compacted; feed floor is now {changes.floor()}"))
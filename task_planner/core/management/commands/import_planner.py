@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import RECORD_TYPES, Importer, InvalidSource
+
+
+class Command(BaseCommand):
+    help = ("Stream users, teams, memberships, boards and tasks from JSONL or CSV files into the "
+            "planner in batched transactions. Each file records a checkpoint with every batch, so "
+            "running the same command again after an interruption resumes where it stopped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", nargs="+",
+                            help="Files to import, in order: parents (users, teams) before the rows "
+                                 "that refer to them.")
+        parser.add_argument("--type", choices=RECORD_TYPES,
+                            help="Record type of CSV files without a type column or a type-named file.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore existing checkpoints and read every file from the start.")
+        parser.add_argument("--rejects", help="Append rejected records, with the reason, to this JSONL file.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        rejects = open(options["rejects"], "a", encoding="utf-8") if options["rejects"] else None
+
+        def on_reject(record, error):
+            if rejects:
+                rejects.write(json.dumps({"error": error, "record": record}) + "\n")
+
+        def progress(position, counts):
+            self.stdout.write(f"  {position} records, {counts['rejected']} rejected", ending="\r")
+
+        importer = Importer(batch_size=options["batch_size"], on_reject=on_reject)
+        try:
+            for source in options["sources"]:
+                try:
+                    counts = importer.run(source, options["type"], restart=options["restart"], progress=progress)
+                except (InvalidSource, OSError) as e:
+                    raise CommandError(str(e))
+                if counts is None:
+                    self.stdout.write(f"{source}: already imported (use --restart to import it again)")
+                    continue
+                summary = ", ".join(f"{value} {key}" for key, value in sorted(counts.items()) if value)
+                self.stdout.write(self.style.SUCCESS(f"{source}: {summary or 'nothing to import'}"))
+        finally:
+            if rejects:
+                rejects.close()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = ("Recreate the task search triggers and rebuild the FTS index from core_task. "
+            "Run after VACUUM or after a migration that rebuilds the core_task table.")
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError("Task search requires SQLite FTS5")
+        with transaction.atomic():
+            search.install()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {search.FTS_TABLE}_docsize")
+            indexed = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"{indexed} tasks indexed"))
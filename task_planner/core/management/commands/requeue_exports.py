@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = ("Run export job items that a restarted or crashed process left PENDING, and wait for "
+            "them. Run it at startup: only the submitting process's pool knows about its jobs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--running", action="store_true",
+                            help="Also retry items left RUNNING. Only use it while no other "
+                                 "process is running exports.")
+        parser.add_argument("--fail", action="store_true",
+                            help="Mark the items FAILED instead of running them.")
+
+    def handle(self, *args, **options):
+        if options["fail"]:
+            failed = jobs.fail_leftovers(running=options["running"])
+            self.stdout.write(self.style.SUCCESS(f"{failed} export items marked FAILED"))
+            return
+
+        item_ids = jobs.requeue_leftovers(running=options["running"])
+        # Exports run on the pool of this process; wait for them before exiting
+        jobs.get_executor().shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f"{len(item_ids)} export items requeued"))
@@ -0,0 +1,111 @@
+import random
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import cache, versions
+from core.models import MAX_TEAM_MEMBERS, User, Team, Board, Task, ArchivedTask, BoardExport, ExportJobItem
+from core.services import COUNTER_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic dataset of users, teams, boards and tasks for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--teams", type=int, default=100)
+        parser.add_argument("--members", type=int, default=20,
+                            help=f"Members per team (capped at {MAX_TEAM_MEMBERS}).")
+        parser.add_argument("--boards-per-team", type=int, default=5)
+        parser.add_argument("--tasks", type=int, default=100000, help="Total number of tasks.")
+        parser.add_argument("--closed-ratio", type=float, default=0.1,
+                            help="Fraction of boards created CLOSED (all their tasks COMPLETE).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--flush", action="store_true", help="Delete all planner data first.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["teams"] < 1 or options["boards_per_team"] < 1:
+            raise CommandError("--users, --teams and --boards-per-team must be positive")
+
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        members = min(options["members"], MAX_TEAM_MEMBERS, options["users"])
+
+        if options["flush"]:
+            self.flush()
+
+        # Names carry a run prefix so repeated seeds don't collide
+        run = uuid.uuid4().hex[:8]
+
+        users = [
+            User(name=f"{run}-user{i}", display_name=f"User {i}")
+            for i in range(options["users"])
+        ]
+        self.insert(User, users, batch_size)
+        self.stdout.write(f"{len(users)} users")
+
+        teams = []
+        memberships = []
+        Membership = Team.users.through
+        for i in range(options["teams"]):
+            team_users = rng.sample(users, members)
+            team = Team(name=f"{run}-team{i}", description=f"Team {i}", admin=team_users[0],
+                        member_count=len(team_users))
+            teams.append(team)
+            memberships.extend(Membership(team_id=team.id, user_id=user.id) for user in team_users)
+        self.insert(Team, teams, batch_size)
+        self.insert(Membership, memberships, batch_size)
+        self.stdout.write(f"{len(teams)} teams, {len(memberships)} memberships")
+
+        team_members = {}
+        for membership in memberships:
+            team_members.setdefault(membership.team_id, []).append(membership.user_id)
+
+        boards = [
+            Board(name=f"board{j}", description=f"Board {j} of {team.name}", team=team,
+                  status="CLOSED" if rng.random() < options["closed_ratio"] else "OPEN")
+            for team in teams for j in range(options["boards_per_team"])
+        ]
+        self.insert(Board, boards, batch_size)
+        self.stdout.write(f"{len(boards)} boards")
+
+        statuses = list(COUNTER_FIELDS)
+        titles = dict.fromkeys((board.id for board in boards), 0)
+        batch = []
+        for i in range(options["tasks"]):
+            board = rng.choice(boards)
+            status = "COMPLETE" if board.status == "CLOSED" else rng.choice(statuses)
+            setattr(board, COUNTER_FIELDS[status], getattr(board, COUNTER_FIELDS[status]) + 1)
+            titles[board.id] += 1
+            batch.append(Task(
+                title=f"task{titles[board.id]}",
+                description=f"Task {i}",
+                board=board,
+                user_id=rng.choice(team_members[board.team_id]),
+                status=status,
+            ))
+            if len(batch) >= batch_size:
+                self.insert(Task, batch, batch_size)
+                batch = []
+                self.stdout.write(f"  {i + 1} tasks", ending="\r")
+        self.insert(Task, batch, batch_size)
+
+        Board.objects.bulk_update(boards, list(COUNTER_FIELDS.values()), batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{options['tasks']} tasks"))
+
+    def flush(self):
+        # Plain DELETEs, children first: a cascading delete() would send the
+        # per-user signals, each recounting the user's boards and teams
+        models = [ExportJobItem, BoardExport, ArchivedTask, Task, Board, Team.users.through, Team, User]
+        with transaction.atomic():
+            for model in models:
+                queryset = model.objects.all()
+                queryset._raw_delete(queryset.db)
+            versions.bump(["user", "team"])
+        cache.get_cache().clear()
+
+    def insert(self, model, objs, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=batch_size)
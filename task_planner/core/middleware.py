@@ -0,0 +1,355 @@
+import collections
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils import timezone
+
+# SQL statements kept per logged request; the count still covers all of them
+MAX_LOGGED_QUERIES = 100
+
+
+class SlowRequestLog:
+    """Thread-safe, bounded record of the slowest requests seen by this process."""
+
+    def __init__(self, size):
+        self.size = size
+        self._heap = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, duration, entry):
+        with self._lock:
+            # Min-heap on duration: the fastest kept entry is evicted first
+            item = (duration, next(self._order), entry)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def entries(self):
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+slow_requests = SlowRequestLog(getattr(settings, "CORE_SLOW_REQUEST_LOG_SIZE", 50))
+
+
+class RequestProfile:
+    """Database execute wrapper that times every query issued during a request."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.view_end = None
+        self.render_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            if len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append({"sql": sql, "ms": round(duration * 1000, 3)})
+
+
+class QueryTimingMiddleware:
+    """
+    Records SQL query count and DB time per request, reports them in a
+    Server-Timing header and keeps the slowest requests in slow_requests.
+
+    Timings cover the view and response rendering; queries run while a
+    streaming response is being consumed are not included. The middleware is
+    async-capable so it does not force async views back onto a sync thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = RequestProfile()
+        request.query_profile = profile
+        start = time.perf_counter()
+        with self.wrap_connections(profile):
+            response = self.get_response(request)
+        return self.finish(request, response, profile, start)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        request.query_profile = profile
+        start = time.perf_counter()
+        # The async ORM runs queries on the request's thread-sensitive worker
+        # thread, whose connections differ from the event loop thread's
+        stack = await sync_to_async(self.wrap_connections)(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, profile, start)
+
+    def wrap_connections(self, profile):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        return stack
+
+    def finish(self, request, response, profile, start):
+        end = time.perf_counter()
+        total = end - start
+        view_end = profile.view_end or end
+        render = (profile.render_end - view_end) if profile.render_end else 0.0
+        timings = [
+            ("db", profile.db_time, f"{profile.query_count} queries"),
+            ("view", view_end - start - profile.db_time, None),
+            ("render", render, None),
+            ("total", total, None),
+        ]
+        response["Server-Timing"] = ", ".join(
+            f"{name};dur={duration * 1000:.2f}" + (f';desc="{desc}"' if desc else "")
+            for name, duration, desc in timings
+        )
+
+        slow_requests.add(total, {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "time": timezone.now().isoformat(),
+            "total_ms": round(total * 1000, 3),
+            "db_ms": round(profile.db_time * 1000, 3),
+            "render_ms": round(render * 1000, 3),
+            "query_count": profile.query_count,
+            "queries": profile.queries,
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time the two apart
+        profile = getattr(request, "query_profile", None)
+        if profile is not None:
+            profile.view_end = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: setattr(profile, "render_end", time.perf_counter()))
+        return response
+
+
+# Routes under api/ that write; every other api/ route is a read unless listed below
+API_PREFIX = "/api/"
+WRITE_ROUTES = {
+    "user/create/", "user/update/",
+    "team/create/", "team/update/", "team/add-users/", "team/remove-users/", "team/sync-users/",
+    "board/create/", "board/close/", "board/export-async/",
+    "task/add/", "task/bulk-add/", "task/update-status/", "task/bulk-update-status/",
+    "batch/",
+}
+EXPORT_ROUTES = {"board/export/", "board/export-bundle/"}
+POLL_ROUTES = {"changes/", "async/changes/"}
+# Always admitted, so they can still be read while everything else is shed
+UNLIMITED_ROUTES = {"admission/stats/", "cache/stats/", "debug/slow-requests/"}
+
+
+def route_class(request):
+    """The admission class of ``request``: "write", "export", "poll", "read", or None if not limited."""
+    path = request.path_info
+    if not path.startswith(API_PREFIX):
+        return None
+    route = path[len(API_PREFIX):]
+    if route in UNLIMITED_ROUTES:
+        return None
+    if route in WRITE_ROUTES:
+        return "write"
+    if route in EXPORT_ROUTES:
+        return "export"
+    if route in POLL_ROUTES:
+        return "poll"
+    return "read"
+
+
+class RouteLimiter:
+    """
+    At most ``limit`` requests of one route class at a time, plus a FIFO
+    queue of up to ``queue`` waiting requests. A request that finds the
+    queue full is turned away with 429 straight away; one that is still
+    queued after ``wait`` seconds gets 503.
+    """
+
+    def __init__(self, limit, queue, wait):
+        self.limit = limit
+        self.queue = queue
+        self.wait = wait
+        self.active = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._waiters = collections.deque()
+        self._changed = threading.Condition()
+
+    def acquire(self):
+        """Block until admitted and return None, or return the status to reject with."""
+        with self._changed:
+            if self.active < self.limit and not self._waiters:
+                return self._admit()
+            if len(self._waiters) >= self.queue:
+                self.rejected_full += 1
+                return 429
+
+            ticket = object()
+            self._waiters.append(ticket)
+            self.peak_queued = max(self.peak_queued, len(self._waiters))
+            deadline = time.monotonic() + self.wait
+            try:
+                # Admit in arrival order: only the head of the queue takes a free slot
+                while self._waiters[0] is not ticket or self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return 503
+                    self._changed.wait(remaining)
+                return self._admit()
+            finally:
+                self._waiters.remove(ticket)
+                self._changed.notify_all()
+
+    def _admit(self):
+        self.active += 1
+        self.admitted += 1
+        return None
+
+    def release(self):
+        with self._changed:
+            self.active -= 1
+            self._changed.notify_all()
+
+    def retry_after(self):
+        return max(1, math.ceil(self.wait))
+
+    def stats(self):
+        with self._changed:
+            return {
+                "limit": self.limit,
+                "queue_limit": self.queue,
+                "active": self.active,
+                "queued": len(self._waiters),
+                "peak_queued": self.peak_queued,
+                "admitted": self.admitted,
+                "rejected_full": self.rejected_full,
+                "rejected_timeout": self.rejected_timeout,
+            }
+
+
+admission = {
+    name: RouteLimiter(limit, queue, wait)
+    for name, (limit, queue, wait) in getattr(settings, "CORE_ADMISSION_LIMITS", {}).items()
+}
+
+
+def admission_stats():
+    return {name: limiter.stats() for name, limiter in admission.items()}
+
+
+class _ReleasingStream:
+    """Streaming content that frees its admission slot once the response is closed."""
+
+    def __init__(self, content, release):
+        self.content = content
+        self.release = release
+
+    def __iter__(self):
+        return iter(self.content)
+
+    def close(self):
+        try:
+            if hasattr(self.content, "close"):
+                self.content.close()
+        finally:
+            if self.release is not None:
+                self.release()
+                self.release = None
+
+
+class AdmissionControlMiddleware:
+    """
+    Bounds how many requests of each route class (see route_class) run at
+    once, per process, with the limits in CORE_ADMISSION_LIMITS. SQLite
+    takes one writer at a time, so a burst of writes beyond the limit waits
+    here briefly or is shed with 429/503 and a Retry-After header, instead
+    of holding workers that queue on the database lock and slow reads down.
+
+    Streaming responses keep their slot until the body has been sent.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        limiter = admission.get(route_class(request))
+        if limiter is None:
+            return self.get_response(request)
+        rejection = limiter.acquire()
+        if rejection:
+            return self.reject(limiter, rejection)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            limiter.release()
+            raise
+        return self.hold_until_sent(response, limiter)
+
+    async def __acall__(self, request):
+        limiter = admission.get(route_class(request))
+        if limiter is None:
+            return await self.get_response(request)
+        # Waiting blocks, so it happens on a worker thread rather than the event loop
+        rejection = await sync_to_async(limiter.acquire, thread_sensitive=False)()
+        if rejection:
+            return self.reject(limiter, rejection)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            limiter.release()
+            raise
+        return self.hold_until_sent(response, limiter)
+
+    def hold_until_sent(self, response, limiter):
+        if response.streaming and not response.is_async:
+            response.streaming_content = _ReleasingStream(response.streaming_content, limiter.release)
+        else:
+            limiter.release()
+        return response
+
+    def reject(self, limiter, status):
+        if status == 429:
+            message = "Too many requests queued for this endpoint; retry later"
+        else:
+            message = "Server busy; retry later"
+        response = JsonResponse({"error": message}, status=status)
+        response["Retry-After"] = str(limiter.retry_after())
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_user_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['creation_time', 'id'], name='team_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['creation_time', 'id'], name='user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_export_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['team', 'status'], name='board_team_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status'], name='task_board_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status'], name='task_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 12:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+COUNTER_FIELDS = {
+    'OPEN': 'open_tasks',
+    'IN_PROGRESS': 'in_progress_tasks',
+    'COMPLETE': 'complete_tasks',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    Board = apps.get_model('core', 'Board')
+    Task = apps.get_model('core', 'Task')
+
+    counts = {}
+    for row in Task.objects.values('board_id', 'status').annotate(n=Count('id')).order_by():
+        counts.setdefault(row['board_id'], {})[COUNTER_FIELDS[row['status']]] = row['n']
+    for board_id, fields in counts.items():
+        Board.objects.filter(id=board_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='complete_tasks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='in_progress_tasks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='open_tasks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 13:02
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_member_count(apps, schema_editor):
+    Team = apps.get_model('core', 'Team')
+    Membership = Team.users.through
+
+    counts = Membership.objects.values('team_id').annotate(n=Count('id')).order_by()
+    for row in counts:
+        Team.objects.filter(id=row['team_id']).update(member_count=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_board_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_member_count, migrations.RunPython.noop),
+    ]
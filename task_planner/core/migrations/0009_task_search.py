@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 16:20
+
+from django.db import migrations
+
+# The DDL is spelled out here rather than imported from core.search, so later
+# edits to that module cannot change what this migration does.
+
+FTS_TABLE = "core_task_fts"
+
+TRIGGERS = {
+    "core_task_fts_insert": f"""
+        CREATE TRIGGER core_task_fts_insert AFTER INSERT ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END""",
+    "core_task_fts_delete": f"""
+        CREATE TRIGGER core_task_fts_delete AFTER DELETE ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END""",
+    "core_task_fts_update": f"""
+        CREATE TRIGGER core_task_fts_update AFTER UPDATE OF title, description ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END""",
+}
+
+
+def has_fts5(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def install_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if not has_fts5(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, content='core_task', content_rowid='rowid', "
+            f"tokenize='porter unicode61')"
+        )
+        for name, sql in TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)", ["bm25(10.0, 1.0)"])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_team_member_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 13:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_change_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='archived_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=64)),
+                ('description', models.CharField(max_length=128)),
+                ('creation_time', models.DateTimeField()),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('IN_PROGRESS', 'In Progress'), ('COMPLETE', 'Complete')], max_length=20)),
+                ('archived_time', models.DateTimeField(auto_now_add=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='core.board')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='core.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'creation_time', 'id'], name='archived_task_board_idx'), models.Index(fields=['user'], name='archived_task_user_idx')],
+            },
+        ),
+    ]
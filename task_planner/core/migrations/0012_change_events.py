@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_task_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('task_added', 'Task added'), ('task_status', 'Task status changed'), ('tasks_status', 'Task statuses changed in bulk'), ('board_created', 'Board created'), ('board_closed', 'Board closed'), ('board_archived', 'Board archived')], max_length=20)),
+                ('team_id', models.UUIDField()),
+                ('board_id', models.UUIDField()),
+                ('task_id', models.UUIDField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('creation_time', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team_id', 'id'], name='change_event_team_idx'), models.Index(fields=['board_id', 'id'], name='change_event_board_idx'), models.Index(fields=['creation_time'], name='change_event_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_change_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjobitem',
+            name='mode',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='changeevent',
+            name='kind',
+            field=models.CharField(choices=[('task_added', 'Task added'), ('task_status', 'Task status changed'), ('tasks_status', 'Task statuses changed in bulk'), ('board_created', 'Board created'), ('board_closed', 'Board closed'), ('board_archived', 'Board archived'), ('board_edited', 'Board or its tasks edited in the admin')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='BoardExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=10)),
+                ('out_file', models.CharField(max_length=255)),
+                ('watermark', models.PositiveBigIntegerField(default=0)),
+                ('exported_time', models.DateTimeField(auto_now=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exports', to='core.board')),
+            ],
+            options={
+                'unique_together': {('board', 'format')},
+            },
+        ),
+    ]
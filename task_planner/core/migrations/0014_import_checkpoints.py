@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_incremental_exports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('records', models.PositiveBigIntegerField(default=0)),
+                ('counts', models.JSONField(default=dict)),
+                ('finished', models.BooleanField(default=False)),
+                ('updated_time', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
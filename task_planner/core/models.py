@@ -2,6 +2,8 @@ from django.db import models
 import uuid
 from django.core.exceptions import ValidationError
 
+MAX_TEAM_MEMBERS = 50
+
 
 class User(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -9,6 +11,12 @@ class User(models.Model):
     display_name = models.CharField(max_length=64)
     creation_time = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination order for user/list/
+            models.Index(fields=['creation_time', 'id'], name='user_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -20,14 +28,22 @@ class Team(models.Model):
     creation_time = models.DateTimeField(auto_now_add=True)
     admin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='admin_teams')
     users = models.ManyToManyField(User, related_name='teams', blank=True)
+    # Size of `users`, kept in step with membership writes by core/services.py
+    member_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # keyset pagination order for team/list/
+            models.Index(fields=['creation_time', 'id'], name='team_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     def clean(self):
         # Check if the number of users exceeds 50
-        if self.users.count() > 50:
-            raise ValidationError("A team cannot have more than 50 members.")
+        if self.member_count > MAX_TEAM_MEMBERS:
+            raise ValidationError(f"A team cannot have more than {MAX_TEAM_MEMBERS} members.")
         
 class Board(models.Model):
     STATUS_CHOICES = (
@@ -42,9 +58,19 @@ class Board(models.Model):
     creation_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    # Task counts per status, kept in step with task writes by core/services.py
+    open_tasks = models.PositiveIntegerField(default=0)
+    in_progress_tasks = models.PositiveIntegerField(default=0)
+    complete_tasks = models.PositiveIntegerField(default=0)
+    # Set once the board's tasks have been moved to ArchivedTask by core/archive.py
+    archived_time = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('team', 'name')  # board name must be unique for a team
+        indexes = [
+            # open boards of a team (board/list/)
+            models.Index(fields=['team', 'status'], name='board_team_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -67,6 +93,136 @@ class Task(models.Model):
 
     class Meta:
         unique_together = ('board', 'title')  # task title must be unique per board
+        indexes = [
+            # incomplete tasks of a board (board/close/, bulk status updates)
+            models.Index(fields=['board', 'status'], name='task_board_status_idx'),
+            # a user's tasks by status
+            models.Index(fields=['user', 'status'], name='task_user_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ArchivedTask(models.Model):
+    """A task of a long-closed board, moved out of core_task by core/archive.py."""
+    id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=64)
+    description = models.CharField(max_length=128)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='archived_tasks')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    creation_time = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    archived_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # an archived board's tasks in export order
+            models.Index(fields=['board', 'creation_time', 'id'], name='archived_task_board_idx'),
+            models.Index(fields=['user'], name='archived_task_user_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ExportJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    format = models.CharField(max_length=10, default='text')
+    creation_time = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.id)
+
+
+class ExportJobItem(models.Model):
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    job = models.ForeignKey(ExportJob, on_delete=models.CASCADE, related_name='items')
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='export_items')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    out_file = models.CharField(max_length=255, blank=True)
+    # unchanged, appended or rewritten; see core/incremental.py
+    mode = models.CharField(max_length=10, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.job_id}:{self.board_id}"
+
+
+class BoardExport(models.Model):
+    """The last export file of a board in one format; see core/incremental.py."""
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='exports')
+    format = models.CharField(max_length=10)
+    out_file = models.CharField(max_length=255)
+    # Id of the newest ChangeEvent of the board that the file reflects
+    watermark = models.PositiveBigIntegerField(default=0)
+    exported_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('board', 'format')
+
+    def __str__(self):
+        return f"{self.board_id}.{self.format}@{self.watermark}"
+
+
+class ImportCheckpoint(models.Model):
+    """How far `manage.py import_planner` got through one source file."""
+    source = models.CharField(max_length=255, primary_key=True)
+    # Records consumed from the source, committed together with their batch
+    records = models.PositiveBigIntegerField(default=0)
+    counts = models.JSONField(default=dict)
+    finished = models.BooleanField(default=False)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}@{self.records}"
+
+
+class ChangeEvent(models.Model):
+    """One entry of the ordered change feed; see core/changes.py."""
+    KIND_CHOICES = [
+        ('task_added', 'Task added'),
+        ('task_status', 'Task status changed'),
+        ('tasks_status', 'Task statuses changed in bulk'),
+        ('board_created', 'Board created'),
+        ('board_closed', 'Board closed'),
+        ('board_archived', 'Board archived'),
+        ('board_edited', 'Board or its tasks edited in the admin'),
+    ]
+
+    # The feed cursor: events are read back in id order
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Plain ids rather than foreign keys, so events outlive archived or deleted rows
+    team_id = models.UUIDField()
+    board_id = models.UUIDField()
+    task_id = models.UUIDField(null=True, blank=True)
+    data = models.JSONField(default=dict)
+    creation_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['team_id', 'id'], name='change_event_team_idx'),
+            models.Index(fields=['board_id', 'id'], name='change_event_board_idx'),
+            # compaction deletes by age
+            models.Index(fields=['creation_time'], name='change_event_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.kind}"
+
+
+class ChangeVersion(models.Model):
+    # Bumped on every write behind an endpoint; see core/versions.py
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}@{self.version}"
@@ -0,0 +1,98 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def pack_cursor(values):
+    # Opaque to clients: URL-safe base64 of a JSON list
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def unpack_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def encode_cursor(creation_time, pk):
+    # The last row's (creation_time, id) pair
+    return pack_cursor([creation_time.isoformat(), str(pk)])
+
+
+def decode_cursor(cursor):
+    try:
+        creation_time, pk = unpack_cursor(cursor)
+        if not isinstance(creation_time, str) or not isinstance(pk, str):
+            raise InvalidCursor("Invalid cursor")
+        return datetime.fromisoformat(creation_time), uuid.UUID(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("limit must be an integer")
+    if limit < 1:
+        raise InvalidCursor("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _page_queryset(queryset, cursor, limit):
+    queryset = queryset.order_by("creation_time", "id")
+    if cursor:
+        creation_time, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(creation_time__gt=creation_time) |
+            Q(creation_time=creation_time, id__gt=pk)
+        )
+    # One extra row tells us whether another page exists
+    return queryset[:limit + 1]
+
+
+def _split_page(rows, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.creation_time, last.id)
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor=None, limit=None):
+    """
+    Return one page of ``queryset`` ordered by (creation_time, id) plus the
+    cursor for the next page (None on the last page).
+
+    Rows after the cursor are selected with a seek condition instead of
+    OFFSET, so every page costs a single indexed query.
+    """
+    limit = parse_limit(limit)
+    rows = list(_page_queryset(queryset, cursor, limit))
+    return _split_page(rows, limit)
+
+
+async def akeyset_page(queryset, cursor=None, limit=None):
+    """Async version of keyset_page, fetching the page with the async ORM."""
+    limit = parse_limit(limit)
+    rows = [row async for row in _page_queryset(queryset, cursor, limit)]
+    return _split_page(rows, limit)
@@ -0,0 +1,106 @@
+"""
+Fast path for list endpoints: rows are read as values_list() tuples and
+turned into the same output a ModelSerializer would give, without building
+model instances or running DRF fields per row.
+
+A Projection is derived from a serializer class, so the two stay in step:
+adding a field to the serializer adds it to the projection. Values come out
+JSON-native (str, int, None), which keeps DRF's JSONRenderer on its fast
+C-encoder path instead of calling its default() hook for every UUID and
+datetime.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+def _iso_datetime(field, current_timezone):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return None
+    field_timezone = getattr(field, "timezone", current_timezone)
+
+    def convert(value):
+        # DateTimeField.to_representation, with the aware-datetime case inlined
+        if value.tzinfo is not None and field_timezone is not None:
+            value = value.astimezone(field_timezone)
+        else:
+            value = field.enforce_timezone(value)
+        if output_format.lower() != ISO_8601:
+            return value.strftime(output_format)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    return convert
+
+
+def _same(value):
+    return value
+
+
+def _nullable(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+def _converter(field, current_timezone):
+    """Return a callable for one non-null value, or None if the value is output as is."""
+    if isinstance(field, serializers.UUIDField):
+        return str if field.uuid_format == "hex_verbose" else field.to_representation
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        # values_list() yields the raw key, which DRF would hand to the JSON encoder
+        return str
+    if isinstance(field, serializers.DateTimeField):
+        return _iso_datetime(field, current_timezone)
+    if isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+                          serializers.ChoiceField)):
+        return None
+    return field.to_representation
+
+
+class Projection:
+    """
+    Serialize ``values_list()`` rows of ``serializer_class.Meta.model`` like
+    ``serializer_class`` does. ``extra`` columns (e.g. the keyset pagination
+    order) are fetched with the row but left out of the output.
+    """
+
+    def __init__(self, serializer_class, extra=("id", "creation_time")):
+        model = serializer_class.Meta.model
+
+        columns = []
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if "." in field.source or field.source == "*":
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name} has no single column to project")
+            model_field = model._meta.get_field(field.source)
+            columns.append(model_field.attname)
+            self.fields.append((name, len(columns) - 1, field, model_field.null))
+
+        for name in extra:
+            if name not in columns:
+                columns.append(name)
+        self.columns = columns
+
+    def queryset(self, queryset):
+        # Named rows keep attribute access (row.id, row.creation_time) for keyset_page
+        return queryset.values_list(*self.columns, named=True)
+
+    def converters(self):
+        # The active timezone is looked up once per call, not once per value
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = []
+        for name, index, field, nullable in self.fields:
+            convert = _converter(field, current_timezone) or _same
+            if nullable and convert is not _same:
+                convert = _nullable(convert)
+            converters.append((name, index, convert))
+        return converters
+
+    def render(self, rows):
+        converters = self.converters()
+        return [{name: convert(row[index]) for name, index, convert in converters} for row in rows]
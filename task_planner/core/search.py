@@ -0,0 +1,150 @@
+"""
+Full-text search over task titles and descriptions.
+
+Tasks are indexed in core_task_fts, an FTS5 table that reads its content from
+core_task by rowid (external content) and is kept in sync by triggers on
+core_task. SQLite may renumber rowids on VACUUM, and Django drops the
+triggers whenever a migration rebuilds core_task, so run
+``manage.py rebuild_task_search`` after either.
+"""
+import re
+
+from django.db import connection
+
+from .models import Task
+from .pagination import InvalidCursor, pack_cursor, unpack_cursor, parse_limit
+
+FTS_TABLE = "core_task_fts"
+
+# Titles weigh ten times as much as descriptions in the bm25 rank
+RANK_FUNCTION = "bm25(10.0, 1.0)"
+
+SEARCH_ORDERS = ("rank", "recent")
+
+_TRIGGERS = {
+    "core_task_fts_insert": f"""
+        CREATE TRIGGER core_task_fts_insert AFTER INSERT ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END""",
+    "core_task_fts_delete": f"""
+        CREATE TRIGGER core_task_fts_delete AFTER DELETE ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END""",
+    # Status changes leave the index alone
+    "core_task_fts_update": f"""
+        CREATE TRIGGER core_task_fts_update AFTER UPDATE OF title, description ON core_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END""",
+}
+
+
+def is_supported(conn=connection):
+    """True if ``conn`` is SQLite built with FTS5."""
+    if conn.vendor != "sqlite":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def install(conn=connection):
+    """Create the FTS table and triggers if missing, then rebuild the index from core_task."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, content='core_task', content_rowid='rowid', "
+            f"tokenize='porter unicode61')"
+        )
+        for name, sql in _TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)", [RANK_FUNCTION])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(conn=connection):
+    with conn.cursor() as cursor:
+        for name in _TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query matching every word.
+
+    Words are quoted so characters that mean something to FTS5 (-, *, ",
+    AND/OR/NOT) are searched for literally instead of raising syntax errors.
+    """
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_tasks(text, board_id=None, team_id=None, status=None, order="rank", cursor=None, limit=None):
+    """
+    Return one page of tasks matching ``text`` and the cursor for the next page.
+
+    ``order="rank"`` returns the best matches first (bm25); ``"recent"``
+    returns the newest tasks first, which FTS5 reads straight off its index
+    and stays fast for very common words. Rank cursors are approximate while
+    tasks are being written, since bm25 scores shift with the index.
+    """
+    limit = parse_limit(limit)
+    joins = [f"JOIN core_task ON core_task.rowid = {FTS_TABLE}.rowid"]
+    where = [f"{FTS_TABLE} MATCH %s"]
+    params = [match_expression(text)]
+
+    if board_id is not None:
+        where.append("core_task.board_id = %s")
+        params.append(board_id.hex)
+    if team_id is not None:
+        joins.append("JOIN core_board ON core_board.id = core_task.board_id")
+        where.append("core_board.team_id = %s")
+        params.append(team_id.hex)
+    if status is not None:
+        where.append("core_task.status = %s")
+        params.append(status)
+
+    if cursor:
+        values = unpack_cursor(cursor)
+        try:
+            if order == "rank":
+                rank, rowid = float(values[0]), int(values[1])
+                where.append(f"({FTS_TABLE}.rank > %s OR ({FTS_TABLE}.rank = %s AND {FTS_TABLE}.rowid > %s))")
+                params.extend([rank, rank, rowid])
+            else:
+                where.append(f"{FTS_TABLE}.rowid < %s")
+                params.append(int(values[0]))
+        except (IndexError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+
+    if order == "rank":
+        order_by = f"{FTS_TABLE}.rank, {FTS_TABLE}.rowid"
+    else:
+        order_by = f"{FTS_TABLE}.rowid DESC"
+
+    sql = (
+        f"SELECT core_task.id, core_task.title, core_task.description, core_task.status, "
+        f"core_task.board_id, core_task.user_id, core_task.creation_time, "
+        f"{FTS_TABLE}.rowid AS search_rowid, {FTS_TABLE}.rank AS search_rank "
+        f"FROM {FTS_TABLE} {' '.join(joins)} "
+        f"WHERE {' AND '.join(where)} "
+        f"ORDER BY {order_by} LIMIT %s"
+    )
+    # One extra row tells us whether another page exists
+    tasks = list(Task.objects.raw(sql, params + [limit + 1]))
+
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        if order == "rank":
+            next_cursor = pack_cursor([last.search_rank, last.search_rowid])
+        else:
+            next_cursor = pack_cursor([last.search_rowid])
+    return tasks, next_cursor
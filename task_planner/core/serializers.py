@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import User, Team, Board, Task
+from .projections import Projection
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -36,3 +37,8 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'description', 'board', 'user', 'creation_time', 'status']
+
+
+# values_list() fast paths for the list endpoints, same output as the serializers
+USER_LIST_PROJECTION = Projection(UserSerializer)
+TEAM_LIST_PROJECTION = Projection(TeamListSerializer)
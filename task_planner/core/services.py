@@ -0,0 +1,686 @@
+"""
+Create and export operations shared by the API views and the admin actions.
+
+Single-object functions raise ServiceError with the message and HTTP status
+the API returns. bulk_add_tasks validates a whole batch with a handful of
+set-based queries, inserts the valid rows with bulk_create inside one
+transaction and returns one result per input row, in input order; the
+single-object creates run through the same code with a batch of one.
+"""
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import cache, changes, incremental, search, versions
+from .jobs import submit_export
+from .lookups import batches
+from .pagination import InvalidCursor
+from .models import MAX_TEAM_MEMBERS, User, Team, Board, Task, ArchivedTask
+
+MAX_BULK_TASKS = 10000
+
+MAX_BUNDLE_BOARDS = 1000
+
+
+class ServiceError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_uuid(value):
+    """Return ``value`` as a UUID, or None if it is not a valid one."""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _ok(index, obj):
+    return {"index": index, "id": str(obj.id)}
+
+
+def _error(index, message):
+    return {"index": index, "error": message}
+
+
+def _single(outcome, not_found=()):
+    """Unwrap a one-row bulk outcome into the created object or a ServiceError."""
+    results, created = outcome
+    if 0 in created:
+        return created[0]
+    message = results[0]["error"]
+    raise ServiceError(message, status=404 if message in not_found else 400)
+
+
+# Users
+
+def validate_user(name, display_name):
+    if not name or not display_name:
+        raise ServiceError("Both name and display_name are required")
+    if not isinstance(name, str) or not isinstance(display_name, str):
+        raise ServiceError("name and display_name must be strings")
+    if len(name) > 64 or len(display_name) > 64:
+        raise ServiceError("Max length for name/display_name is 64 characters")
+
+
+def create_user(name, display_name):
+    return _single(_create_users([{"name": name, "display_name": display_name}]))
+
+
+def _create_users(rows):
+    results = [None] * len(rows)
+    pending = []
+    for index, row in enumerate(rows):
+        try:
+            validate_user(row.get("name"), row.get("display_name"))
+            pending.append((index, row))
+        except ServiceError as e:
+            results[index] = _error(index, e.message)
+
+    taken = set(User.objects.filter(
+        name__in=[row["name"] for _, row in pending]
+    ).values_list("name", flat=True))
+
+    to_create = []
+    for index, row in pending:
+        if row["name"] in taken:
+            results[index] = _error(index, "User with this name already exists")
+            continue
+        taken.add(row["name"])
+        to_create.append((index, User(name=row["name"], display_name=row["display_name"])))
+
+    with transaction.atomic():
+        User.objects.bulk_create([user for _, user in to_create])
+        # bulk_create sends no post_save, so user/list/'s version is bumped here
+        if to_create:
+            versions.bump(["user"])
+    for index, user in to_create:
+        results[index] = _ok(index, user)
+    return results, dict(to_create)
+
+
+# Teams
+
+def validate_team(name, description, admin_id):
+    if not all([name, description, admin_id]):
+        raise ServiceError("Missing fields")
+    if not isinstance(name, str) or not isinstance(description, str):
+        raise ServiceError("name and description must be strings")
+    if len(name) > 64 or len(description) > 128:
+        raise ServiceError("Invalid field length")
+
+
+def create_team(name, description, admin_id):
+    """Create a team with its admin as the first member."""
+    return _single(_create_teams([{
+        "name": name, "description": description, "admin": admin_id,
+    }]), not_found=("Admin user not found",))
+
+
+def _create_teams(rows):
+    results = [None] * len(rows)
+    pending = []
+    for index, row in enumerate(rows):
+        try:
+            validate_team(row.get("name"), row.get("description"), row.get("admin"))
+            admin_id = parse_uuid(row["admin"])
+            if admin_id is None:
+                raise ServiceError("Admin user not found")
+            pending.append((index, row, admin_id))
+        except ServiceError as e:
+            results[index] = _error(index, e.message)
+
+    taken = set(Team.objects.filter(
+        name__in=[row["name"] for _, row, _ in pending]
+    ).values_list("name", flat=True))
+    known_users = set(User.objects.filter(
+        id__in={admin_id for _, _, admin_id in pending}
+    ).values_list("id", flat=True))
+
+    to_create = []
+    for index, row, admin_id in pending:
+        if row["name"] in taken:
+            results[index] = _error(index, "Team with this name already exists")
+        elif admin_id not in known_users:
+            results[index] = _error(index, "Admin user not found")
+        else:
+            taken.add(row["name"])
+            team = Team(name=row["name"], description=row["description"], admin_id=admin_id, member_count=1)
+            to_create.append((index, team))
+
+    Membership = Team.users.through
+    with transaction.atomic():
+        Team.objects.bulk_create([team for _, team in to_create])
+        Membership.objects.bulk_create([Membership(team_id=team.id, user_id=team.admin_id) for _, team in to_create])
+        if to_create:
+            versions.bump(["team"])
+    for index, team in to_create:
+        results[index] = _ok(index, team)
+    return results, dict(to_create)
+
+
+def _team_exists(team_id):
+    team_id = parse_uuid(team_id)
+    if team_id is None or not Team.objects.filter(id=team_id).exists():
+        raise ServiceError("Team not found", status=404)
+    return team_id
+
+
+def _parse_user_ids(user_ids):
+    parsed = {parse_uuid(user_id) for user_id in user_ids}
+    if None in parsed:
+        raise ServiceError("One or more user IDs are invalid")
+    return parsed
+
+
+def _check_users_exist(user_ids):
+    if User.objects.filter(id__in=user_ids).count() != len(user_ids):
+        raise ServiceError("One or more user IDs are invalid")
+
+
+def _reserve_members(team_id, added):
+    """Raise member_count by ``added`` unless that would pass the cap."""
+    if added and not Team.objects.filter(
+        id=team_id, member_count__lte=MAX_TEAM_MEMBERS - added
+    ).update(member_count=F("member_count") + added):
+        raise ServiceError(f"A team cannot have more than {MAX_TEAM_MEMBERS} members.")
+
+
+def add_team_members(team_id, user_ids):
+    team_id = _team_exists(team_id)
+    user_ids = _parse_user_ids(user_ids)
+    _check_users_exist(user_ids)
+
+    Membership = Team.users.through
+    with transaction.atomic():
+        current = set(Membership.objects.filter(
+            team_id=team_id, user_id__in=user_ids
+        ).values_list("user_id", flat=True))
+        new = user_ids - current
+        # The cap is enforced on the counter, not by counting membership rows
+        _reserve_members(team_id, len(new))
+        Membership.objects.bulk_create([Membership(team_id=team_id, user_id=user_id) for user_id in new])
+        cache.invalidate_teams([team_id])
+    return len(new)
+
+
+def remove_team_members(team_id, user_ids):
+    team_id = _team_exists(team_id)
+    user_ids = _parse_user_ids(user_ids)
+
+    with transaction.atomic():
+        removed, _ = Team.users.through.objects.filter(team_id=team_id, user_id__in=user_ids).delete()
+        if removed:
+            Team.objects.filter(id=team_id).update(member_count=F("member_count") - removed)
+        cache.invalidate_teams([team_id])
+    return removed
+
+
+def sync_team_members(team_id, user_ids):
+    """
+    Make ``user_ids`` the exact member list of the team.
+
+    The current members are read once to work out the diff; removals and
+    additions are then written to the through table in one transaction.
+    """
+    team_id = _team_exists(team_id)
+    desired = _parse_user_ids(user_ids)
+    if len(desired) > MAX_TEAM_MEMBERS:
+        raise ServiceError(f"A team cannot have more than {MAX_TEAM_MEMBERS} members.")
+    _check_users_exist(desired)
+
+    Membership = Team.users.through
+    with transaction.atomic():
+        current = set(Membership.objects.filter(team_id=team_id).values_list("user_id", flat=True))
+        to_add = desired - current
+        to_remove = current - desired
+        if to_remove:
+            Membership.objects.filter(team_id=team_id, user_id__in=to_remove).delete()
+        Membership.objects.bulk_create([Membership(team_id=team_id, user_id=user_id) for user_id in to_add])
+        Team.objects.filter(id=team_id).update(member_count=len(desired))
+        cache.invalidate_teams([team_id])
+    return {"added": len(to_add), "removed": len(to_remove), "member_count": len(desired)}
+
+
+def recount_members(team_ids):
+    """Rebuild member_count of ``team_ids`` from the through table."""
+    counts = dict.fromkeys(team_ids, 0)
+    rows = Team.users.through.objects.filter(team_id__in=counts).values("team_id").annotate(n=Count("id")).order_by()
+    for row in rows:
+        counts[row["team_id"]] = row["n"]
+    for team_id, count in counts.items():
+        Team.objects.filter(id=team_id).update(member_count=count)
+
+
+# Boards
+
+def validate_board(name, description, team_id):
+    if not all([name, description, team_id]):
+        raise ServiceError("Missing fields")
+    if not isinstance(name, str) or not isinstance(description, str):
+        raise ServiceError("name and description must be strings")
+    if len(name) > 64 or len(description) > 128:
+        raise ServiceError("Invalid field length")
+
+
+def create_board(name, description, team_id):
+    return _single(_create_boards([{
+        "name": name, "description": description, "team_id": team_id,
+    }]), not_found=("Team not found",))
+
+
+def _create_boards(rows):
+    results = [None] * len(rows)
+    pending = []
+    for index, row in enumerate(rows):
+        try:
+            validate_board(row.get("name"), row.get("description"), row.get("team_id"))
+            team_id = parse_uuid(row["team_id"])
+            if team_id is None:
+                raise ServiceError("Team not found")
+            pending.append((index, row, team_id))
+        except ServiceError as e:
+            results[index] = _error(index, e.message)
+
+    team_ids = {team_id for _, _, team_id in pending}
+    known_teams = set(Team.objects.filter(id__in=team_ids).values_list("id", flat=True))
+    taken = set(Board.objects.filter(
+        team_id__in=team_ids, name__in=[row["name"] for _, row, _ in pending]
+    ).values_list("team_id", "name"))
+
+    to_create = []
+    for index, row, team_id in pending:
+        if team_id not in known_teams:
+            results[index] = _error(index, "Team not found")
+        elif (team_id, row["name"]) in taken:
+            results[index] = _error(index, "Board name must be unique per team")
+        else:
+            taken.add((team_id, row["name"]))
+            board = Board(name=row["name"], description=row["description"], team_id=team_id)
+            to_create.append((index, board))
+
+    with transaction.atomic():
+        Board.objects.bulk_create([board for _, board in to_create])
+        changes.record("board_created", [
+            (board.team_id, board.id, None, {"name": board.name}) for _, board in to_create
+        ])
+        # bulk_create skips post_save, so the cached board lists are invalidated here
+        cache.invalidate_team_boards({board.team_id for _, board in to_create})
+    for index, board in to_create:
+        results[index] = _ok(index, board)
+    return results, dict(to_create)
+
+
+# Tasks
+
+def validate_task(title, description, board_id, user_id):
+    if not all([title, description, board_id, user_id]):
+        raise ServiceError("Missing fields")
+    if not isinstance(title, str) or not isinstance(description, str):
+        raise ServiceError("title and description must be strings")
+    if len(title) > 64 or len(description) > 128:
+        raise ServiceError("Invalid field length")
+
+
+def add_task(title, description, board_id, user_id):
+    return _single(_add_tasks([{
+        "title": title, "description": description, "board_id": board_id, "user_id": user_id,
+    }]), not_found=("Board not found", "User not found"))
+
+
+def bulk_add_tasks(rows):
+    if len(rows) > MAX_BULK_TASKS:
+        raise ServiceError(f"Cannot add more than {MAX_BULK_TASKS} tasks at once")
+    return _add_tasks(rows)[0]
+
+
+def _add_tasks(rows):
+    results = [None] * len(rows)
+    pending = []
+    for index, row in enumerate(rows):
+        try:
+            validate_task(row.get("title"), row.get("description"), row.get("board_id"), row.get("user_id"))
+            board_id = parse_uuid(row["board_id"])
+            user_id = parse_uuid(row["user_id"])
+            if board_id is None:
+                raise ServiceError("Board not found")
+            if user_id is None:
+                raise ServiceError("User not found")
+            pending.append((index, row, board_id, user_id))
+        except ServiceError as e:
+            results[index] = _error(index, e.message)
+
+    board_ids = {board_id for _, _, board_id, _ in pending}
+    boards = {
+        board_id: (status, team_id)
+        for board_id, status, team_id in Board.objects.filter(id__in=board_ids).values_list("id", "status", "team_id")
+    }
+    known_users = set()
+    for batch in batches({user_id for _, _, _, user_id in pending}):
+        known_users.update(User.objects.filter(id__in=batch).values_list("id", flat=True))
+    taken = set()
+    for batch in batches({row["title"] for _, row, _, _ in pending}):
+        taken.update(Task.objects.filter(
+            board_id__in=board_ids, title__in=batch
+        ).values_list("board_id", "title"))
+
+    to_create = []
+    for index, row, board_id, user_id in pending:
+        if board_id not in boards:
+            results[index] = _error(index, "Board not found")
+        elif boards[board_id][0] != "OPEN":
+            results[index] = _error(index, "Cannot add task to a closed board")
+        elif (board_id, row["title"]) in taken:
+            results[index] = _error(index, "Task title must be unique for this board")
+        elif user_id not in known_users:
+            results[index] = _error(index, "User not found")
+        else:
+            taken.add((board_id, row["title"]))
+            task = Task(title=row["title"], description=row["description"], board_id=board_id, user_id=user_id)
+            to_create.append((index, task))
+
+    added = {}
+    for _, task in to_create:
+        added[task.board_id] = added.get(task.board_id, 0) + 1
+
+    try:
+        with transaction.atomic():
+            Task.objects.bulk_create([task for _, task in to_create])
+            for board_id, count in added.items():
+                # Only an OPEN board takes the increment, so a close that
+                # slipped in after the check above rolls the insert back
+                if not Board.objects.filter(id=board_id, status="OPEN").update(open_tasks=F("open_tasks") + count):
+                    raise ServiceError("Cannot add task to a closed board")
+            changes.record("task_added", [
+                (boards[task.board_id][1], task.board_id, task.id,
+                 {"title": task.title, "status": task.status, "user_id": str(task.user_id)})
+                for _, task in to_create
+            ])
+            cache.invalidate_team_boards({boards[board_id][1] for board_id in added})
+    except IntegrityError:
+        # Another writer added a clashing title between our check and insert
+        raise ServiceError("Task title must be unique for this board", status=409)
+    for index, task in to_create:
+        results[index] = _ok(index, task)
+    return results, dict(to_create)
+
+
+TASK_STATUSES = ("OPEN", "IN_PROGRESS", "COMPLETE")
+
+# Board counter column for each task status
+COUNTER_FIELDS = {
+    "OPEN": "open_tasks",
+    "IN_PROGRESS": "in_progress_tasks",
+    "COMPLETE": "complete_tasks",
+}
+
+
+def _move_counters(moved, new_status):
+    """
+    Apply status moves to the board counters.
+
+    ``moved`` maps (board_id, old_status) to the number of tasks that left
+    old_status for ``new_status``.
+    """
+    deltas = {}
+    for (board_id, old_status), count in moved.items():
+        board = deltas.setdefault(board_id, {})
+        board[old_status] = board.get(old_status, 0) - count
+        board[new_status] = board.get(new_status, 0) + count
+
+    for board_id, changes in deltas.items():
+        Board.objects.filter(id=board_id).update(**{
+            COUNTER_FIELDS[status]: F(COUNTER_FIELDS[status]) + delta
+            for status, delta in changes.items() if delta
+        })
+
+
+def update_task_status(task_id, new_status):
+    if new_status not in TASK_STATUSES:
+        raise ServiceError("Invalid status")
+    task_id = parse_uuid(task_id)
+    row = Task.objects.filter(id=task_id).values_list("board_id", "board__team_id", "status").first() if task_id else None
+    if row is None:
+        if task_id and ArchivedTask.objects.filter(id=task_id).exists():
+            raise ServiceError("Task is archived", status=409)
+        raise ServiceError("Task not found", status=404)
+
+    board_id, team_id, old_status = row
+    if old_status == new_status:
+        return
+    with transaction.atomic():
+        # Conditional on the status we read, so a concurrent change is not counted twice
+        if Task.objects.filter(id=task_id, status=old_status).update(status=new_status):
+            _move_counters({(board_id, old_status): 1}, new_status)
+            changes.record("task_status", [(team_id, board_id, task_id, {"from": old_status, "to": new_status})])
+            cache.invalidate_team_boards([team_id])
+
+
+def bulk_update_task_status(new_status, task_ids=None, board_id=None, from_status=None, close=False):
+    """
+    Move every matching task to ``new_status`` with one conditional UPDATE.
+
+    Tasks are selected by ``task_ids`` or by ``board_id`` (optionally narrowed
+    to ``from_status``). With ``close`` the board is closed in the same
+    transaction, and the whole change is rolled back if it cannot be.
+    """
+    if new_status not in TASK_STATUSES:
+        raise ServiceError("Invalid status")
+    if from_status is not None and from_status not in TASK_STATUSES:
+        raise ServiceError("Invalid from_status")
+    if not task_ids and not board_id:
+        raise ServiceError("Either task IDs or a board ID is required")
+    if close and not board_id:
+        raise ServiceError("board_id is required to close the board")
+
+    tasks = Task.objects.all()
+    if task_ids:
+        parsed = [parse_uuid(task_id) for task_id in task_ids]
+        if None in parsed:
+            raise ServiceError("One or more task IDs are invalid")
+        tasks = tasks.filter(id__in=parsed)
+    if board_id:
+        board_id = parse_uuid(board_id)
+        if board_id is None or not Board.objects.filter(id=board_id).exists():
+            raise ServiceError("Board not found", status=404)
+        tasks = tasks.filter(board_id=board_id)
+    if from_status:
+        tasks = tasks.filter(status=from_status)
+    tasks = tasks.exclude(status=new_status)
+
+    with transaction.atomic():
+        # Per-board, per-status tally of what is about to move, for the counters
+        moved = {
+            (row["board_id"], row["status"]): row["n"]
+            for row in tasks.values("board_id", "status").annotate(n=Count("id")).order_by()
+        }
+        updated = tasks.update(status=new_status)
+        _move_counters(moved, new_status)
+        # One event per board rather than per task, so a whole-board move stays one row
+        per_board = {}
+        for (moved_board_id, old_status), count in moved.items():
+            per_board.setdefault(moved_board_id, {})[old_status] = count
+        teams = dict(Board.objects.filter(id__in=per_board).values_list("id", "team_id"))
+        changes.record("tasks_status", [
+            (teams[moved_board_id], moved_board_id, None, {"to": new_status, "moved": counts})
+            for moved_board_id, counts in per_board.items()
+        ])
+        cache.invalidate_team_boards(set(teams.values()))
+        if close:
+            close_board(board_id)
+
+    return {"updated": updated, "board_closed": bool(close)}
+
+
+def close_board(board_id):
+    """Close ``board_id`` if every task on it is COMPLETE."""
+    board_id = parse_uuid(board_id)
+    team_id = Board.objects.filter(id=board_id).values_list("team_id", flat=True).first() if board_id else None
+    if team_id is None:
+        raise ServiceError("Board not found", status=404)
+    with transaction.atomic():
+        # The counters make this a single-row check instead of a scan of the tasks
+        closed = Board.objects.filter(id=board_id, open_tasks=0, in_progress_tasks=0).update(
+            status="CLOSED", end_time=timezone.now()
+        )
+        if not closed:
+            raise ServiceError("Cannot close board until all tasks are COMPLETE")
+        changes.record("board_closed", [(team_id, board_id, None, {})])
+        cache.invalidate_team_boards([team_id])
+
+
+def record_board_edits(board_ids):
+    """
+    Record edits made outside the service layer (the admin) in the change
+    feed, so feed clients and incremental exports pick them up.
+    """
+    boards = Board.objects.filter(id__in=set(board_ids)).values_list("team_id", "id")
+    changes.record("board_edited", [(team_id, board_id, None, {}) for team_id, board_id in boards])
+
+
+def recount_tasks(board_ids):
+    """Rebuild the task counters of ``board_ids`` from the task rows, archived ones included."""
+    counts = {board_id: dict.fromkeys(COUNTER_FIELDS.values(), 0) for board_id in board_ids}
+    for model in (Task, ArchivedTask):
+        rows = model.objects.filter(board_id__in=counts).values("board_id", "status").annotate(n=Count("id")).order_by()
+        for row in rows:
+            counts[row["board_id"]][COUNTER_FIELDS[row["status"]]] += row["n"]
+    with transaction.atomic():
+        for board_id, fields in counts.items():
+            Board.objects.filter(id=board_id).update(**fields)
+        cache.invalidate_team_boards(set(
+            Board.objects.filter(id__in=counts).values_list("team_id", flat=True)
+        ))
+
+
+# Exports
+
+def export_board(board_id, fmt="text", force=False):
+    """
+    Bring the export of one board under out/ up to date and return its path
+    and whether it was left unchanged, appended to or rewritten.
+    """
+    board_id = parse_uuid(board_id)
+    board = Board.objects.filter(id=board_id).first() if board_id else None
+    if board is None:
+        raise ServiceError("Board not found", status=404)
+    return incremental.export(board, fmt, force=force)
+
+
+def bundle_boards(team_id=None, board_ids=None):
+    """
+    Return (board ids, archive name) for a bundle of every board of
+    ``team_id`` or of the listed ``board_ids``, ordered by creation time.
+    """
+    if team_id:
+        team = Team.objects.filter(id=parse_uuid(team_id)).only("name").first() if parse_uuid(team_id) else None
+        if team is None:
+            raise ServiceError("Team not found", status=404)
+        boards = list(Board.objects.filter(team=team).order_by("creation_time", "id").values_list("id", flat=True))
+        return boards, team.name.replace(" ", "_")
+
+    parsed = list(dict.fromkeys(parse_uuid(board_id) for board_id in board_ids or ()))
+    if not parsed:
+        raise ServiceError("A team ID or list of board IDs is required")
+    if None in parsed:
+        raise ServiceError("One or more board IDs are invalid", status=404)
+    if len(parsed) > MAX_BUNDLE_BOARDS:
+        raise ServiceError(f"Cannot bundle more than {MAX_BUNDLE_BOARDS} boards at once")
+    found = {}
+    for batch in batches(parsed):
+        found.update(Board.objects.filter(id__in=batch).values_list("id", "creation_time"))
+    if len(found) != len(parsed):
+        raise ServiceError("One or more board IDs are invalid", status=404)
+    return sorted(found, key=lambda board_id: (found[board_id], board_id)), f"boards_{len(found)}"
+
+
+def queue_export(board_ids, fmt="text"):
+    """Queue a background export job for ``board_ids`` and return it."""
+    parsed = [parse_uuid(board_id) for board_id in board_ids]
+    if not parsed or None in parsed:
+        raise ServiceError("One or more board IDs are invalid", status=404)
+    try:
+        return submit_export(parsed, fmt)
+    except Board.DoesNotExist:
+        raise ServiceError("One or more board IDs are invalid", status=404)
+
+
+# Search
+
+def search_tasks(text, board_id=None, team_id=None, status=None, order="rank", cursor=None, limit=None):
+    """Validate the filters and return a page of matching tasks and the next cursor."""
+    if not search.is_supported():
+        raise ServiceError("Task search requires SQLite FTS5", status=501)
+    if not search.match_expression(text):
+        raise ServiceError("q must contain at least one word")
+    if order not in search.SEARCH_ORDERS:
+        raise ServiceError(f"order must be one of: {', '.join(search.SEARCH_ORDERS)}")
+    if status is not None and status not in TASK_STATUSES:
+        raise ServiceError("Invalid status")
+
+    filters = {}
+    for name, value in (("board_id", board_id), ("team_id", team_id)):
+        if value is not None:
+            filters[name] = parse_uuid(value)
+            if filters[name] is None:
+                raise ServiceError(f"Invalid {name}")
+
+    try:
+        return search.search_tasks(text, status=status, order=order, cursor=cursor, limit=limit, **filters)
+    except InvalidCursor as e:
+        raise ServiceError(str(e))
+
+
+# Change feed
+
+def _change_filters(team_id, board_id, timeout):
+    filters = {}
+    for name, value in (("board_id", board_id), ("team_id", team_id)):
+        if value is not None:
+            filters[name] = parse_uuid(value)
+            if filters[name] is None:
+                raise ServiceError(f"Invalid {name}")
+    try:
+        timeout = float(timeout or 0)
+    except (TypeError, ValueError):
+        raise ServiceError("timeout must be a number of seconds")
+    if timeout < 0:
+        raise ServiceError("timeout must not be negative")
+    return filters, timeout
+
+
+def read_changes(since=None, team_id=None, board_id=None, limit=None, timeout=0):
+    """
+    Return (events, next_cursor, has_more) after the ``since`` cursor,
+    waiting up to ``timeout`` seconds for new events. Without ``since`` the
+    feed starts at the newest event and returns no events.
+    """
+    filters, timeout = _change_filters(team_id, board_id, timeout)
+    if not since:
+        return [], changes.head(), False
+    try:
+        return changes.read(since, limit=limit, timeout=timeout, **filters)
+    except InvalidCursor as e:
+        raise ServiceError(str(e))
+    except changes.CursorExpired as e:
+        raise ServiceError(str(e), status=410)
+
+
+async def aread_changes(since=None, team_id=None, board_id=None, limit=None, timeout=0):
+    """Async version of read_changes for api/async/changes/."""
+    filters, timeout = _change_filters(team_id, board_id, timeout)
+    if not since:
+        return [], await sync_to_async(changes.head)(), False
+    try:
+        return await changes.aread(since, limit=limit, timeout=timeout, **filters)
+    except InvalidCursor as e:
+        raise ServiceError(str(e))
+    except changes.CursorExpired as e:
+        raise ServiceError(str(e), status=410)
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import cache, services
+from .models import User, Team, Board, Task, ArchivedTask
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    cache.invalidate_users([instance.id])
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # The user's tasks and memberships go with it in a cascade that bypasses
+    # core/services.py and sends no m2m_changed
+    instance._team_ids = list(instance.teams.values_list("id", flat=True))
+    instance._task_board_ids = set(
+        Task.objects.filter(user=instance).values_list("board_id", flat=True).distinct()
+    ) | set(
+        ArchivedTask.objects.filter(user=instance).values_list("board_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    team_ids = getattr(instance, "_team_ids", ())
+    if team_ids:
+        services.recount_members(team_ids)
+        cache.invalidate_teams(team_ids)
+    board_ids = getattr(instance, "_task_board_ids", ())
+    if board_ids:
+        services.recount_tasks(board_ids)
+        services.record_board_edits(board_ids)
+
+
+@receiver([post_save, post_delete], sender=Team)
+def team_changed(sender, instance, **kwargs):
+    cache.invalidate_teams([instance.id])
+    cache.invalidate_team_boards([instance.id])
+
+
+@receiver(m2m_changed, sender=Team.users.through)
+def team_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Membership written through the related managers (e.g. the admin form)
+    # bypasses core/services.py, so member_count is rebuilt here
+    if not reverse:
+        if action.startswith("post_"):
+            services.recount_members([instance.id])
+            cache.invalidate_teams([instance.id])
+    elif action in ("post_add", "post_remove"):
+        # instance is a User and pk_set holds the affected team IDs
+        services.recount_members(pk_set)
+        cache.invalidate_teams(pk_set)
+    elif action == "pre_clear":
+        instance._cleared_team_ids = list(instance.teams.values_list("id", flat=True))
+    elif action == "post_clear":
+        team_ids = getattr(instance, "_cleared_team_ids", [])
+        services.recount_members(team_ids)
+        cache.invalidate_teams(team_ids)
+
+
+@receiver([post_save, post_delete], sender=Board)
+def board_changed(sender, instance, **kwargs):
+    cache.invalidate_team_boards([instance.team_id])
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # Runs once per new connection; with CONN_MAX_AGE that is once per thread
+    if connection.vendor != "sqlite" or not getattr(settings, "CORE_SQLITE_PRODUCTION", False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.CORE_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
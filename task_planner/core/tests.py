@@ -1,3 +1,1103 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.contrib import admin
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import archive, bundles, changes, exports, importer, incremental, jobs, services
+from .middleware import RouteLimiter, admission, slow_requests
+from .models import MAX_TEAM_MEMBERS, User, Team, Board, Task, BoardExport, ExportJob, ExportJobItem, ArchivedTask, ImportCheckpoint
+from .pagination import pack_cursor
+from .projections import Projection
+from .serializers import UserSerializer, TeamSerializer, TeamListSerializer, BoardSerializer, TaskSerializer
+
+# A bare "SCAN core_task" (no index behind it) means SQLite reads the whole table
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?\w+(?: AS \w+)?$")
+
+
+class PlannerTestCase(TestCase):
+    """
+    A team of users with an open board of tasks and a completed board.
+    full_scans() runs EXPLAIN QUERY PLAN on each SELECT a request issued and
+    lists the ones that fall back to a full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([
+            User(name=f"user{i}", display_name=f"User {i}") for i in range(20)
+        ])
+        cls.user = cls.users[0]
+        cls.team = Team.objects.create(name="team", description="Team", admin=cls.user)
+        cls.team.users.add(*cls.users[:10])
+        cls.board = Board.objects.create(name="board", description="Board", team=cls.team)
+        cls.done_board = Board.objects.create(name="done", description="Done", team=cls.team)
+        cls.tasks = Task.objects.bulk_create([
+            Task(title=f"task{i}", description="Task", board=cls.board, user=cls.users[i % 10])
+            for i in range(50)
+        ])
+        Task.objects.bulk_create([
+            Task(title=f"done{i}", description="Task", board=cls.done_board, user=cls.user, status="COMPLETE")
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(
+                f"/api/{url}", data or {}, content_type="application/json"
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 500, response)
+        return response, queries
+
+    def full_scans(self, queries):
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    if FULL_SCAN.match(detail):
+                        scans.append(f"{detail}\n    in: {sql}")
+        return scans
+
+    def assertNoFullScans(self, method, url, data=None):
+        response, queries = self.request(method, url, data)
+        scans = self.full_scans(queries)
+        self.assertFalse(scans, "full table scan:\n" + "\n".join(scans))
+        return response
+
+
+class QueryPlanTests(PlannerTestCase):
+    """
+    Runs every endpoint, then EXPLAIN QUERY PLAN on each SELECT it issued,
+    and fails if any of them falls back to a full table scan.
+    """
+
+    def test_user_endpoints(self):
+        self.assertNoFullScans("get", "user/list/?limit=5")
+        cursor = self.client.get("/api/user/list/?limit=5").json()["next_cursor"]
+        self.assertNoFullScans("get", f"user/list/?limit=5&cursor={cursor}")
+        self.assertNoFullScans("post", "user/describe/", {"id": str(self.user.id)})
+        self.assertNoFullScans("post", "user/teams/", {"id": str(self.user.id)})
+        self.assertNoFullScans("post", "user/dashboard/", {"id": str(self.user.id)})
+        self.assertNoFullScans("put", "user/update/", {"id": str(self.user.id), "user": {"display_name": "New"}})
+        self.assertNoFullScans("post", "user/create/", {"name": "fresh", "display_name": "Fresh"})
+
+    def test_team_endpoints(self):
+        self.assertNoFullScans("get", "team/list/?limit=5")
+        self.assertNoFullScans("post", "team/describe/", {"id": str(self.team.id)})
+        self.assertNoFullScans("post", "team/create/", {
+            "name": "other", "description": "Other", "admin": str(self.user.id),
+        })
+        self.assertNoFullScans("put", "team/update/", {"id": str(self.team.id), "team": {
+            "name": "renamed", "description": "Team", "admin": str(self.user.id),
+        }})
+        self.assertNoFullScans("post", "team/add-users/", {
+            "id": str(self.team.id), "users": [str(u.id) for u in self.users[10:12]],
+        })
+        self.assertNoFullScans("post", "team/remove-users/", {
+            "id": str(self.team.id), "users": [str(self.users[11].id)],
+        })
+        self.assertNoFullScans("post", "team/sync-users/", {
+            "id": str(self.team.id), "users": [str(u.id) for u in self.users[5:15]],
+        })
+
+    def test_board_endpoints(self):
+        self.assertNoFullScans("post", "board/create/", {
+            "name": "new", "description": "New", "team_id": str(self.team.id),
+        })
+        self.assertNoFullScans("post", "board/list/", {"id": str(self.team.id)})
+        self.assertNoFullScans("post", "board/close/", {"id": str(self.board.id)})
+        self.assertNoFullScans("post", "board/close/", {"id": str(self.done_board.id)})
+        # Jobs are only dispatched on commit, which never happens inside a TestCase
+        response = self.assertNoFullScans("post", "board/export-async/", {"ids": [str(self.board.id)]})
+        self.assertNoFullScans("post", "board/export-status/", {"id": response.json()["job_id"]})
+        self.assertNoFullScans("post", "board/export/", {"id": str(self.done_board.id), "stream": True})
+        for stream in (True, False):
+            response, _ = self.request("post", "board/export/", {"id": "not-a-uuid", "stream": stream})
+            self.assertEqual(response.status_code, 404)
+
+    def test_task_endpoints(self):
+        self.assertNoFullScans("post", "task/add/", {
+            "title": "fresh", "description": "Task",
+            "board_id": str(self.board.id), "user_id": str(self.user.id),
+        })
+        self.assertNoFullScans("post", "task/bulk-add/", {"tasks": [{
+            "title": f"bulk{i}", "description": "Task",
+            "board_id": str(self.board.id), "user_id": str(self.user.id),
+        } for i in range(5)]})
+        self.assertNoFullScans("put", "task/update-status/", {"id": str(self.tasks[0].id), "status": "IN_PROGRESS"})
+        self.assertNoFullScans("put", "task/bulk-update-status/", {
+            "board_id": str(self.board.id), "from_status": "IN_PROGRESS", "status": "COMPLETE",
+        })
+        self.assertNoFullScans("put", "task/bulk-update-status/", {
+            "ids": [str(t.id) for t in self.tasks[:5]], "status": "OPEN",
+        })
+
+    def test_detects_full_scan(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(Task.objects.filter(description="Task"))
+        self.assertTrue(self.full_scans(queries))
+
+
+class TaskSearchTests(PlannerTestCase):
+    def test_task_search(self):
+        response = self.assertNoFullScans("get", f"task/search/?q=task7&board_id={self.board.id}")
+        self.assertEqual([r["title"] for r in response.json()["results"]], ["task7"])
+        self.assertNoFullScans("get", f"task/search/?q=task&team_id={self.team.id}&status=OPEN&order=recent")
+
+        # Triggers keep the index in step with core_task
+        Task.objects.filter(id=self.tasks[7].id).update(title="renamed")
+        Task.objects.filter(id=self.tasks[8].id).delete()
+        for query, expected in [("task7", []), ("renamed", ["renamed"]), ("task8", [])]:
+            response, _ = self.request("get", f"task/search/?q={query}")
+            self.assertEqual([r["title"] for r in response.json()["results"]], expected)
+
+        # Keyset pages cover every match exactly once, in either order
+        for order in ("rank", "recent"):
+            seen, cursor = [], ""
+            while cursor is not None:
+                page = self.client.get(f"/api/task/search/?q=task&order={order}&limit=7&cursor={cursor}").json()
+                seen.extend(r["id"] for r in page["results"])
+                cursor = page["next_cursor"]
+            self.assertEqual(len(seen), len(set(seen)))
+            # Every description is "Task"
+            self.assertEqual(len(seen), Task.objects.count())
+
+
+class ArchiveTests(PlannerTestCase):
+    def test_archived_board(self):
+        self.assertNoFullScans("post", "board/close/", {"id": str(self.done_board.id)})
+        export = {"id": str(self.done_board.id), "format": "csv", "stream": True}
+        before = b"".join(self.client.post("/api/board/export/", export, content_type="application/json").streaming_content)
+
+        # Not old enough yet, then moved once and only once
+        self.assertFalse(archive.archivable_boards().exists())
+        self.assertEqual(archive.archive_board(self.done_board.id), 5)
+        self.assertIsNone(archive.archive_board(self.done_board.id))
+        self.assertFalse(Task.objects.filter(board=self.done_board).exists())
+        self.assertEqual(ArchivedTask.objects.filter(board=self.done_board).count(), 5)
+
+        # Exports read the archive transparently; search no longer sees the tasks
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/board/export/", export, content_type="application/json")
+            after = b"".join(response.streaming_content)
+        self.assertEqual(after, before)
+        self.assertIn("core_archivedtask", queries[-1]["sql"])
+        self.assertFalse(self.full_scans(queries))
+        response, _ = self.request("get", "task/search/?q=done0")
+        self.assertEqual(response.json()["results"], [])
+
+        services.recount_tasks([self.done_board.id])
+        self.done_board.refresh_from_db()
+        self.assertEqual(self.done_board.complete_tasks, 5)
+        # An archived board cannot be reopened from the admin
+        board_admin = admin.site._registry[Board]
+        self.assertIn("status", board_admin.get_readonly_fields(None, self.done_board))
+        self.assertNotIn("status", board_admin.get_readonly_fields(None, self.board))
+
+
+class ChangeFeedTests(PlannerTestCase):
+    def test_change_feed(self):
+        # The fixture tasks were bulk-inserted without counters
+        services.recount_tasks([self.board.id, self.done_board.id])
+        start = self.assertNoFullScans("get", "changes/").json()
+        self.assertEqual(start["events"], [])
+
+        self.client.post("/api/task/add/", {
+            "title": "fresh", "description": "Task",
+            "board_id": str(self.board.id), "user_id": str(self.user.id),
+        }, content_type="application/json")
+        self.client.put("/api/task/update-status/", {"id": str(self.tasks[0].id), "status": "COMPLETE"},
+                        content_type="application/json")
+        self.client.put("/api/task/bulk-update-status/", {"board_id": str(self.done_board.id), "status": "OPEN"},
+                        content_type="application/json")
+        self.client.post("/api/board/create/", {"name": "new", "description": "New", "team_id": str(self.team.id)},
+                         content_type="application/json")
+
+        for url in ["changes/", "async/changes/"]:
+            page = self.assertNoFullScans("get", f"{url}?since={start['next_cursor']}&team_id={self.team.id}").json()
+            self.assertEqual([e["kind"] for e in page["events"]],
+                             ["task_added", "task_status", "tasks_status", "board_created"])
+            self.assertEqual(page["events"][1]["data"], {"from": "OPEN", "to": "COMPLETE"})
+            self.assertEqual(page["events"][2]["data"], {"to": "OPEN", "moved": {"COMPLETE": 5}})
+
+        # Pages follow on from each other, and an empty page keeps the cursor
+        page = self.client.get(f"/api/changes/?since={start['next_cursor']}&limit=3").json()
+        self.assertTrue(page["has_more"])
+        page = self.assertNoFullScans("get", f"changes/?since={page['next_cursor']}&board_id={self.board.id}").json()
+        self.assertEqual(page["events"], [])
+        tail = page["next_cursor"]
+        waited = self.client.get(f"/api/changes/?since={tail}&board_id={self.board.id}&timeout=0.1").json()
+        self.assertEqual(waited["next_cursor"], tail)
+
+        # Compaction expires cursors from before the floor
+        self.assertEqual(changes.compact(timedelta(0)), 4)
+        self.assertEqual(self.client.get(f"/api/changes/?since={tail}").status_code, 410)
+        head = self.client.get("/api/changes/").json()["next_cursor"]
+        self.assertEqual(self.client.get(f"/api/changes/?since={head}").status_code, 200)
+
+
+class ExportBundleTests(PlannerTestCase):
+    def test_export_bundle(self):
+        boards = [self.board, self.done_board]
+        expected = {}
+        for board in boards:
+            expected[exports.export_filename(board, "ndjson")] = b"".join(exports.stream_board(board, "ndjson"))
+
+        for archive, request in [("zip", {"team_id": str(self.team.id)}),
+                                 ("tar", {"ids": [str(b.id) for b in reversed(boards)]})]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post("/api/board/export-bundle/", {
+                    **request, "format": "ndjson", "archive": archive,
+                }, content_type="application/json")
+                self.assertTrue(response.streaming)
+                data = io.BytesIO(b"".join(response.streaming_content))
+            self.assertFalse(self.full_scans(queries))
+
+            if archive == "zip":
+                with zipfile.ZipFile(data) as bundle:
+                    members = {name: bundle.read(name) for name in bundle.namelist()}
+                    names = bundle.namelist()
+            else:
+                with tarfile.open(fileobj=data) as bundle:
+                    members = {m.name: bundle.extractfile(m).read() for m in bundle.getmembers()}
+                    names = bundle.getnames()
+            self.assertEqual(members, expected)
+            # Boards come in creation order whichever way they were asked for
+            self.assertEqual(names, list(expected))
+
+        response, _ = self.request("post", "board/export-bundle/", {"ids": [str(self.user.id)]})
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(PlannerTestCase):
+    def test_conditional_get(self):
+        def fetch(method, url, data, etag):
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(
+                    f"/api/{url}", data or {}, content_type="application/json", HTTP_IF_NONE_MATCH=etag
+                )
+            return response, queries
+
+        team = {"id": str(self.team.id)}
+        writes = {
+            "user/list/?limit=5": lambda: self.client.post(
+                "/api/user/create/", {"name": "late", "display_name": "Late"}, content_type="application/json"
+            ),
+            "team/list/?limit=5": lambda: self.client.put("/api/team/update/", {"id": str(self.team.id), "team": {
+                "name": "renamed", "description": "Team", "admin": str(self.user.id),
+            }}, content_type="application/json"),
+            "board/list/": lambda: self.client.post("/api/task/add/", {
+                "title": "late", "description": "Task",
+                "board_id": str(self.board.id), "user_id": str(self.user.id),
+            }, content_type="application/json"),
+        }
+        for url, write in writes.items():
+            method, data = ("post", team) if url == "board/list/" else ("get", None)
+            etag = self.request(method, url, data)[0]["ETag"]
+
+            # A matching ETag costs one version lookup and touches no row data
+            response, queries = fetch(method, url, data, etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], etag)
+            self.assertEqual(len(queries), 1)
+            self.assertIn("core_changeversion", queries[0]["sql"])
+
+            write()
+            response, _ = fetch(method, url, data, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+
+class AsyncEndpointTests(PlannerTestCase):
+    def test_async_endpoints(self):
+        # Same payloads as the sync views, from the async ORM
+        for url in ["user/list/?limit=5", "team/list/?limit=5"]:
+            response = self.assertNoFullScans("get", f"async/{url}")
+            self.assertEqual(response.json(), self.client.get(f"/api/{url}").json())
+        for url, data in [
+            ("user/describe/", {"id": str(self.user.id)}),
+            ("team/describe/", {"id": str(self.team.id)}),
+            ("board/list/", {"id": str(self.team.id)}),
+        ]:
+            response = self.assertNoFullScans("post", f"async/{url}", data)
+            cache.clear()
+            sync, _ = self.request("post", url, data)
+            self.assertEqual(response.json(), sync.json())
+
+    def test_async_cache_and_etags(self):
+        def hits(kind):
+            return self.client.get("/api/cache/stats/").json().get(kind, {}).get("hits", 0)
+
+        # An entry loaded by the sync view is served to the async one
+        data = {"id": str(self.user.id)}
+        self.request("post", "user/describe/", data)
+        before = hits("user")
+        self.request("post", "async/user/describe/", data)
+        self.assertEqual(hits("user"), before + 1)
+
+        for method, url, data in [
+            ("get", "async/user/list/?limit=5", None),
+            ("post", "async/user/describe/", {"id": str(self.user.id)}),
+            ("post", "async/board/list/", {"id": str(self.team.id)}),
+        ]:
+            etag = self.request(method, url, data)[0]["ETag"]
+            response = getattr(self.client, method)(
+                f"/api/{url}", data or {}, content_type="application/json", HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 304)
+
+            self.client.put("/api/user/update/", {"id": str(self.user.id), "user": {"display_name": url}},
+                            content_type="application/json")
+            self.client.post("/api/user/create/", {"name": url, "display_name": "Late"},
+                             content_type="application/json")
+            self.client.post("/api/task/add/", {
+                "title": url, "description": "Task", "board_id": str(self.board.id), "user_id": str(self.user.id),
+            }, content_type="application/json")
+            response = getattr(self.client, method)(
+                f"/api/{url}", data or {}, content_type="application/json", HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+
+class CacheTests(PlannerTestCase):
+    def test_cache_stats(self):
+        self.assertNoFullScans("get", "cache/stats/")
+
+    def stats(self, kind):
+        return self.client.get("/api/cache/stats/").json().get(kind, {"hits": 0, "misses": 0})
+
+    def test_hits_and_misses(self):
+        data = {"id": str(self.team.id)}
+        before = self.stats("team")
+        for _ in range(3):
+            self.request("post", "team/describe/", data)
+        after = self.stats("team")
+        self.assertEqual((after["hits"] - before["hits"], after["misses"] - before["misses"]), (2, 1))
+
+        # A missing row is looked up every time and never cached
+        for _ in range(2):
+            response, _ = self.request("post", "team/describe/", {"id": str(self.user.id)})
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.stats("team")["misses"] - after["misses"], 2)
+
+    def test_entries_follow_writes(self):
+        user, team = {"id": str(self.user.id)}, {"id": str(self.team.id)}
+        services.recount_tasks([self.board.id])
+        for url, data in [("user/describe/", user), ("team/describe/", team), ("board/list/", team)]:
+            self.request("post", url, data)
+
+        self.client.put("/api/user/update/", {"id": str(self.user.id), "user": {"display_name": "Renamed"}},
+                        content_type="application/json")
+        self.client.put("/api/team/update/", {"id": str(self.team.id), "team": {
+            "name": "renamed", "description": "Team", "admin": str(self.user.id),
+        }}, content_type="application/json")
+        self.client.post("/api/task/add/", {
+            "title": "fresh", "description": "Task", "board_id": str(self.board.id), "user_id": str(self.user.id),
+        }, content_type="application/json")
+        # Closing writes with update(), which sends no signals
+        services.close_board(self.done_board.id)
+
+        before = self.stats("user")["misses"]
+        self.assertEqual(self.request("post", "user/describe/", user)[0].json()["description"], "Renamed")
+        self.assertEqual(self.stats("user")["misses"], before + 1)
+        self.assertEqual(self.request("post", "team/describe/", team)[0].json()["name"], "renamed")
+        listed = {board["name"]: board for board in self.request("post", "board/list/", team)[0].json()}
+        self.assertEqual(list(listed), ["board"])
+        self.assertEqual(listed["board"]["open_tasks"], 51)
+
+
+PROFILED_MIDDLEWARE = ["core.middleware.QueryTimingMiddleware"] + [
+    name for name in settings.MIDDLEWARE if name != "core.middleware.QueryTimingMiddleware"
+]
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", view;dur=-?[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$'
+)
+
+
+@override_settings(CORE_REQUEST_PROFILING=True, MIDDLEWARE=PROFILED_MIDDLEWARE)
+class RequestProfilingTests(PlannerTestCase):
+    def setUp(self):
+        super().setUp()
+        slow_requests.clear()
+        self.staff = get_user_model().objects.create_user("staff", is_staff=True)
+
+    def test_server_timing(self):
+        for method, url, data in [
+            ("get", "user/list/?limit=5", None),
+            ("post", "team/describe/", {"id": str(self.team.id)}),
+            ("get", "async/team/list/", None),
+        ]:
+            response, queries = self.request(method, url, data)
+            match = SERVER_TIMING.match(response["Server-Timing"])
+            self.assertTrue(match, response["Server-Timing"])
+            if not url.startswith("async/"):
+                self.assertEqual(int(match.group(1)), len(queries))
+
+    def test_slow_requests_are_staff_only(self):
+        self.request("get", "user/list/")
+        for method in ("get", "delete"):
+            self.assertEqual(getattr(self.client, method)("/api/debug/slow-requests/").status_code, 403)
+        self.assertTrue(slow_requests.entries())
+
+        self.client.force_login(self.staff)
+        response = self.assertNoFullScans("get", "debug/slow-requests/")
+        self.assertIn("/api/user/list/", [entry["path"] for entry in response.json()])
+        self.assertEqual(self.client.delete("/api/debug/slow-requests/").status_code, 200)
+        # Only the DELETE itself, logged after it cleared the log
+        entries = self.client.get("/api/debug/slow-requests/").json()
+        self.assertEqual([(entry["method"], entry["path"]) for entry in entries], [("DELETE", "/api/debug/slow-requests/")])
+
+    def test_log_keeps_the_slowest(self):
+        with mock.patch.object(slow_requests, "size", 3):
+            for _ in range(10):
+                self.request("get", "user/list/?limit=5")
+            entries = slow_requests.entries()
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries, sorted(entries, key=lambda entry: entry["total_ms"], reverse=True))
+
+
+class ProjectionTests(PlannerTestCase):
+    def test_projections_match_serializers(self):
+        renderer = JSONRenderer()
+        for serializer_class in [UserSerializer, TeamSerializer, TeamListSerializer, BoardSerializer, TaskSerializer]:
+            model = serializer_class.Meta.model
+            projection = Projection(serializer_class)
+            rows = projection.queryset(model.objects.order_by("creation_time", "id"))
+            self.assertEqual(
+                renderer.render(projection.render(rows)),
+                renderer.render(serializer_class(model.objects.order_by("creation_time", "id"), many=True).data),
+            )
+
+
+class BatchTests(PlannerTestCase):
+    def test_batch(self):
+        user = str(self.user.id)
+        response, _ = self.request("post", "batch/", {"operations": [
+            {"ref": "team", "path": "team/create/", "body": {"name": "batched", "description": "Batch", "admin": user}},
+            {"path": "team/add-users/", "body": {"id": "$team.id", "users": [str(self.users[1].id)]}},
+            {"ref": "board", "path": "board/create/", "body": {
+                "name": "batched", "description": "Batch", "team_id": "$0.id",
+            }},
+            {"path": "task/add/", "body": {
+                "title": "batched", "description": "Batch", "board_id": "$board.id", "user_id": user,
+            }},
+            {"method": "GET", "path": "task/search/", "body": {"q": "batched", "board_id": "$board.id"}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], [201, 200, 201, 201, 200])
+        team = Team.objects.get(name="batched")
+        self.assertEqual(results[0]["body"]["id"], str(team.id))
+        self.assertEqual(team.users.count(), 2)
+        self.assertEqual(results[4]["body"]["results"][0]["title"], "batched")
+
+        # A failing operation rolls back the ones before it and skips the rest
+        response, _ = self.request("post", "batch/", {"operations": [
+            {"path": "board/create/", "body": {"name": "rolled-back", "description": "Batch", "team_id": str(team.id)}},
+            {"path": "team/create/", "body": {"name": "batched", "description": "Batch", "admin": user}},
+            {"path": "task/add/", "body": {"title": "skipped"}},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r["status"] for r in response.json()["results"]], [201, 400, 424])
+        self.assertFalse(Board.objects.filter(name="rolled-back").exists())
+
+        for operations in [[], [{"path": "batch/", "body": {}}], [{"path": "task/add/", "body": {"id": "$9.id"}}]]:
+            response, _ = self.request("post", "batch/", {"operations": operations})
+            self.assertEqual(response.status_code, 400)
+
+    def test_export_is_not_batched(self):
+        # The export file is written outside the transaction, so a rollback could not undo it
+        response, _ = self.request("post", "batch/", {"operations": [
+            {"path": "task/add/", "body": {
+                "title": "rolled-back", "description": "Batch", "board_id": str(self.board.id), "user_id": str(self.user.id),
+            }},
+            {"path": "board/export/", "body": {"id": str(self.board.id)}},
+            {"path": "team/create/", "body": {"name": "team", "description": "Batch", "admin": str(self.user.id)}},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r["status"] for r in response.json()["results"]], [201, 400, 424])
+        self.assertFalse(Task.objects.filter(title="rolled-back").exists())
+        self.assertFalse(BoardExport.objects.exists())
+
+
+class BulkAddTasksTests(PlannerTestCase):
+    def test_per_item_errors(self):
+        closed = Board.objects.create(name="closed", description="Closed", team=self.team, status="CLOSED")
+        board, user = str(self.board.id), str(self.user.id)
+        response, _ = self.request("post", "task/bulk-add/", {"tasks": [
+            {"title": "new", "description": "Task", "board_id": board, "user_id": user},
+            {"title": "task0", "description": "Task", "board_id": board, "user_id": user},
+            {"title": "stranger", "description": "Task", "board_id": board, "user_id": str(self.board.id)},
+            {"title": "late", "description": "Task", "board_id": str(closed.id), "user_id": user},
+            {"title": 5, "description": "Task", "board_id": board, "user_id": user},
+            {"title": "new", "description": "Task", "board_id": board, "user_id": user},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (1, 5))
+        self.assertEqual([result["index"] for result in body["results"]], list(range(6)))
+        self.assertEqual(body["results"][0]["id"], str(Task.objects.get(board=self.board, title="new").id))
+        self.assertEqual([result.get("error") for result in body["results"][1:]], [
+            "Task title must be unique for this board",
+            "User not found",
+            "Cannot add task to a closed board",
+            "title and description must be strings",
+            "Task title must be unique for this board",
+        ])
+
+
+class BulkUpdateStatusTests(PlannerTestCase):
+    def setUp(self):
+        super().setUp()
+        Task.objects.filter(id__in=[task.id for task in self.tasks[:3]]).update(status="IN_PROGRESS")
+        # The fixture tasks were bulk-inserted without counters
+        services.recount_tasks([self.board.id])
+
+    def update(self, **data):
+        return self.client.put("/api/task/bulk-update-status/", {"board_id": str(self.board.id), **data},
+                               content_type="application/json")
+
+    def test_close_board(self):
+        response = self.update(status="COMPLETE", close_board=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"updated": 50, "board_closed": True})
+        board = Board.objects.get(id=self.board.id)
+        self.assertEqual((board.status, board.open_tasks, board.in_progress_tasks, board.complete_tasks),
+                         ("CLOSED", 0, 0, 50))
+        self.assertIsNotNone(board.end_time)
+        self.assertEqual(set(board.tasks.values_list("status", flat=True)), {"COMPLETE"})
+
+    def test_close_board_rolls_back_when_tasks_remain(self):
+        # Only the OPEN tasks move, so the IN_PROGRESS ones keep the board open
+        statuses = dict(Task.objects.values_list("id", "status"))
+        head = changes.last_id()
+        response = self.update(status="COMPLETE", from_status="OPEN", close_board=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Cannot close board until all tasks are COMPLETE"})
+        self.assertEqual(dict(Task.objects.values_list("id", "status")), statuses)
+        board = Board.objects.get(id=self.board.id)
+        self.assertEqual((board.status, board.open_tasks, board.in_progress_tasks, board.complete_tasks),
+                         ("OPEN", 47, 3, 0))
+        self.assertEqual(changes.last_id(), head)
+
+
+class AdmissionControlTests(PlannerTestCase):
+    def test_admission_control(self):
+        writes = admission["write"]
+        task = {"title": "admitted", "description": "Task", "board_id": str(self.board.id), "user_id": str(self.user.id)}
+        with mock.patch.object(writes, "limit", 0):
+            with mock.patch.object(writes, "queue", 0):
+                response, _ = self.request("post", "task/add/", task)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "2")
+            with mock.patch.object(writes, "wait", 0.01):
+                response = self.client.post("/api/task/add/", task, content_type="application/json")
+            self.assertEqual(response.status_code, 503)
+            # Reads have their own slots
+            response, _ = self.request("post", "team/describe/", {"id": str(self.team.id)})
+            self.assertEqual(response.status_code, 200)
+
+        response, _ = self.request("post", "task/add/", task)
+        self.assertEqual(response.status_code, 201)
+        # Streaming responses hand their slot back once the body has been sent
+        self.request("post", "board/export/", {"id": str(self.board.id), "stream": True})
+        stats = self.client.get("/api/admission/stats/").json()
+        self.assertEqual(stats["write"]["active"], 0)
+        self.assertEqual(stats["export"]["active"], 0)
+        self.assertGreaterEqual(stats["write"]["rejected_full"], 1)
+        self.assertGreaterEqual(stats["write"]["rejected_timeout"], 1)
+
+        # A queued request takes the slot freed by the one ahead of it
+        limiter = RouteLimiter(1, 1, 5)
+        self.assertIsNone(limiter.acquire())
+        outcome = []
+        waiter = threading.Thread(target=lambda: outcome.append(limiter.acquire()))
+        waiter.start()
+        while not limiter.stats()["queued"]:
+            time.sleep(0.001)
+        self.assertEqual(limiter.acquire(), 429)
+        limiter.release()
+        waiter.join()
+        self.assertEqual(outcome, [None])
+        self.assertEqual(limiter.stats()["active"], 1)
+
+
+class IncrementalExportTests(PlannerTestCase):
+    def test_incremental_export(self):
+        services.recount_tasks([self.board.id])
+        export = {"id": str(self.board.id), "format": "csv"}
+
+        def run(**extra):
+            response = self.assertNoFullScans("post", "board/export/", {**export, **extra})
+            with open(response.json()["out_file"], "rb") as f:
+                return response.json()["mode"], f.read()
+
+        def full():
+            path = os.path.join(out_dir, "full.csv")
+            exports.write_board(Board.objects.get(id=self.board.id), path, "csv")
+            with open(path, "rb") as f:
+                return f.read()
+
+        with tempfile.TemporaryDirectory() as out_dir, mock.patch.object(exports, "OUTPUT_DIR", out_dir):
+            self.assertEqual(run()[0], "rewritten")
+            self.assertEqual(run(), ("unchanged", full()))
+
+            self.client.post("/api/task/bulk-add/", {"tasks": [{
+                "title": f"late{i}", "description": "Task",
+                "board_id": str(self.board.id), "user_id": str(self.user.id),
+            } for i in range(3)]}, content_type="application/json")
+            self.assertEqual(run(), ("appended", full()))
+
+            self.client.put("/api/task/update-status/", {"id": str(self.tasks[0].id), "status": "COMPLETE"},
+                            content_type="application/json")
+            self.assertEqual(run(), ("rewritten", full()))
+            self.assertEqual(run(force=True)[0], "rewritten")
+            # Rewrites go through a temporary file that is renamed into place
+            self.assertEqual(sorted(os.listdir(out_dir)), sorted([exports.export_filename(self.board, "csv"), "full.csv"]))
+
+    def test_task_added_during_rewrite_is_written_once(self):
+        last_id = changes.last_id
+
+        def add_after_head():
+            # A task committed between reading the feed head and reading the tasks
+            head = last_id()
+            services.add_task("raced-task", "Task", self.board.id, self.user.id)
+            return head
+
+        with tempfile.TemporaryDirectory() as out_dir, mock.patch.object(exports, "OUTPUT_DIR", out_dir):
+            with mock.patch.object(changes, "last_id", side_effect=add_after_head):
+                path, mode = incremental.export(self.board, "csv")
+            self.assertEqual(mode, "rewritten")
+            self.assertEqual(incremental.export(self.board, "csv")[1], "unchanged")
+            with open(path) as f:
+                self.assertEqual(f.read().count("raced-task"), 1)
+
+
+class TaskCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(name="admin", display_name="Admin")
+        cls.member = User.objects.create(name="member", display_name="Member")
+        cls.team = Team.objects.create(name="counters", description="Team", admin=cls.admin)
+        cls.board = Board.objects.create(name="counters", description="Board", team=cls.team)
+
+    def assertCounters(self):
+        board = Board.objects.get(id=self.board.id)
+        counts = {status: Task.objects.filter(board=board, status=status).count() for status in services.COUNTER_FIELDS}
+        self.assertEqual({status: getattr(board, field) for status, field in services.COUNTER_FIELDS.items()}, counts)
+        return counts
+
+    def test_counters_follow_every_write(self):
+        tasks = [services.add_task(f"admin{i}", "Task", self.board.id, self.admin.id) for i in range(3)]
+        services.bulk_add_tasks([
+            {"title": f"member{i}", "description": "Task", "board_id": str(self.board.id), "user_id": str(self.member.id)}
+            for i in range(4)
+        ])
+        self.assertEqual(self.assertCounters(), {"OPEN": 7, "IN_PROGRESS": 0, "COMPLETE": 0})
+
+        services.update_task_status(tasks[0].id, "IN_PROGRESS")
+        services.update_task_status(tasks[1].id, "COMPLETE")
+        self.assertEqual(self.assertCounters(), {"OPEN": 5, "IN_PROGRESS": 1, "COMPLETE": 1})
+
+        services.bulk_update_task_status("COMPLETE", board_id=self.board.id, from_status="OPEN")
+        self.assertEqual(self.assertCounters(), {"OPEN": 0, "IN_PROGRESS": 1, "COMPLETE": 6})
+
+        # Deleting a user takes its tasks with it
+        services.add_task("late", "Task", self.board.id, self.member.id)
+        self.member.delete()
+        self.assertEqual(self.assertCounters(), {"OPEN": 0, "IN_PROGRESS": 1, "COMPLETE": 2})
+
+        services.update_task_status(tasks[0].id, "COMPLETE")
+        services.close_board(self.board.id)
+        self.assertEqual(Board.objects.get(id=self.board.id).status, "CLOSED")
+
+
+class TeamMembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([
+            User(name=f"member{i}", display_name=f"Member {i}") for i in range(MAX_TEAM_MEMBERS + 5)
+        ])
+        cls.team = Team.objects.create(name="members", description="Team", admin=cls.users[0])
+
+    def ids(self, users):
+        return [str(user.id) for user in users]
+
+    def assertMemberCount(self, expected):
+        team = Team.objects.get(id=self.team.id)
+        self.assertEqual((team.member_count, team.users.count()), (expected, expected))
+
+    def test_sync_users(self):
+        response = self.client.post("/api/team/sync-users/", {
+            "id": str(self.team.id), "users": self.ids(self.users[:10]),
+        }, content_type="application/json")
+        self.assertEqual(response.json(), {"added": 10, "removed": 0, "member_count": 10})
+
+        response = self.client.post("/api/team/sync-users/", {
+            "id": str(self.team.id), "users": self.ids(self.users[5:20]),
+        }, content_type="application/json")
+        self.assertEqual(response.json(), {"added": 10, "removed": 5, "member_count": 15})
+        self.assertMemberCount(15)
+
+        response = self.client.post("/api/team/sync-users/", {
+            "id": str(self.team.id), "users": self.ids(self.users[:MAX_TEAM_MEMBERS + 1]),
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertMemberCount(15)
+
+    def test_member_cap(self):
+        services.sync_team_members(self.team.id, self.ids(self.users[:MAX_TEAM_MEMBERS - 1]))
+        with self.assertRaises(services.ServiceError):
+            services.add_team_members(self.team.id, self.ids(self.users[MAX_TEAM_MEMBERS - 1:MAX_TEAM_MEMBERS + 1]))
+        self.assertMemberCount(MAX_TEAM_MEMBERS - 1)
+
+        services.add_team_members(self.team.id, self.ids(self.users[MAX_TEAM_MEMBERS - 1:MAX_TEAM_MEMBERS]))
+        self.assertMemberCount(MAX_TEAM_MEMBERS)
+        with self.assertRaises(services.ServiceError):
+            services.add_team_members(self.team.id, self.ids(self.users[MAX_TEAM_MEMBERS:MAX_TEAM_MEMBERS + 1]))
+
+        # A deleted member frees its place
+        self.users[1].delete()
+        self.assertMemberCount(MAX_TEAM_MEMBERS - 1)
+        services.add_team_members(self.team.id, self.ids(self.users[MAX_TEAM_MEMBERS:MAX_TEAM_MEMBERS + 1]))
+        self.assertMemberCount(MAX_TEAM_MEMBERS)
+
+    def test_member_count_follows_every_write(self):
+        services.add_team_members(self.team.id, self.ids(self.users[:6]))
+        self.assertMemberCount(6)
+        services.remove_team_members(self.team.id, self.ids(self.users[4:8]))
+        self.assertMemberCount(4)
+        # Written through the related manager, as the admin form does
+        self.team.users.add(*self.users[10:12])
+        self.assertMemberCount(6)
+        self.users[11].teams.remove(self.team)
+        self.assertMemberCount(5)
+        self.users[2].delete()
+        self.assertMemberCount(4)
+
+
+class ImporterTests(TestCase):
+    def write(self, tmp, records):
+        path = os.path.join(tmp, "planner.jsonl")
+        with open(path, "w") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        return path
+
+    def test_import_resumes(self):
+        records = [{"type": "user", "name": f"imported{i}", "display_name": "Imported"} for i in range(5)]
+        records += [
+            {"type": "team", "name": "imported", "description": "Imported", "admin": "imported0"},
+            {"type": "membership", "team": "imported", "user": "imported1"},
+            {"type": "board", "team": "imported", "name": "board", "description": "Imported"},
+        ]
+        records += [{
+            "type": "task", "team": "imported", "board": "board", "title": f"task{i}",
+            "description": "Imported", "user": f"imported{i % 5}", "status": "COMPLETE" if i % 3 else "OPEN",
+        } for i in range(30)]
+        records.append({"type": "task", "team": "imported", "board": "missing", "title": "x",
+                        "description": "Imported", "user": "imported0"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write(tmp, records)
+
+            # The third batch fails: the first two stay committed with their checkpoint
+            flush = importer.Importer.flush
+            calls = []
+
+            def failing_flush(self, *args, **kwargs):
+                calls.append(args)
+                if len(calls) == 3:
+                    raise RuntimeError("interrupted")
+                return flush(self, *args, **kwargs)
+
+            with mock.patch.object(importer.Importer, "flush", failing_flush), self.assertRaises(RuntimeError):
+                importer.Importer(batch_size=10).run(path)
+            self.assertEqual(ImportCheckpoint.objects.get().records, 20)
+            self.assertEqual(Task.objects.filter(board__name="board", board__team__name="imported").count(), 12)
+
+            rejected = []
+            counts = importer.Importer(batch_size=10, on_reject=lambda r, e: rejected.append(e)).run(path)
+            self.assertEqual((counts["tasks"], counts["rejected"]), (18, 1))
+            self.assertEqual(rejected, ["Board not found"])
+            self.assertIsNone(importer.Importer().run(path))
+
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertTrue(checkpoint.finished)
+        self.assertEqual(checkpoint.counts["tasks"], 30)
+        board = Board.objects.get(name="board", team__name="imported")
+        self.assertEqual((board.open_tasks, board.complete_tasks, board.tasks.count()), (10, 20, 30))
+        team = Team.objects.get(name="imported")
+        self.assertEqual((team.member_count, team.users.count()), (2, 2))
+
+    def test_board_state_is_checked(self):
+        user = User.objects.create(name="importer", display_name="Importer")
+        team = Team.objects.create(name="imported", description="Imported", admin=user)
+        Board.objects.create(name="archived", description="Imported", team=team, status="CLOSED",
+                             archived_time=timezone.now())
+        records = [{"type": "board", "team": "imported", "name": "closed", "description": "Imported",
+                    "status": "CLOSED"}]
+        records += [{
+            "type": "task", "team": "imported", "board": board, "title": f"{board}-{status}",
+            "description": "Imported", "user": "importer", "status": status,
+        } for board in ["closed", "archived"] for status in ["OPEN", "IN_PROGRESS", "COMPLETE"]]
+
+        rejected = []
+        with tempfile.TemporaryDirectory() as tmp:
+            counts = importer.Importer(on_reject=lambda r, e: rejected.append((r["title"], e))).run(
+                self.write(tmp, records)
+            )
+        self.assertEqual(counts["tasks"], 1)
+        self.assertEqual(sorted(rejected), [
+            ("archived-COMPLETE", "Board is archived"),
+            ("archived-IN_PROGRESS", "Board is archived"),
+            ("archived-OPEN", "Board is archived"),
+            ("closed-IN_PROGRESS", "Cannot add an unfinished task to a closed board"),
+            ("closed-OPEN", "Cannot add an unfinished task to a closed board"),
+        ])
+        self.assertEqual(list(Task.objects.values_list("title", flat=True)), ["closed-COMPLETE"])
+
+    def test_wrong_types_are_rejected(self):
+        records = [
+            {"type": "user", "name": 5, "display_name": "Imported"},
+            {"type": "user", "name": "importer", "display_name": "Imported"},
+            {"type": "team", "name": "imported", "description": "Imported", "admin": ["importer"]},
+            {"type": "team", "name": "team", "description": "Imported", "admin": "importer"},
+            {"type": "membership", "team": "team", "user": {"name": "importer"}},
+            {"type": "board", "team": "team", "name": 7, "description": "Imported"},
+            {"type": "board", "team": "team", "name": "board", "description": "Imported"},
+            {"type": "task", "team": "team", "board": "board", "title": 1, "description": "Imported",
+             "user": "importer"},
+            {"type": "task", "team": "team", "board": ["board"], "title": "task", "description": "Imported",
+             "user": "importer"},
+        ]
+        rejected = []
+        with tempfile.TemporaryDirectory() as tmp:
+            counts = importer.Importer(on_reject=lambda r, e: rejected.append(e)).run(self.write(tmp, records))
+        self.assertEqual((counts["users"], counts["teams"], counts["boards"], counts["tasks"]), (1, 1, 1, 0))
+        self.assertEqual(rejected, [
+            "name and display_name must be strings",
+            "admin: names must be strings",
+            "team/user: names must be strings",
+            "name and description must be strings",
+            "title and description must be strings",
+            "team/board/user: names must be strings",
+        ])
+
+
+class ExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(name="exporter", display_name="Exporter")
+        team = Team.objects.create(name="jobs", description="Team", admin=user)
+        cls.boards = [Board.objects.create(name=f"jobs{i}", description="Board", team=team) for i in range(3)]
+
+    def setUp(self):
+        job = ExportJob.objects.create()
+        self.items = ExportJobItem.objects.bulk_create([
+            ExportJobItem(job=job, board=board, status=status)
+            for board, status in zip(self.boards, ["PENDING", "RUNNING", "DONE"])
+        ])
+        self.job = job
+
+    def statuses(self):
+        return list(self.job.items.order_by("board__name").values_list("status", flat=True))
+
+    def test_requeue_leftovers(self):
+        with mock.patch.object(jobs, "_dispatch") as dispatch:
+            self.assertEqual(jobs.requeue_leftovers(), [self.items[0].id])
+            self.assertEqual(self.statuses(), ["PENDING", "RUNNING", "DONE"])
+            self.assertEqual(sorted(jobs.requeue_leftovers(running=True)), sorted([self.items[0].id, self.items[1].id]))
+            self.assertEqual(self.statuses(), ["PENDING", "PENDING", "DONE"])
+        dispatch.assert_called_with(mock.ANY)
+
+    def test_fail_leftovers(self):
+        call_command("requeue_exports", "--fail", "--running", stdout=io.StringIO())
+        self.assertEqual(self.statuses(), ["FAILED", "FAILED", "DONE"])
+        self.assertEqual(jobs.job_status(self.job.id)["status"], "FAILED")
+
+
+class SeedPlannerTests(TestCase):
+    def test_flush_skips_the_delete_signals(self):
+        options = ["--users", "30", "--teams", "3", "--members", "5", "--tasks", "200", "--flush"]
+        call_command("seed_planner", *options, stdout=io.StringIO())
+        with mock.patch.multiple(services, recount_tasks=mock.DEFAULT, recount_members=mock.DEFAULT) as recounts:
+            call_command("seed_planner", *options, stdout=io.StringIO())
+        recounts["recount_tasks"].assert_not_called()
+        recounts["recount_members"].assert_not_called()
+        self.assertEqual((User.objects.count(), Team.objects.count(), Task.objects.count()), (30, 3, 200))
+        self.assertEqual(Team.users.through.objects.count(), 15)
+
+
+class UserDashboardTests(TestCase):
+    def dashboard(self, user):
+        with self.assertNumQueries(4):
+            response = self.client.post("/api/user/dashboard/", {"id": str(user.id)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def make_user(self, name, teams, boards_per_team):
+        user = User.objects.create(name=name, display_name=name)
+        for i in range(teams):
+            team = Team.objects.create(name=f"{name}-team{i}", description="Team", admin=user)
+            team.users.add(user)
+            for j in range(boards_per_team):
+                board = Board.objects.create(name=f"board{j}", description="Board", team=team)
+                services.add_task(f"task{j}", "Task", board.id, user.id)
+        return user
+
+    def test_query_count_does_not_grow(self):
+        data = self.dashboard(self.make_user("small", teams=1, boards_per_team=1))
+        self.assertEqual((len(data["teams"]), len(data["teams"][0]["boards"]), len(data["tasks"])), (1, 1, 1))
+
+        data = self.dashboard(self.make_user("large", teams=10, boards_per_team=5))
+        self.assertEqual(len(data["teams"]), 10)
+        self.assertEqual(sum(len(team["boards"]) for team in data["teams"]), 50)
+        self.assertEqual(len(data["tasks"]), 50)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(name=f"page{i:02}", display_name="Page") for i in range(23)])
+        # Rows sharing a creation_time are ordered by id
+        User.objects.filter(id__in=[u.id for u in users[5:12]]).update(creation_time=users[5].creation_time)
+        Team.objects.bulk_create([
+            Team(name=f"page{i:02}", description="Page", admin=users[i]) for i in range(12)
+        ])
+        Team.objects.filter(name__in=["page03", "page04", "page05"]).update(creation_time=timezone.now())
+
+    def pages(self, url, limit):
+        names, cursor, query_counts = [], None, []
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {"limit": limit, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(queries))
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), limit)
+            names += [row["name"] for row in data["results"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return names, query_counts
+
+    def test_pages_cover_every_row_once(self):
+        for url, model in [("/api/user/list/", User), ("/api/team/list/", Team)]:
+            expected = list(model.objects.order_by("creation_time", "id").values_list("name", flat=True))
+            for limit in [1, 5, len(expected), 100]:
+                names, query_counts = self.pages(url, limit)
+                self.assertEqual(names, expected)
+                # Later pages cost the same as the first, however deep they go
+                self.assertEqual(set(query_counts), {query_counts[0]})
+
+    def test_bad_cursor_or_limit(self):
+        for url in ["/api/user/list/", "/api/team/list/"]:
+            for params in [{"cursor": "not-a-cursor"}, {"cursor": pack_cursor([1, 2, 3])},
+                           {"cursor": pack_cursor(["yesterday", "x"])},
+                           {"cursor": pack_cursor(["2024-01-01T00:00:00+00:00", 5])},
+                           {"cursor": pack_cursor([20240101, str(uuid.uuid4())])}, {"limit": "ten"}, {"limit": "0"}]:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400, (url, params))
+                self.assertIn("error", response.json())
+
+
+class SQLiteProfileTests(TestCase):
+    def pragmas(self, names):
+        # A fresh connection to a file, since an in-memory database has no journal to switch
+        with tempfile.TemporaryDirectory() as tmp:
+            settings_dict = {**connection.settings_dict, "NAME": os.path.join(tmp, "profile.sqlite3")}
+            fresh = type(connections["default"])(settings_dict, alias="default")
+            try:
+                with fresh.cursor() as cursor:
+                    return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+            finally:
+                fresh.close()
+
+    def test_new_connections_get_the_pragmas(self):
+        names = ["journal_mode", "synchronous", "busy_timeout", "temp_store"]
+        with override_settings(CORE_SQLITE_PRODUCTION=True):
+            # synchronous NORMAL is 1 and temp_store MEMORY is 2
+            self.assertEqual(self.pragmas(names), {
+                "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "temp_store": 2,
+            })
+        with override_settings(CORE_SQLITE_PRODUCTION=False):
+            self.assertEqual(self.pragmas(names)["journal_mode"], "delete")
+
+
+class BundlePoolTests(TransactionTestCase):
+    """
+    Bundles rendered on the process pool. Workers are separate processes, so
+    they read a file copy of the in-memory test database.
+    """
+
+    def setUp(self):
+        user = User.objects.create(name="bundler", display_name="Bundler")
+        self.team = Team.objects.create(name="bundles", description="Team", admin=user)
+        self.boards = [Board.objects.create(name=f"pool{i}", description="Board", team=self.team) for i in range(5)]
+        Task.objects.bulk_create([
+            Task(title=f"task{i}", description="Task", board=board, user=user)
+            for board in self.boards for i in range(20)
+        ])
+        bundles._pool = None
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        database = os.path.join(tmp.name, "pool.sqlite3")
+        with sqlite3.connect(database) as copy:
+            connection.connection.backup(copy)
+        # The pool hands the workers the name of the database it was started from
+        name = mock.patch.dict(connection.settings_dict, {"NAME": database})
+        name.start()
+        self.addCleanup(name.stop)
+
+    def tearDown(self):
+        if bundles._pool is not None:
+            bundles._pool.shutdown()
+            bundles._pool = None
+
+    @override_settings(EXPORT_PROCESSES=2)
+    def test_bundle_rendered_on_pool(self):
+        expected = {
+            exports.export_filename(board, "ndjson"): b"".join(exports.stream_board(board, "ndjson"))
+            for board in self.boards
+        }
+        # The request thread must not render any board itself
+        with mock.patch.object(bundles, "_render", side_effect=AssertionError("rendered inline")):
+            response = self.client.post("/api/board/export-bundle/", {
+                "team_id": str(self.team.id), "format": "ndjson",
+            }, content_type="application/json")
+            data = io.BytesIO(b"".join(response.streaming_content))
+        self.assertIsNotNone(bundles._pool)
+
+        with zipfile.ZipFile(data) as bundle:
+            self.assertEqual(bundle.namelist(), list(expected))
+            self.assertEqual({name: bundle.read(name) for name in bundle.namelist()}, expected)
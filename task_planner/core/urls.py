@@ -1,10 +1,13 @@
 from django.urls import path
+from . import async_views
 from .views import (
-    CreateUserView, ListUsersView, DescribeUserView, UpdateUserView, GetUserTeamsView,
+    CreateUserView, ListUsersView, DescribeUserView, UpdateUserView, GetUserTeamsView, UserDashboardView,
     CreateTeamView, ListTeamsView, DescribeTeamView, UpdateTeamView,
-    AddUsersToTeamView, RemoveUsersFromTeamView,
-    CreateBoardView, CloseBoardView, ListBoardsView, ExportBoardView,
-    AddTaskView, UpdateTaskStatusView,
+    AddUsersToTeamView, RemoveUsersFromTeamView, SyncTeamUsersView,
+    CreateBoardView, CloseBoardView, ListBoardsView, ExportBoardView, ExportBundleView,
+    SubmitExportJobView, ExportJobStatusView, CacheStatsView, AdmissionStatsView, SlowRequestsView,
+    AddTaskView, BulkAddTasksView, UpdateTaskStatusView, BulkUpdateTaskStatusView, SearchTasksView,
+    ChangesView, BatchView,
 
 
 )
@@ -15,6 +18,7 @@ urlpatterns = [
     path("user/describe/", DescribeUserView.as_view(), name="describe_user"),
     path("user/update/", UpdateUserView.as_view(), name="update_user"),
     path("user/teams/", GetUserTeamsView.as_view(), name="get_user_teams"),
+    path("user/dashboard/", UserDashboardView.as_view(), name="user_dashboard"),
 
     
     path('team/create/', CreateTeamView.as_view()),
@@ -24,12 +28,35 @@ urlpatterns = [
 
     path('team/add-users/', AddUsersToTeamView.as_view(), name='add-users-to-team'),
     path('team/remove-users/', RemoveUsersFromTeamView.as_view(), name='remove-users-from-team'),
+    path('team/sync-users/', SyncTeamUsersView.as_view(), name='sync-team-users'),
 
     path('board/create/', CreateBoardView.as_view()),
     path('board/close/', CloseBoardView.as_view()),
     path('board/list/', ListBoardsView.as_view()),
     path('board/export/', ExportBoardView.as_view()),
+    path('board/export-bundle/', ExportBundleView.as_view()),
+    path('board/export-async/', SubmitExportJobView.as_view()),
+    path('board/export-status/', ExportJobStatusView.as_view()),
 
     path('task/add/', AddTaskView.as_view()),
+    path('task/bulk-add/', BulkAddTasksView.as_view()),
     path('task/update-status/', UpdateTaskStatusView.as_view()),
+    path('task/bulk-update-status/', BulkUpdateTaskStatusView.as_view()),
+    path('task/search/', SearchTasksView.as_view()),
+
+    path('changes/', ChangesView.as_view()),
+
+    path('batch/', BatchView.as_view()),
+
+    # Async read paths for ASGI deployments; same payloads as the routes above
+    path('async/user/list/', async_views.list_users, name='async_list_users'),
+    path('async/user/describe/', async_views.describe_user, name='async_describe_user'),
+    path('async/team/list/', async_views.list_teams, name='async_list_teams'),
+    path('async/team/describe/', async_views.describe_team, name='async_describe_team'),
+    path('async/board/list/', async_views.list_boards, name='async_list_boards'),
+    path('async/changes/', async_views.list_changes, name='async_list_changes'),
+
+    path('cache/stats/', CacheStatsView.as_view()),
+    path('admission/stats/', AdmissionStatsView.as_view()),
+    path('debug/slow-requests/', SlowRequestsView.as_view()),
 ]
@@ -0,0 +1,80 @@
+"""
+Change versions behind the ETags of the list and describe endpoints.
+
+Each key has a counter in ChangeVersion: "user" and "team" for the list
+endpoints, "user:<id>", "team:<id>" and "team_boards:<team id>" for single
+objects. The service layer and the importer bump it in the same transaction
+as the write it describes. Model signals bump it right after save() or
+delete(), which is inside the write's transaction when there is one (the
+admin runs each change in one) and just after its commit otherwise. The describe cache stores its entries under these versions, and
+cache.invalidate() is what bumps the per-object keys. Reading versions is a
+primary-key lookup, so a matching If-None-Match is answered with 304 before
+any row data is loaded or serialized.
+"""
+import hashlib
+
+from django.db.models import F
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .lookups import batches
+from .models import ChangeVersion
+
+
+def bump(keys):
+    keys = list(dict.fromkeys(str(key) for key in keys))
+    for batch in batches(keys):
+        updated = ChangeVersion.objects.filter(key__in=batch).update(version=F("version") + 1)
+        if updated < len(batch):
+            # First write for some keys; rows that already exist were bumped above
+            ChangeVersion.objects.bulk_create(
+                [ChangeVersion(key=key, version=1) for key in batch], ignore_conflicts=True
+            )
+
+
+def current(keys):
+    """Return {key: version} for ``keys``; keys never written are at version 0."""
+    found = dict(ChangeVersion.objects.filter(key__in=keys).values_list("key", "version"))
+    return {key: found.get(key, 0) for key in keys}
+
+
+async def acurrent(keys):
+    """Async version of current(), for the views in async_views.py."""
+    rows = ChangeVersion.objects.filter(key__in=keys).values_list("key", "version")
+    found = {key: version async for key, version in rows}
+    return {key: found.get(key, 0) for key in keys}
+
+
+class Conditional:
+    """
+    The ETag of one request, derived from the versions of ``keys`` and any
+    request ``parts`` (cursor, limit, ...) that select what is returned.
+
+    Versions are read before the data, so a write landing in between makes
+    the next request miss rather than pinning stale data to a new ETag.
+    """
+
+    def __init__(self, request, keys, *parts, versions=None):
+        self.request = request
+        self.versions = current(keys) if versions is None else versions
+        raw = repr([request.path, sorted(self.versions.items()), [str(part) for part in parts]])
+        self.etag = f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+    @classmethod
+    async def aread(cls, request, keys, *parts):
+        """Build the Conditional of an async view, reading the versions with the async ORM."""
+        return cls(request, keys, *parts, versions=await acurrent(keys))
+
+    def not_modified(self):
+        """A 304 response if the client already holds this ETag, else None."""
+        header = self.request.META.get("HTTP_IF_NONE_MATCH")
+        if header and (self.etag in parse_etags(header) or header.strip() == "*"):
+            response = HttpResponseNotModified()
+            response["ETag"] = self.etag
+            return response
+        return None
+
+    def tag(self, response):
+        if response.status_code == 200:
+            response["ETag"] = self.etag
+        return response
@@ -1,53 +1,82 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import User, Team, Board, Task
-from .serializers import UserSerializer
-import json
+from rest_framework.permissions import IsAdminUser
+from .models import User, Team, Board, Task, ExportJob
+from .serializers import USER_LIST_PROJECTION, TEAM_LIST_PROJECTION
+from .pagination import keyset_page, InvalidCursor
+from .exports import EXPORT_FORMATS, bundle_response, export_filename, stream_board
+from .jobs import job_status
+from .bundles import ARCHIVE_FORMATS
+from . import services
+from .services import ServiceError, parse_uuid
+from . import batch, cache, changes
+from .batch import BatchError
+from .versions import Conditional
+from .middleware import admission_stats, slow_requests
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
 
 class CreateUserView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
-            name = data.get("name")
-            display_name = data.get("display_name")
-
-            if not name or not display_name:
-                return Response({"error": "Both name and display_name are required"}, status=400)
-
-            if len(name) > 64 or len(display_name) > 64:
-                return Response({"error": "Max length for name/display_name is 64 characters"}, status=400)
-
-            if User.objects.filter(name=name).exists():
-                return Response({"error": "User with this name already exists"}, status=400)
-
-            user = User.objects.create(name=name, display_name=display_name)
+            data = request.data
+            user = services.create_user(data.get("name"), data.get("display_name"))
             return Response({"id": str(user.id)}, status=201)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
 class ListUsersView(APIView):
     def get(self, request):
-        users = User.objects.all()
-        serialized = UserSerializer(users, many=True)
-        return Response(serialized.data, status=200)
+        conditional = Conditional(
+            request, ["user"], request.query_params.get("cursor"), request.query_params.get("limit")
+        )
+        not_modified = conditional.not_modified()
+        if not_modified:
+            return not_modified
+
+        try:
+            users, next_cursor = keyset_page(
+                USER_LIST_PROJECTION.queryset(User.objects.all()),
+                cursor=request.query_params.get("cursor"),
+                limit=request.query_params.get("limit"),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+
+        results = USER_LIST_PROJECTION.render(users)
+        return conditional.tag(Response({"results": results, "next_cursor": next_cursor}, status=200))
 
 
 class DescribeUserView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
-            user_id = data.get("id")
-            user = User.objects.get(id=user_id)
-            return Response({
-                "name": user.name,
-                "description": user.display_name,
-                "creation_time": user.creation_time
-            })
+            data = request.data
+            user_id = parse_uuid(data.get("id"))
+            if user_id is None:
+                raise User.DoesNotExist
+
+            key = cache.make_key("user", user_id)
+            conditional = Conditional(request, [key])
+            not_modified = conditional.not_modified()
+            if not_modified:
+                return not_modified
+
+            def load():
+                user = User.objects.get(id=user_id)
+                return {
+                    "name": user.name,
+                    "description": user.display_name,
+                    "creation_time": user.creation_time
+                }
+
+            data = cache.get_or_load("user", user_id, load, version=conditional.versions[key])
+            return conditional.tag(Response(data))
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
@@ -55,7 +84,7 @@ class DescribeUserView(APIView):
 class UpdateUserView(APIView):
     def put(self, request):
         try:
-            data = json.loads(request.body)
+            data = request.data
             user_id = data.get("id")
             update_data = data.get("user", {})
             display_name = update_data.get("display_name")
@@ -79,7 +108,7 @@ class UpdateUserView(APIView):
 class GetUserTeamsView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
+            data = request.data
             user_id = data.get("id")
             user = User.objects.get(id=user_id)
             teams = user.teams.all()
@@ -94,64 +123,129 @@ class GetUserTeamsView(APIView):
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
-class CreateTeamView(APIView):
+class UserDashboardView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
-            name = data.get("name")
-            description = data.get("description")
-            admin_id = data.get("admin")
-
-            if not all([name, description, admin_id]):
-                return Response({"error": "Missing fields"}, status=400)
-
-            if Team.objects.filter(name=name).exists():
-                return Response({"error": "Team with this name already exists"}, status=400)
+            user_id = parse_uuid(request.data.get("id"))
+            if user_id is None:
+                raise User.DoesNotExist
+
+            # Four queries in all: the user, their teams, the teams' open
+            # boards and the user's tasks on open boards
+            user = User.objects.prefetch_related(
+                Prefetch(
+                    "teams",
+                    queryset=Team.objects.order_by("name").prefetch_related(
+                        Prefetch("boards", queryset=Board.objects.filter(status="OPEN").order_by("name"),
+                                 to_attr="open_boards")
+                    ),
+                    to_attr="dashboard_teams",
+                ),
+                Prefetch(
+                    "tasks",
+                    queryset=Task.objects.filter(board__status="OPEN").order_by("creation_time", "id"),
+                    to_attr="dashboard_tasks",
+                ),
+            ).get(id=user_id)
 
-            if len(name) > 64 or len(description) > 128:
-                return Response({"error": "Invalid field length"}, status=400)
-
-            admin = User.objects.get(id=admin_id)
-            team = Team.objects.create(name=name, description=description, admin=admin)
-            team.users.add(admin)  # Add admin to team by default
+            return Response({
+                "user": {
+                    "id": str(user.id),
+                    "name": user.name,
+                    "display_name": user.display_name,
+                },
+                "teams": [{
+                    "id": str(team.id),
+                    "name": team.name,
+                    "description": team.description,
+                    "creation_time": team.creation_time,
+                    "admin": str(team.admin_id),
+                    "boards": [{
+                        "id": str(board.id),
+                        "name": board.name,
+                        "open_tasks": board.open_tasks,
+                        "in_progress_tasks": board.in_progress_tasks,
+                        "complete_tasks": board.complete_tasks,
+                    } for board in team.open_boards],
+                } for team in user.dashboard_teams],
+                "tasks": [{
+                    "id": str(task.id),
+                    "title": task.title,
+                    "description": task.description,
+                    "status": task.status,
+                    "board": str(task.board_id),
+                    "creation_time": task.creation_time,
+                } for task in user.dashboard_tasks],
+            }, status=200)
+        except User.DoesNotExist:
+            return Response({"error": "User not found"}, status=404)
 
+class CreateTeamView(APIView):
+    def post(self, request):
+        try:
+            data = request.data
+            # Admin is added to the team by default
+            team = services.create_team(data.get("name"), data.get("description"), data.get("admin"))
             return Response({"id": str(team.id)}, status=201)
-        except User.DoesNotExist:
-            return Response({"error": "Admin user not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 class ListTeamsView(APIView):
     def get(self, request):
-        teams = Team.objects.all()
-        result = [{
-            "name": team.name,
-            "description": team.description,
-            "creation_time": team.creation_time,
-            "admin": str(team.admin.id)
-        } for team in teams]
-        return Response(result, status=200)
+        conditional = Conditional(
+            request, ["team"], request.query_params.get("cursor"), request.query_params.get("limit")
+        )
+        not_modified = conditional.not_modified()
+        if not_modified:
+            return not_modified
+
+        try:
+            teams, next_cursor = keyset_page(
+                TEAM_LIST_PROJECTION.queryset(Team.objects.all()),
+                cursor=request.query_params.get("cursor"),
+                limit=request.query_params.get("limit"),
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
+
+        # admin_id is read off the row itself, no per-team lookup of the admin
+        result = TEAM_LIST_PROJECTION.render(teams)
+        return conditional.tag(Response({"results": result, "next_cursor": next_cursor}, status=200))
 
 class DescribeTeamView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
-            team_id = data.get("id")
-            team = Team.objects.get(id=team_id)
-
-            return Response({
-                "name": team.name,
-                "description": team.description,
-                "creation_time": team.creation_time,
-                "admin": str(team.admin.id)
-            }, status=200)
+            data = request.data
+            team_id = parse_uuid(data.get("id"))
+            if team_id is None:
+                raise Team.DoesNotExist
+
+            key = cache.make_key("team", team_id)
+            conditional = Conditional(request, [key])
+            not_modified = conditional.not_modified()
+            if not_modified:
+                return not_modified
+
+            def load():
+                team = Team.objects.get(id=team_id)
+                return {
+                    "name": team.name,
+                    "description": team.description,
+                    "creation_time": team.creation_time,
+                    "admin": str(team.admin_id)
+                }
+
+            data = cache.get_or_load("team", team_id, load, version=conditional.versions[key])
+            return conditional.tag(Response(data, status=200))
         except Team.DoesNotExist:
             return Response({"error": "Team not found"}, status=404)
 
 class UpdateTeamView(APIView):
     def put(self, request):
         try:
-            data = json.loads(request.body)
+            data = request.data
             team_id = data.get("id")
             update_data = data.get("team")
 
@@ -180,7 +274,7 @@ class UpdateTeamView(APIView):
 class AddUsersToTeamView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
+            data = request.data
             team_id = data.get("id")
             user_ids = data.get("users", [])
 
@@ -190,22 +284,16 @@ class AddUsersToTeamView(APIView):
             if len(user_ids) > 50:
                 return Response({"error": "Cannot add more than 50 users at once"}, status=400)
 
-            team = Team.objects.get(id=team_id)
-            users_to_add = User.objects.filter(id__in=user_ids)
-
-            if users_to_add.count() != len(user_ids):
-                return Response({"error": "One or more user IDs are invalid"}, status=400)
-
-            team.users.add(*users_to_add)
+            services.add_team_members(team_id, user_ids)
             return Response({"message": "Users added"}, status=200)
-        except Team.DoesNotExist:
-            return Response({"error": "Team not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 class RemoveUsersFromTeamView(APIView):
     def post(self, request):
         try:
-            data = json.loads(request.body)
+            data = request.data
             team_id = data.get("id")
             user_ids = data.get("users", [])
 
@@ -215,153 +303,303 @@ class RemoveUsersFromTeamView(APIView):
             if len(user_ids) > 50:
                 return Response({"error": "Cannot remove more than 50 users at once"}, status=400)
 
-            team = Team.objects.get(id=team_id)
-            users_to_remove = User.objects.filter(id__in=user_ids)
-
-            team.users.remove(*users_to_remove)
+            services.remove_team_members(team_id, user_ids)
             return Response({"message": "Users removed"}, status=200)
-        except Team.DoesNotExist:
-            return Response({"error": "Team not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
         
         #   CHANGES MADE BY ZAID
-class CreateBoardView(APIView):
+class SyncTeamUsersView(APIView):
     def post(self, request):
         try:
             data = request.data
-            name = data.get("name")
-            description = data.get("description")
-            team_id = data.get("team_id")
-
-            if not all([name, description, team_id]):
-                return Response({"error": "Missing fields"}, status=400)
+            team_id = data.get("id")
+            user_ids = data.get("users")
 
-            if len(name) > 64 or len(description) > 128:
-                return Response({"error": "Invalid field length"}, status=400)
+            if not team_id or not isinstance(user_ids, list):
+                return Response({"error": "Team ID and users list are required"}, status=400)
 
-            team = Team.objects.get(id=team_id)
+            result = services.sync_team_members(team_id, user_ids)
+            return Response(result, status=200)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
-            if Board.objects.filter(team=team, name=name).exists():
-                return Response({"error": "Board name must be unique per team"}, status=400)
 
-            board = Board.objects.create(name=name, description=description, team=team)
+class CreateBoardView(APIView):
+    def post(self, request):
+        try:
+            data = request.data
+            board = services.create_board(data.get("name"), data.get("description"), data.get("team_id"))
             return Response({"id": str(board.id)}, status=201)
 
-        except Team.DoesNotExist:
-            return Response({"error": "Team not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 class CloseBoardView(APIView):
     def post(self, request):
         try:
-            board_id = request.data.get("id")
-            board = Board.objects.get(id=board_id)
-
-            if board.tasks.exclude(status='COMPLETE').exists():
-                return Response({"error": "Cannot close board until all tasks are COMPLETE"}, status=400)
-
-            board.status = 'CLOSED'
-            board.end_time = timezone.now()
-            board.save()
-
+            services.close_board(request.data.get("id"))
             return Response({"message": "Board closed successfully"}, status=200)
 
-        except Board.DoesNotExist:
-            return Response({"error": "Board not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
         
 class AddTaskView(APIView):
     def post(self, request):
         try:
             data = request.data
-            title = data.get("title")
-            description = data.get("description")
-            board_id = data.get("board_id")
-            user_id = data.get("user_id")
-
-            if not all([title, description, board_id, user_id]):
-                return Response({"error": "Missing fields"}, status=400)
+            task = services.add_task(
+                data.get("title"), data.get("description"), data.get("board_id"), data.get("user_id")
+            )
+            return Response({"id": str(task.id)}, status=201)
 
-            if len(title) > 64 or len(description) > 128:
-                return Response({"error": "Invalid field length"}, status=400)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
-            board = Board.objects.get(id=board_id)
-            if board.status != "OPEN":
-                return Response({"error": "Cannot add task to a closed board"}, status=400)
+class BulkAddTasksView(APIView):
+    def post(self, request):
+        try:
+            tasks = request.data.get("tasks")
 
-            if Task.objects.filter(board=board, title=title).exists():
-                return Response({"error": "Task title must be unique for this board"}, status=400)
+            if not isinstance(tasks, list) or not tasks:
+                return Response({"error": "A non-empty tasks list is required"}, status=400)
 
-            user = User.objects.get(id=user_id)
+            if not all(isinstance(task, dict) for task in tasks):
+                return Response({"error": "Each task must be an object"}, status=400)
 
-            task = Task.objects.create(
-                title=title, description=description, board=board, user=user
-            )
-            return Response({"id": str(task.id)}, status=201)
+            results = services.bulk_add_tasks(tasks)
+            created = sum(1 for result in results if "id" in result)
+            return Response({
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            }, status=200)
 
-        except Board.DoesNotExist:
-            return Response({"error": "Board not found"}, status=404)
-        except User.DoesNotExist:
-            return Response({"error": "User not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
 class UpdateTaskStatusView(APIView):
     def put(self, request):
         try:
-            task_id = request.data.get("id")
-            new_status = request.data.get("status")
+            # Single UPDATE on the status column instead of load-and-save
+            services.update_task_status(request.data.get("id"), request.data.get("status"))
+            return Response({"message": "Task status updated"}, status=200)
 
-            if new_status not in ["OPEN", "IN_PROGRESS", "COMPLETE"]:
-                return Response({"error": "Invalid status"}, status=400)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
-            task = Task.objects.get(id=task_id)
-            task.status = new_status
-            task.save()
 
-            return Response({"message": "Task status updated"}, status=200)
+class BulkUpdateTaskStatusView(APIView):
+    def put(self, request):
+        try:
+            data = request.data
+            result = services.bulk_update_task_status(
+                data.get("status"),
+                task_ids=data.get("ids"),
+                board_id=data.get("board_id"),
+                from_status=data.get("from_status"),
+                close=bool(data.get("close_board")),
+            )
+            return Response(result, status=200)
 
-        except Task.DoesNotExist:
-            return Response({"error": "Task not found"}, status=404)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
-class ListBoardsView(APIView):
-    def post(self, request):
+
+class SearchTasksView(APIView):
+    def get(self, request):
         try:
-            team_id = request.data.get("id")
-            team = Team.objects.get(id=team_id)
+            params = request.query_params
+            tasks, next_cursor = services.search_tasks(
+                params.get("q"),
+                board_id=params.get("board_id"),
+                team_id=params.get("team_id"),
+                status=params.get("status"),
+                order=params.get("order", "rank"),
+                cursor=params.get("cursor"),
+                limit=params.get("limit"),
+            )
+            results = [{
+                "id": str(task.id),
+                "title": task.title,
+                "description": task.description,
+                "status": task.status,
+                "board_id": str(task.board_id),
+                "user_id": str(task.user_id),
+                "creation_time": task.creation_time,
+            } for task in tasks]
+            return Response({"results": results, "next_cursor": next_cursor}, status=200)
+
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
+
+class ChangesView(APIView):
+    def get(self, request):
+        try:
+            params = request.query_params
+            events, next_cursor, has_more = services.read_changes(
+                since=params.get("since"),
+                team_id=params.get("team_id"),
+                board_id=params.get("board_id"),
+                limit=params.get("limit"),
+                timeout=params.get("timeout", 0),
+            )
+            return Response({
+                "events": [changes.as_dict(event) for event in events],
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            }, status=200)
 
-            boards = team.boards.filter(status='OPEN')
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
-            result = [{"id": str(board.id), "name": board.name} for board in boards]
-            return Response(result, status=200)
+class ListBoardsView(APIView):
+    def post(self, request):
+        try:
+            team_id = parse_uuid(request.data.get("id"))
+            if team_id is None:
+                raise Team.DoesNotExist
+
+            key = cache.make_key("team_boards", team_id)
+            conditional = Conditional(request, [key])
+            not_modified = conditional.not_modified()
+            if not_modified:
+                return not_modified
+
+            def load():
+                team = Team.objects.get(id=team_id)
+                boards = team.boards.filter(status='OPEN')
+                # Progress comes from the board's counters, not from counting tasks
+                return [{
+                    "id": str(board.id),
+                    "name": board.name,
+                    "open_tasks": board.open_tasks,
+                    "in_progress_tasks": board.in_progress_tasks,
+                    "complete_tasks": board.complete_tasks,
+                } for board in boards]
+
+            data = cache.get_or_load("team_boards", team_id, load, version=conditional.versions[key])
+            return conditional.tag(Response(data, status=200))
 
         except Team.DoesNotExist:
             return Response({"error": "Team not found"}, status=404)
 
-import os
-
 class ExportBoardView(APIView):
     def post(self, request):
         try:
-            board_id = request.data.get("id")
-            board = Board.objects.get(id=board_id)
+            board_id = parse_uuid(request.data.get("id"))
+            fmt = request.data.get("format", "text")
+            stream = request.data.get("stream", False)
 
-            filename = f"{board.name.replace(' ', '_')}_{board.id}.txt"
-            output_dir = "out"
-            os.makedirs(output_dir, exist_ok=True)
-            file_path = os.path.join(output_dir, filename)
+            if fmt not in EXPORT_FORMATS:
+                return Response({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
 
-            with open(file_path, 'w') as f:
-                f.write(f"Board: {board.name}\n")
-                f.write(f"Description: {board.description}\n")
-                f.write(f"Status: {board.status}\n")
-                f.write(f"Created: {board.creation_time}\n")
-                f.write(f"Ended: {board.end_time}\n\n")
+            if stream:
+                if board_id is None:
+                    raise Board.DoesNotExist
+                board = Board.objects.get(id=board_id)
+                return self.stream(board, fmt, gzip=request.data.get("gzip", False))
 
-                f.write("Tasks:\n")
-                for task in board.tasks.all():
-                    f.write(f"- [{task.status}] {task.title} (Assigned to: {task.user.name})\n")
+            file_path, mode = services.export_board(board_id, fmt, force=request.data.get("force", False))
+            return Response({"out_file": file_path, "mode": mode}, status=200)
 
-            return Response({"out_file": file_path}, status=200)
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
 
         except Board.DoesNotExist:
             return Response({"error": "Board not found"}, status=404)
 
+    def stream(self, board, fmt, gzip=False):
+        content_type = EXPORT_FORMATS[fmt][0]
+        response = StreamingHttpResponse(stream_board(board, fmt, gzip=gzip), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{export_filename(board, fmt)}"'
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+
+class ExportBundleView(APIView):
+    def post(self, request):
+        try:
+            fmt = request.data.get("format", "text")
+            archive = request.data.get("archive", "zip")
+
+            if fmt not in EXPORT_FORMATS:
+                return Response({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+            if archive not in ARCHIVE_FORMATS:
+                return Response({"error": f"Archive must be one of {', '.join(ARCHIVE_FORMATS)}"}, status=400)
+
+            board_ids, name = services.bundle_boards(request.data.get("team_id"), request.data.get("ids"))
+            return bundle_response(board_ids, name, fmt, archive)
+
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
+
+
+class SubmitExportJobView(APIView):
+    def post(self, request):
+        try:
+            board_ids = request.data.get("ids") or ([request.data["id"]] if request.data.get("id") else [])
+            fmt = request.data.get("format", "text")
+
+            if not board_ids:
+                return Response({"error": "Board ID or list of board IDs is required"}, status=400)
+
+            if fmt not in EXPORT_FORMATS:
+                return Response({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+            job = services.queue_export(board_ids, fmt)
+            return Response({"job_id": str(job.id)}, status=202)
+
+        except ServiceError as e:
+            return Response({"error": e.message}, status=e.status)
+
+
+class SlowRequestsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(slow_requests.entries(), status=200)
+
+    def delete(self, request):
+        slow_requests.clear()
+        return Response({"message": "Slow request log cleared"}, status=200)
+
+
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response(cache.stats(), status=200)
+
+
+class AdmissionStatsView(APIView):
+    def get(self, request):
+        return Response(admission_stats(), status=200)
+
+
+class ExportJobStatusView(APIView):
+    def post(self, request):
+        try:
+            return Response(job_status(request.data.get("id")), status=200)
+        except (ExportJob.DoesNotExist, ValidationError):
+            return Response({"error": "Export job not found"}, status=404)
+
+
+class BatchView(APIView):
+    def post(self, request):
+        operations = request.data.get("operations") if isinstance(request.data, dict) else None
+        # Operation paths are resolved relative to where the API is mounted
+        prefix = request.path[:-len("batch/")]
+        try:
+            results, failed = batch.run(request, operations, prefix)
+        except BatchError as e:
+            return Response({"error": e.message}, status=e.status)
+
+        if failed is None:
+            return Response({"results": results}, status=200)
+        return Response({
+            "error": f"Operation {failed} failed; no changes were applied",
+            "results": results,
+        }, status=results[failed]["status"])
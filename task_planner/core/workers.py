@@ -0,0 +1,16 @@
+"""
+Start-up of the spawned processes that render bundle members.
+
+Kept free of model imports: the pool unpickles the initializer, importing
+its module, before Django is set up in the worker.
+"""
+import django
+from django.conf import settings
+
+
+def setup(database):
+    """Set Django up on the database of the process that started the pool."""
+    # Spawned workers load the settings afresh, and under the test runner the
+    # parent's database is not the one named in them
+    settings.DATABASES["default"]["NAME"] = database
+    django.setup()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -80,6 +81,32 @@ DATABASES = {
     }
 }
 
+# SQLite production profile
+# core/signals.py applies CORE_SQLITE_PRAGMAS to every new connection: WAL lets
+# reads run alongside a write, and busy_timeout waits for the write lock
+# instead of failing with "database is locked". Transactions take the write
+# lock up front (BEGIN IMMEDIATE), since SQLite cannot wait on a read lock
+# that needs upgrading, and connections are reused across requests.
+# Off by default; set CORE_SQLITE_PRODUCTION=1 in the environment of a
+# deployment to turn it on. WAL stays set in the database file afterwards.
+
+CORE_SQLITE_PRODUCTION = os.environ.get('CORE_SQLITE_PRODUCTION', '0').lower() in ('1', 'true', 'yes', 'on')
+CORE_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64 * 1024,  # negative means KiB
+    'temp_store': 'MEMORY',
+}
+
+if CORE_SQLITE_PRODUCTION:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,3 +148,81 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Background exports
+# Number of threads in the pool that runs board/export-async/ jobs
+
+EXPORT_WORKERS = 4
+
+# Processes that render the boards of a board/export-bundle/ archive in
+# parallel. Rendering is CPU-bound Python, so threads would share one core.
+# With fewer than 2, every board is rendered in the request thread.
+
+EXPORT_PROCESSES = min(4, os.cpu_count() or 1)
+
+
+# Archive
+# `manage.py archive_boards` moves the tasks of boards closed for longer than
+# this many days from core_task to core_archivedtask (see core/archive.py).
+
+CORE_ARCHIVE_AFTER_DAYS = 30
+
+
+# Change feed
+# api/changes/ serves the ChangeEvent log; `manage.py compact_changes` deletes
+# events older than this many hours (see core/changes.py).
+
+CORE_CHANGE_RETENTION_HOURS = 72
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Describe/list responses are cached in CORE_CACHE_ALIAS. Swap the backend for
+# 'django.core.cache.backends.filebased.FileBasedCache' with
+# LOCATION = BASE_DIR / 'cache' to share entries between processes, and bump
+# VERSION to discard every cached entry after a payload change.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-planner',
+        'KEY_PREFIX': 'core',
+        'VERSION': 1,
+    }
+}
+
+CORE_CACHE_ALIAS = 'default'
+CORE_CACHE_TIMEOUT = 300
+
+
+# Admission control
+# AdmissionControlMiddleware caps the requests of each route class that run at
+# once in this process (see core/middleware.py). Up to `queue` more wait in
+# line for at most `wait` seconds; past that they get 503, and with the queue
+# full they get 429 at once, both with a Retry-After header. SQLite has one
+# writer at a time, so writes get few slots. Counters are at api/admission/stats/.
+
+CORE_ADMISSION_CONTROL = True
+CORE_ADMISSION_LIMITS = {
+    # route class: (running, queued, seconds a queued request waits)
+    'write': (2, 32, 2.0),
+    'export': (2, 4, 1.0),
+    'poll': (32, 0, 0),
+    'read': (16, 64, 1.0),
+}
+
+if CORE_ADMISSION_CONTROL:
+    MIDDLEWARE.insert(0, 'core.middleware.AdmissionControlMiddleware')
+
+
+# Request profiling
+# QueryTimingMiddleware adds a Server-Timing header (db/view/render/total) to
+# every response and keeps the CORE_SLOW_REQUEST_LOG_SIZE slowest requests,
+# with their SQL, for the admin-only api/debug/slow-requests/ endpoint.
+
+CORE_REQUEST_PROFILING = True
+CORE_SLOW_REQUEST_LOG_SIZE = 50
+
+if CORE_REQUEST_PROFILING:
+    MIDDLEWARE.insert(0, 'core.middleware.QueryTimingMiddleware')